@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def wide_table():
+    return sa.Table(
+        "events",
+        sa.MetaData(),
+        sa.Column("id", sa.BigInteger),
+        sa.Column("name", sa.String(64)),
+        sa.Column("amount", sa.Float),
+        sa.Column("day", sa.Date),
+        sa.Column("at", sa.Time),
+        sa.Column("ts", sa.DateTime),
+        schema="ki_home",
+    )
+
+
+@pytest.fixture
+def events_server(fake_server):
+    fake_server.add_table(
+        "ki_home",
+        "events",
+        [
+            ("id", "BIGINT"),
+            ("name", "VARCHAR(64)", 64),
+            ("amount", "DOUBLE"),
+            ("day", "DATE"),
+            ("at", "TYPE_TIME"),
+            ("ts", "TIMESTAMP"),
+        ],
+    )
+    return fake_server
+
+
+def _event_rows(count):
+    start = datetime.datetime(2021, 1, 1)
+    return [
+        (
+            i,
+            "event-%d" % i,
+            i * 0.5,
+            (start + datetime.timedelta(days=i % 365)),
+            (start + datetime.timedelta(seconds=i % 86400)),
+            start + datetime.timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def event_rows():
+    return _event_rows
@@ -0,0 +1,152 @@
+"""Dialect overhead benchmarks against the in-process fake ODBC driver.
+
+Run with ``pytest benchmarks/``; see the pytest-benchmark documentation for
+``--benchmark-autosave`` / ``--benchmark-compare`` to track regressions.
+
+"""
+
+import datetime
+import decimal
+
+import pytest
+import sqlalchemy as sa
+
+
+def _multi_join(tables):
+    stmt = sa.select([t.c.id for t in tables] + [tables[0].c.name])
+    for left, right in zip(tables, tables[1:]):
+        stmt = stmt.select_from(left.join(right, left.c.id == right.c.parent_id))
+    return stmt.where(tables[0].c.name.like("a%")).order_by(tables[0].c.id).limit(100)
+
+
+@pytest.mark.parametrize("legacy_schema_aliasing", [False, True], ids=["plain", "legacy-aliasing"])
+def test_compile_multi_join_select(benchmark, make_fake_engine, legacy_schema_aliasing):
+    metadata = sa.MetaData()
+    tables = [
+        sa.Table(
+            "t%d" % i,
+            metadata,
+            sa.Column("id", sa.Integer),
+            sa.Column("parent_id", sa.Integer),
+            sa.Column("name", sa.String(32)),
+            schema="ki_home",
+        )
+        for i in range(6)
+    ]
+    stmt = _multi_join(tables)
+    dialect = make_fake_engine(legacy_schema_aliasing=legacy_schema_aliasing).dialect
+
+    benchmark(lambda: stmt.compile(dialect=dialect))
+
+
+def test_reflect_1k_tables(benchmark, fake_server, make_fake_engine):
+    for i in range(1000):
+        fake_server.add_table(
+            "ki_home", "table_%d" % i, [("id", "INTEGER"), ("name", "VARCHAR(32)", 32), ("ts", "TIMESTAMP")]
+        )
+    engine = make_fake_engine()
+
+    def reflect():
+        metadata = sa.MetaData()
+        metadata.reflect(bind=engine)
+        return metadata
+
+    metadata = benchmark.pedantic(reflect, rounds=3)
+    assert len(metadata.tables) == 1000
+
+
+def test_executemany_insert(benchmark, events_server, make_fake_engine, wide_table, event_rows):
+    engine = make_fake_engine()
+    keys = [c.name for c in wide_table.c]
+    params = [dict(zip(keys, row)) for row in event_rows(10000)]
+    for param in params:
+        param["day"] = param["day"].date()
+        param["at"] = param["at"].time()
+
+    def insert():
+        with engine.connect() as conn:
+            conn.execute(wide_table.insert(), params)
+
+    benchmark.pedantic(insert, rounds=5)
+
+
+def test_fetch_large_result_with_dates(benchmark, events_server, make_fake_engine, wide_table, event_rows):
+    events_server.insert("ki_home", "events", event_rows(100000))
+    engine = make_fake_engine()
+    stmt = sa.select([wide_table])
+
+    def fetch():
+        with engine.connect() as conn:
+            result = conn.execute(stmt)
+            count = 0
+            while True:
+                rows = result.fetchmany(5000)
+                if not rows:
+                    break
+                for row in rows:
+                    row["day"], row["at"]
+                count += len(rows)
+            return count
+
+    assert benchmark.pedantic(fetch, rounds=3) == 100000
+    with engine.connect() as conn:
+        row = conn.execute(stmt).first()
+    assert row["day"] == datetime.date(2021, 1, 1)
+    assert row["at"] == datetime.time(0, 0)
+
+
+def test_executemany_bind_throughput_1m(benchmark, fake_server, make_fake_engine):
+    """1M-row executemany over numeric, float, date, datetime, time, binary
+    and string columns: measures the per-parameter bind processing cost."""
+
+    fake_server.add_table(
+        "ki_home",
+        "ledger",
+        [
+            ("id", "BIGINT"),
+            ("amount", "DECIMAL(18,4)"),
+            ("rate", "DOUBLE"),
+            ("day", "DATE"),
+            ("ts", "TIMESTAMP"),
+            ("at", "TYPE_TIME"),
+            ("payload", "BYTES"),
+            ("memo", "VARCHAR(32)", 32),
+        ],
+    )
+    ledger = sa.Table(
+        "ledger",
+        sa.MetaData(),
+        sa.Column("id", sa.BigInteger),
+        sa.Column("amount", sa.Numeric(18, 4)),
+        sa.Column("rate", sa.Float),
+        sa.Column("day", sa.Date),
+        sa.Column("ts", sa.DateTime),
+        sa.Column("at", sa.Time),
+        sa.Column("payload", sa.LargeBinary),
+        sa.Column("memo", sa.String(32)),
+        schema="ki_home",
+    )
+    start = datetime.datetime(2021, 1, 1)
+    amount = decimal.Decimal("12.3400")
+    params = [
+        {
+            "id": i,
+            "amount": amount,
+            "rate": i * 0.25,
+            "day": start.date(),
+            "ts": start,
+            "at": start.time(),
+            "payload": b"\x00\x01",
+            "memo": "m",
+        }
+        for i in range(1000000)
+    ]
+    engine = make_fake_engine()
+
+    def insert():
+        fake_server.tables[("ki_home", "ledger")].rows = []
+        with engine.connect() as conn:
+            conn.execute(ledger.insert(), params)
+
+    benchmark.pedantic(insert, rounds=1)
+    assert len(fake_server.tables[("ki_home", "ledger")].rows) == 1000000
@@ -0,0 +1,25 @@
+"""Import-time benchmarks, each import runs in a fresh interpreter.
+
+Run with ``pytest benchmarks/test_import_time.py``; compare against the
+``python -c pass`` baseline to get the cost of the import itself.
+
+"""
+
+import subprocess
+import sys
+
+
+def _run(code):
+    subprocess.check_call([sys.executable, "-c", code])
+
+
+def test_interpreter_baseline(benchmark):
+    benchmark.pedantic(_run, args=("pass",), rounds=10)
+
+
+def test_import_package(benchmark):
+    benchmark.pedantic(_run, args=("import sa_gpudb",), rounds=10)
+
+
+def test_import_dialect(benchmark):
+    benchmark.pedantic(_run, args=("import sa_gpudb.pyodbc",), rounds=10)
@@ -1,7 +1,9 @@
+import datetime
 import os
 import socket
 import warnings
 
+import pytest
 import sqlalchemy
 
 
@@ -21,8 +23,79 @@ def check_so_file():
         )
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "live: needs a running Kinetica and the Kinetica ODBC driver")
+
+
 def pytest_sessionstart():
-    check_port()
-    check_so_file()
-    sqlalchemy.dialects.registry.register("sa_gpudb", "sa_gpudb.pyodbc", "dialect")
-    sqlalchemy.dialects.registry.load("sa_gpudb")
+    # the names setup.py declares as entry points, for uninstalled checkouts
+    for name in ("sa_gpudb", "kinetica"):
+        sqlalchemy.dialects.registry.register(name, "sa_gpudb.pyodbc", "dialect")
+        sqlalchemy.dialects.registry.load(name)
+    sqlalchemy.dialects.registry.register("kinetica.gpudb", "sa_gpudb.gpudb", "dialect")
+
+
+def pytest_collection_finish(session):
+    # tests running against the in-process fake driver need neither the
+    # cluster nor the ODBC library; deselect the live ones with -m "not live"
+    if any(item.get_closest_marker("live") for item in session.items):
+        check_port()
+        check_so_file()
+
+
+@pytest.fixture
+def fake_server():
+    from sa_gpudb.testing import fake_odbc
+
+    return fake_odbc.Server()
+
+
+@pytest.fixture
+def make_fake_engine(fake_server):
+    # engines on fake_server with further create_engine() arguments
+    from sa_gpudb.testing import fake_odbc
+
+    engines = []
+
+    def make(**kw):
+        engine = sqlalchemy.create_engine(
+            "sa_gpudb://KINETICA", module=fake_odbc, connect_args={"server": fake_server}, **kw
+        )
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def fake_engine(make_fake_engine):
+    return make_fake_engine()
+
+
+@pytest.fixture
+def fake_events(fake_server):
+    # adds a ki_home.events table of count (id, label, ts) rows
+    def add(count):
+        fake_server.add_table("ki_home", "events", [("id", "INTEGER"), ("label", "VARCHAR(32)"), ("ts", "TIMESTAMP")])
+        ts = datetime.datetime(2024, 1, 1)
+        fake_server.insert("ki_home", "events", [(i, "event %d" % i, ts) for i in range(count)])
+        return fake_server.find_table("ki_home.events")
+
+    return add
+
+
+@pytest.fixture
+def fake_http(fake_server):
+    from sa_gpudb.testing import fake_http
+
+    with fake_http.Server(fake_server) as server:
+        yield server
+
+
+@pytest.fixture
+def rest_engine(fake_http):
+    engine = sqlalchemy.create_engine(fake_http.url)
+    yield engine
+    engine.dispose()
@@ -5,42 +5,67 @@
 # This module is part of SQLAlchemy and is released under
 # the MIT License: http://www.opensource.org/licenses/mit-license.php
 
-from sqlalchemy.dialects.mssql import base, pyodbc
+# Importing this package must stay cheap and must not touch other dialects:
+# the types and the dialect class are resolved on first attribute access
+# (PEP 562), and the dialect itself is registered with SQLAlchemy through the
+# ``sqlalchemy.dialects`` entry points declared in setup.py.
 
-base.dialect = pyodbc.dialect
+import importlib
 
-from sqlalchemy.dialects.mssql.base import (
-    INTEGER,
-    BIGINT,
-    SMALLINT,
-    TINYINT,
-    VARCHAR,
-    NVARCHAR,
-    CHAR,
-    NCHAR,
-    TEXT,
-    NTEXT,
-    DECIMAL,
-    NUMERIC,
-    FLOAT,
-    DATETIME,
-    DATETIME2,
-    DATETIMEOFFSET,
-    DATE,
-    TIME,
-    SMALLDATETIME,
-    BINARY,
-    VARBINARY,
-    BIT,
-    REAL,
-    IMAGE,
-    TIMESTAMP,
-    MONEY,
-    SMALLMONEY,
-    UNIQUEIDENTIFIER,
-    SQL_VARIANT,
-    dialect,
-)
+_lazy_attributes = {
+    "INTEGER": "base",
+    "BIGINT": "base",
+    "SMALLINT": "base",
+    "TINYINT": "base",
+    "VARCHAR": "base",
+    "NVARCHAR": "base",
+    "CHAR": "base",
+    "NCHAR": "base",
+    "TEXT": "base",
+    "NTEXT": "base",
+    "DECIMAL": "base",
+    "NUMERIC": "base",
+    "FLOAT": "base",
+    "DATETIME": "base",
+    "DATETIME2": "base",
+    "DATETIMEOFFSET": "base",
+    "DATE": "base",
+    "TIME": "base",
+    "SMALLDATETIME": "base",
+    "BINARY": "base",
+    "VARBINARY": "base",
+    "BIT": "base",
+    "REAL": "base",
+    "IMAGE": "base",
+    "TIMESTAMP": "base",
+    "MONEY": "base",
+    "SMALLMONEY": "base",
+    "UNIQUEIDENTIFIER": "base",
+    "SQL_VARIANT": "base",
+    "GEOMETRY": "geometry",
+    "VECTOR": "vector",
+    "IPV4": "base",
+    "UUID": "base",
+    "ULONG": "base",
+    "KineticaHint": "hints",
+    "with_kinetica_hints": "hints",
+    "kinetica_export": "export",
+    "dialect": "pyodbc",
+}
+
+
+def __getattr__(name):
+    try:
+        module = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
 
 
 __all__ = (
@@ -73,6 +98,14 @@ __all__ = (
     "SMALLMONEY",
     "UNIQUEIDENTIFIER",
     "SQL_VARIANT",
+    "GEOMETRY",
+    "VECTOR",
+    "IPV4",
+    "UUID",
+    "ULONG",
+    "KineticaHint",
+    "with_kinetica_hints",
+    "kinetica_export",
     "dialect",
 )
 
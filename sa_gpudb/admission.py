@@ -0,0 +1,168 @@
+# sa_gpudb/admission.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Client-side admission control for statements sent to Kinetica.
+
+Enabled per engine with dialect arguments::
+
+    engine = create_engine(
+        "kinetica://KINETICA",
+        max_concurrency=8,
+        max_concurrency_per_class={"read": 6, "write": 2, "ddl": 1},
+        admission_timeout=30,
+    )
+
+Every statement the engine executes, from Core or the ORM, first takes a
+slot of its class (``"read"``, ``"write"`` or ``"ddl"``) and then one of the
+engine-wide limit, and holds them while the server executes it.  Statements
+over the limit wait in first-come, first-served order; one still waiting
+after ``admission_timeout`` seconds raises :class:`.AdmissionTimeout`.
+
+``engine.dialect.limiter.stats()`` reports, per class and for the engine
+(``"total"``), the statements in flight and queued, the deepest queue seen,
+and the admitted, timed-out and cumulative wait counts.
+
+"""
+
+import collections
+import contextlib
+import re
+import threading
+from time import perf_counter
+
+from sqlalchemy import exc
+
+from .routing import is_read_only
+
+READ = "read"
+WRITE = "write"
+DDL = "ddl"
+
+_ddl_re = re.compile(r"^\s*(?:CREATE|DROP|ALTER|TRUNCATE|GRANT|REVOKE|REFRESH)\b", re.I)
+
+
+class AdmissionTimeout(exc.TimeoutError):
+    """A statement waited longer than the admission timeout for a slot."""
+
+
+def statement_class(context, statement):
+    """Return ``"read"``, ``"write"`` or ``"ddl"`` for a statement being
+    executed by ``context``."""
+
+    if context.isddl:
+        return DDL
+    elif context.isinsert or context.isupdate or context.isdelete:
+        return WRITE
+    elif _ddl_re.match(statement):
+        return DDL
+    return READ if is_read_only(statement) else WRITE
+
+
+class _Waiter(object):
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class Gate(object):
+    """A counting semaphore handing freed slots to waiters in arrival
+    order."""
+
+    def __init__(self, limit):
+        if limit < 1:
+            raise exc.ArgumentError("Concurrency limits must be at least 1")
+        self.limit = limit
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+        start = perf_counter()
+        waiter.event.wait(timeout)
+        with self._lock:
+            self.wait_time += perf_counter() - start
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+                self.timeouts += 1
+                raise AdmissionTimeout("No slot within %.3f seconds (limit %d)" % (timeout, self.limit))
+            self.admitted += 1
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # hand the slot over; in_flight stays the same
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "wait_time": self.wait_time,
+            }
+
+
+class ConcurrencyLimiter(object):
+    """Per-engine limits on statements in flight, overall and per statement
+    class."""
+
+    def __init__(self, limit=None, class_limits=None, timeout=None):
+        self.total = Gate(int(limit)) if limit else None
+        self.classes = {}
+        for name, class_limit in (class_limits or {}).items():
+            if name not in (READ, WRITE, DDL):
+                raise exc.ArgumentError("Unknown statement class %r; use read, write or ddl" % (name,))
+            self.classes[name] = Gate(int(class_limit))
+        self.timeout = timeout
+
+    @contextlib.contextmanager
+    def admit(self, kind):
+        """Hold a slot of statement class ``kind`` (and of the overall
+        limit) for the duration of the block."""
+
+        deadline = perf_counter() + self.timeout if self.timeout is not None else None
+        gate = self.classes.get(kind)
+        if gate is not None:
+            gate.acquire(self.timeout)
+        try:
+            if self.total is not None:
+                self.total.acquire(max(0.0, deadline - perf_counter()) if deadline is not None else None)
+            try:
+                yield
+            finally:
+                if self.total is not None:
+                    self.total.release()
+        finally:
+            if gate is not None:
+                gate.release()
+
+    def stats(self):
+        stats = {name: gate.stats() for name, gate in self.classes.items()}
+        if self.total is not None:
+            stats["total"] = self.total.stats()
+        return stats
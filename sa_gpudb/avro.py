@@ -0,0 +1,280 @@
+# sa_gpudb/avro.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Minimal Avro binary encoding, as used by Kinetica's REST API.
+
+Only what the ``kinetica+gpudb`` driver exchanges is supported: the
+primitive types, records, arrays, maps and unions.  Schemas are the parsed
+JSON form (``"long"``, ``{"type": "array", "items": ...}``, ``["string",
+"null"]`` ...).  Readers are compiled once per schema into closures, so
+decoding a column-major result batch is one tight loop per column.
+
+When :mod:`fastavro` is installed it is used for decoding instead.
+
+"""
+
+import json
+import struct
+
+_float = struct.Struct("<f")
+_double = struct.Struct("<d")
+
+
+def _fastavro():
+    try:
+        import fastavro
+    except ImportError:
+        return None
+    return fastavro
+
+
+def parse_schema(schema):
+    """Return ``schema`` in parsed form; accepts a JSON string."""
+
+    if isinstance(schema, str) and schema.lstrip()[:1] in ("{", "[", '"'):
+        return json.loads(schema)
+    return schema
+
+
+class Decoder(object):
+    """Reads Avro binary values from a buffer."""
+
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read_long(self):
+        data = self.data
+        pos = self.pos
+        b = data[pos]
+        n = b & 0x7F
+        shift = 7
+        pos += 1
+        while b & 0x80:
+            b = data[pos]
+            n |= (b & 0x7F) << shift
+            shift += 7
+            pos += 1
+        self.pos = pos
+        return (n >> 1) ^ -(n & 1)
+
+    def read_boolean(self):
+        value = self.data[self.pos] == 1
+        self.pos += 1
+        return value
+
+    def read_float(self):
+        value = _float.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def read_double(self):
+        value = _double.unpack_from(self.data, self.pos)[0]
+        self.pos += 8
+        return value
+
+    def read_bytes(self):
+        size = self.read_long()
+        start = self.pos
+        self.pos = start + size
+        return bytes(self.data[start : self.pos])
+
+    def read_string(self):
+        size = self.read_long()
+        start = self.pos
+        self.pos = start + size
+        return str(self.data[start : self.pos], "utf-8")
+
+    def read_null(self):
+        return None
+
+    def read_block_count(self):
+        count = self.read_long()
+        if count < 0:
+            # negative counts are followed by the block size in bytes
+            count = -count
+            self.read_long()
+        return count
+
+
+_primitive_readers = {
+    "null": Decoder.read_null,
+    "boolean": Decoder.read_boolean,
+    "int": Decoder.read_long,
+    "long": Decoder.read_long,
+    "float": Decoder.read_float,
+    "double": Decoder.read_double,
+    "bytes": Decoder.read_bytes,
+    "string": Decoder.read_string,
+}
+
+
+def compile_reader(schema):
+    """Return a function reading one ``schema`` value from a :class:`.Decoder`."""
+
+    schema = parse_schema(schema)
+    if isinstance(schema, str):
+        return _primitive_readers[schema]
+    elif isinstance(schema, list):
+        branches = [compile_reader(s) for s in schema]
+
+        def read_union(decoder):
+            return branches[decoder.read_long()](decoder)
+
+        return read_union
+
+    kind = schema["type"]
+    if kind in _primitive_readers:
+        return _primitive_readers[kind]
+    elif kind == "record":
+        fields = [(f["name"], compile_reader(f["type"])) for f in schema["fields"]]
+
+        def read_record(decoder):
+            return {name: read(decoder) for name, read in fields}
+
+        return read_record
+    elif kind == "array":
+        read_item = compile_reader(schema["items"])
+
+        def read_array(decoder):
+            items = []
+            append = items.append
+            count = decoder.read_block_count()
+            while count:
+                for _ in range(count):
+                    append(read_item(decoder))
+                count = decoder.read_block_count()
+            return items
+
+        return read_array
+    elif kind == "map":
+        read_value = compile_reader(schema["values"])
+
+        def read_map(decoder):
+            items = {}
+            count = decoder.read_block_count()
+            while count:
+                for _ in range(count):
+                    key = decoder.read_string()
+                    items[key] = read_value(decoder)
+                count = decoder.read_block_count()
+            return items
+
+        return read_map
+    raise ValueError("Unsupported Avro type %r" % (kind,))
+
+
+_readers = {}
+
+
+def reader_for(schema):
+    """Return a function decoding one ``schema`` value from bytes, cached
+    per schema JSON string."""
+
+    key = schema if isinstance(schema, str) else None
+    if key is not None and key in _readers:
+        return _readers[key]
+
+    fastavro = _fastavro()
+    if fastavro is not None:
+        import io
+
+        parsed = fastavro.parse_schema(parse_schema(schema))
+
+        def read(data):
+            return fastavro.schemaless_reader(io.BytesIO(data), parsed)
+
+    else:
+        compiled = compile_reader(schema)
+
+        def read(data):
+            return compiled(Decoder(memoryview(data)))
+
+    if key is not None:
+        if len(_readers) > 256:
+            _readers.clear()
+        _readers[key] = read
+    return read
+
+
+def decode(data, schema):
+    """Decode one ``schema`` value from bytes ``data``."""
+
+    return reader_for(schema)(data)
+
+
+def _write_long(buf, n):
+    n = (n << 1) ^ (n >> 63)
+    while n & ~0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _write_bytes(buf, value):
+    _write_long(buf, len(value))
+    buf += value
+
+
+def _union_branch(value, schema):
+    for index, branch in enumerate(schema):
+        name = branch if isinstance(branch, str) else branch["type"]
+        if (value is None) == (name == "null"):
+            return index, branch
+    raise ValueError("%r does not match union %r" % (value, schema))
+
+
+def write(buf, value, schema):
+    """Append the Avro encoding of ``value`` to bytearray ``buf``."""
+
+    if isinstance(schema, list):
+        index, branch = _union_branch(value, schema)
+        _write_long(buf, index)
+        write(buf, value, branch)
+        return
+    kind = schema if isinstance(schema, str) else schema["type"]
+
+    if kind == "null":
+        pass
+    elif kind == "boolean":
+        buf.append(1 if value else 0)
+    elif kind in ("int", "long"):
+        _write_long(buf, value)
+    elif kind == "float":
+        buf += _float.pack(value)
+    elif kind == "double":
+        buf += _double.pack(value)
+    elif kind == "bytes":
+        _write_bytes(buf, value)
+    elif kind == "string":
+        _write_bytes(buf, value.encode("utf-8"))
+    elif kind == "record":
+        for field in schema["fields"]:
+            write(buf, value[field["name"]], field["type"])
+    elif kind == "array":
+        if value:
+            _write_long(buf, len(value))
+            for item in value:
+                write(buf, item, schema["items"])
+        _write_long(buf, 0)
+    elif kind == "map":
+        if value:
+            _write_long(buf, len(value))
+            for key, item in value.items():
+                _write_bytes(buf, key.encode("utf-8"))
+                write(buf, item, schema["values"])
+        _write_long(buf, 0)
+    else:
+        raise ValueError("Unsupported Avro type %r" % (kind,))
+
+
+def encode(value, schema):
+    """Return the Avro encoding of ``value`` as bytes."""
+
+    buf = bytearray()
+    write(buf, value, parse_schema(schema))
+    return bytes(buf)
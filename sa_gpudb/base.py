@@ -7,13 +7,17 @@
 
  
 import datetime
+import ipaddress
 import operator
 import re
+import socket
+import uuid
+from time import perf_counter
 
-from sqlalchemy import sql, schema as sa_schema, exc, util
+from sqlalchemy import event, sql, schema as sa_schema, exc, util
 from sqlalchemy.sql import compiler, expression, util as sql_util
 from sqlalchemy import engine
-from sqlalchemy.engine import reflection, default
+from sqlalchemy.engine import reflection, default, Connection
 from sqlalchemy import types as sqltypes
 from sqlalchemy.types import (
     INTEGER,
@@ -34,6 +38,16 @@ from sqlalchemy.types import (
 )
 
 from sqlalchemy.util import update_wrapper
+from . import instrumentation
+from .geometry import GEOMETRY
+from .admission import ConcurrencyLimiter, statement_class
+from .export import FORMATS as export_formats
+from .hints import coerce_hints, inject_hints, render_hints, statement_kind
+from . import multivalues
+from .prefetch import PrefetchResultProxy
+from .spill import SpillBufferedResultProxy
+from .vector import VECTOR, vector_dimension
+from .slow_query import SlowQueryLog
 #from . import information_schema as ischema
 
 # Column types from ODBC get columns response
@@ -56,6 +70,31 @@ ODBC_TYPE_TYPE_TIME = "TYPE_TIME"
 ODBC_TYPE_DATETIME = "DATETIME"
 ODBC_TYPE_GEOMETRY = "GEOMETRY"
 ODBC_TYPE_IPV4 = "IPV4"
+ODBC_TYPE_UUID = "UUID"
+ODBC_TYPE_ULONG = "ULONG"
+ODBC_TYPE_UNSIGNED_BIGINT = "UNSIGNED BIGINT"
+ODBC_TYPE_BOOLEAN = "BOOLEAN"
+ODBC_TYPE_VECTOR = "VECTOR"
+
+# connection record info key holding the session's resource group, set by
+# the last SET RESOURCE GROUP issued on it (absent: the user's default)
+RESOURCE_GROUP_KEY = "kinetica_resource_group"
+
+# Kinetica virtual catalog queries used for table statistics; answered from
+# metadata, without scanning the table
+KI_OBJECTS_QUERY = "SELECT * FROM ki_catalog.ki_objects WHERE schema_name = ? AND object_name = ?"
+KI_PARTITIONS_QUERY = "SELECT * FROM ki_catalog.ki_partitions WHERE schema_name = ? AND table_name = ?"
+
+# get_table_stats() key -> candidate ki_objects column names
+TABLE_STATS_COLUMNS = {
+    "row_count": ("row_count", "num_rows", "size"),
+    "memory_size": ("memory_size", "total_memory", "memory"),
+    "shard_kind": ("shard_kind",),
+    "shard_key": ("shard_key",),
+    "partition_kind": ("partition_kind",),
+    "persistence": ("persistence",),
+    "ttl": ("ttl",),
+}
 
 # http://sqlserverbuilds.blogspot.com/
 MS_2012_VERSION = (11,)
@@ -270,13 +309,9 @@ class TINYINT(sqltypes.Integer):
 
 class _MSDate(sqltypes.Date):
     def bind_processor(self, dialect):
-        def process(value):
-            if type(value) == datetime.date:
-                return datetime.datetime(value.year, value.month, value.day)
-            else:
-                return value
-
-        return process
+        # dates bind as-is to Kinetica's native DATE type over REST; the
+        # ODBC dialect widens them to datetime, see pyodbc._MSDate_pyodbc
+        return None
 
     _reg = re.compile(r"(\d+)-(\d+)-(\d+)")
 
@@ -300,17 +335,9 @@ class TIME(sqltypes.TIME):
         self.precision = precision
         super(TIME, self).__init__()
 
-    __zero_date = datetime.date(1900, 1, 1)
-
     def bind_processor(self, dialect):
-        def process(value):
-            if isinstance(value, datetime.datetime):
-                value = datetime.datetime.combine(self.__zero_date, value.time())
-            elif isinstance(value, datetime.time):
-                value = datetime.datetime.combine(self.__zero_date, value)
-            return value
-
-        return process
+        # times bind natively; no 1900-01-01 datetime wrapping
+        return None
 
     _reg = re.compile(r"(\d+):(\d+):(\d+)(?:\.(\d{0,6}))?")
 
@@ -334,13 +361,9 @@ _MSTime = TIME
 
 class _DateTimeBase(object):
     def bind_processor(self, dialect):
-        def process(value):
-            if type(value) == datetime.date:
-                return datetime.datetime(value.year, value.month, value.day)
-            else:
-                return value
-
-        return process
+        # the driver binds datetime and date values to TIMESTAMP / DATETIME
+        # columns itself
+        return None
 
 
 class _MSDateTime(_DateTimeBase, sqltypes.DateTime):
@@ -428,6 +451,134 @@ class SQL_VARIANT(sqltypes.TypeEngine):
     __visit_name__ = "SQL_VARIANT"
 
 
+def _ipv4_to_int(value):
+    return int.from_bytes(socket.inet_aton(value), "big")
+
+
+def _int_to_ipv4(value):
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+class IPV4(sqltypes.TypeEngine):
+    """Kinetica IPV4 type.
+
+    Binds :class:`ipaddress.IPv4Address`, ``int`` or dotted strings, and
+    returns :class:`ipaddress.IPv4Address` objects, or plain ``int`` values
+    with ``as_int=True``.  :meth:`.comparator_factory.in_network` turns a
+    CIDR block into a range predicate evaluated by the server.
+
+    """
+
+    __visit_name__ = "IPV4"
+
+    def __init__(self, as_int=False):
+        self.as_int = as_int
+
+    @property
+    def python_type(self):
+        return int if self.as_int else ipaddress.IPv4Address
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, util.string_types):
+                return value
+            elif isinstance(value, int):
+                return _int_to_ipv4(value)
+            return str(value)
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        if self.as_int:
+
+            def process(value):
+                if value is None or isinstance(value, int):
+                    return value
+                return _ipv4_to_int(value)
+
+        else:
+            IPv4Address = ipaddress.IPv4Address
+
+            def process(value):
+                if value is None:
+                    return None
+                return IPv4Address(value)
+
+        return process
+
+    class comparator_factory(sqltypes.TypeEngine.Comparator):
+        def in_network(self, network):
+            """Range predicate matching addresses inside CIDR ``network``."""
+
+            network = ipaddress.IPv4Network(network, strict=False)
+            return self.expr.between(network.network_address, network.broadcast_address)
+
+        def part(self, index):
+            """``IPV4_PART``: octet ``index`` (1-4) as an integer."""
+
+            return sql.func.IPV4_PART(self.expr, index, type_=sqltypes.Integer())
+
+
+class UUID(sqltypes.TypeEngine):
+    """Kinetica UUID type; returns :class:`uuid.UUID` objects, or strings
+    with ``as_uuid=False``."""
+
+    __visit_name__ = "UUID"
+
+    def __init__(self, as_uuid=True):
+        self.as_uuid = as_uuid
+
+    @property
+    def python_type(self):
+        return uuid.UUID if self.as_uuid else str
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, util.string_types):
+                return value
+            return str(value)
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        if not self.as_uuid:
+            return None
+
+        UUID = uuid.UUID
+
+        def process(value):
+            if value is None or isinstance(value, UUID):
+                return value
+            elif isinstance(value, (bytes, bytearray)):
+                return UUID(bytes=bytes(value))
+            return UUID(value)
+
+        return process
+
+
+class ULONG(sqltypes.BigInteger):
+    """Kinetica unsigned 64-bit integer (``UNSIGNED BIGINT``)."""
+
+    __visit_name__ = "ULONG"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is not None and not 0 <= value <= 0xFFFFFFFFFFFFFFFF:
+                raise ValueError("%r is out of range for an unsigned 64-bit integer" % (value,))
+            return value
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or isinstance(value, int):
+                return value
+            # drivers hand values above 2**63 back as strings or Decimals
+            return int(value)
+
+        return process
+
+
 # old names.
 MSDateTime = _MSDateTime
 MSDate = _MSDate
@@ -482,6 +633,13 @@ ischema_names = {
     "smallmoney": SMALLMONEY,
     "uniqueidentifier": UNIQUEIDENTIFIER,
     "sql_variant": SQL_VARIANT,
+    "geometry": GEOMETRY,
+    "vector": VECTOR,
+    "ipv4": IPV4,
+    "uuid": UUID,
+    "ulong": ULONG,
+    "unsigned bigint": ULONG,
+    "boolean": sqltypes.BOOLEAN,
 }
 
 
@@ -613,12 +771,31 @@ class MSTypeCompiler(compiler.GenericTypeCompiler):
     def visit_SQL_VARIANT(self, type_, **kw):
         return "SQL_VARIANT"
 
+    def visit_GEOMETRY(self, type_, **kw):
+        return "GEOMETRY"
+
+    def visit_IPV4(self, type_, **kw):
+        return "IPV4"
+
+    def visit_UUID(self, type_, **kw):
+        return "UUID"
+
+    def visit_ULONG(self, type_, **kw):
+        return "UNSIGNED BIGINT"
+
+    def visit_VECTOR(self, type_, **kw):
+        if type_.dim is None:
+            raise exc.CompileError("VECTOR requires a dimension")
+        return "VECTOR(%d)" % type_.dim
+
 
 class MSExecutionContext(default.DefaultExecutionContext):
     _enable_identity_insert = False
     _select_lastrowid = False
     _result_proxy = None
     _lastrowid = None
+    _kinetica_event = None
+    _rowcount = None
 
     def _opt_encode(self, statement):
         if not self.dialect.supports_unicode_statements:
@@ -626,8 +803,25 @@ class MSExecutionContext(default.DefaultExecutionContext):
         else:
             return statement
 
+    def create_cursor(self):
+        """Create the cursor, switching the session's resource group first
+        when the statement's differs."""
+
+        cursor = super(MSExecutionContext, self).create_cursor()
+        group = self.dialect._resource_group(self.execution_options)
+        info = self._dbapi_connection.info
+        if group != info.get(RESOURCE_GROUP_KEY):
+            self.dialect._set_resource_group(self._dbapi_connection, cursor, group)
+            info[RESOURCE_GROUP_KEY] = group
+        return cursor
+
     def pre_exec(self):
-        """Activate IDENTITY_INSERT if needed."""
+        """Add connection-level Kinetica hints; activate IDENTITY_INSERT if
+        needed."""
+
+        hints = self.root_connection._execution_options.get("kinetica_hints")
+        if hints and not self.isddl:
+            self._add_kinetica_hints(hints)
 
         if self.isinsert:
             tbl = self.compiled.statement.table
@@ -680,7 +874,10 @@ class MSExecutionContext(default.DefaultExecutionContext):
             self._lastrowid = int(row[0])
 
         if (self.isinsert or self.isupdate or self.isdelete) and self.compiled.returning:
-            self._result_proxy = engine.FullyBufferedResultProxy(self)
+            if self.execution_options.get("spill_threshold") is not None:
+                self._result_proxy = self._result_proxy_cls(SpillBufferedResultProxy)(self)
+            else:
+                self._result_proxy = self._result_proxy_cls(engine.FullyBufferedResultProxy)(self)
 
         if self._enable_identity_insert:
             conn._cursor_execute(
@@ -693,9 +890,49 @@ class MSExecutionContext(default.DefaultExecutionContext):
                 self,
             )
 
+    @classmethod
+    def _init_statement(cls, dialect, connection, dbapi_connection, statement, parameters):
+        self = super(MSExecutionContext, cls)._init_statement(
+            dialect, connection, dbapi_connection, statement, parameters
+        )
+        # pre_exec() only runs for compiled statements
+        hints = connection._execution_options.get("kinetica_hints")
+        if hints:
+            self._add_kinetica_hints(hints)
+        return self
+
+    def _add_kinetica_hints(self, hints):
+        # statement-level hints were rendered by the compiler and win over
+        # connection-level hints of the same name
+        if self.compiled is not None:
+            compiled_hints = coerce_hints(self.compiled.statement.get_execution_options().get("kinetica_hints"))
+            names = set(h.name for h in compiled_hints)
+            hints = [h for h in coerce_hints(hints) if h.name not in names]
+        if not hints:
+            return
+        if self.isinsert:
+            kind = "insert"
+        elif self.isupdate:
+            kind = "update"
+        elif self.isdelete:
+            kind = "delete"
+        else:
+            # selects, and textual statements of any kind
+            kind = statement_kind(self.unicode_statement)
+            if kind is None:
+                return
+        self.unicode_statement = inject_hints(self.unicode_statement, hints, kind)
+        self.statement = self._opt_encode(self.unicode_statement)
+
     def get_lastrowid(self):
         return self._lastrowid
 
+    @property
+    def rowcount(self):
+        if self._rowcount is not None:
+            return self._rowcount
+        return self.cursor.rowcount
+
     def handle_dbapi_exception(self, e):
         if self._enable_identity_insert:
             try:
@@ -708,11 +945,24 @@ class MSExecutionContext(default.DefaultExecutionContext):
             except Exception:
                 pass
 
+    def _result_proxy_cls(self, result_cls):
+        if self._kinetica_event is not None:
+            return instrumentation.instrumented(result_cls)
+        return result_cls
+
     def get_result_proxy(self):
         if self._result_proxy:
             return self._result_proxy
+        elif self.execution_options.get("spill_threshold") is not None:
+            return self._result_proxy_cls(SpillBufferedResultProxy)(self)
+        elif self.execution_options.get("prefetch_batches"):
+            return self._result_proxy_cls(PrefetchResultProxy)(self)
         else:
-            return engine.ResultProxy(self)
+            return self._result_proxy_cls(engine.ResultProxy)(self)
+
+
+_ONE_MILLISECOND = datetime.timedelta(milliseconds=1)
+_ONE_DAY = datetime.timedelta(days=1)
 
 
 class MSSQLCompiler(compiler.SQLCompiler):
@@ -723,9 +973,39 @@ class MSSQLCompiler(compiler.SQLCompiler):
         {"doy": "dayofyear", "dow": "weekday", "milliseconds": "millisecond", "microseconds": "microsecond"},
     )
 
+    # Kinetica's native function for each (normalized) EXTRACT field; other
+    # fields compile to EXTRACT(field FROM expr)
+    extract_functions = {
+        "year": "YEAR",
+        "quarter": "QUARTER",
+        "month": "MONTH",
+        "week": "WEEK",
+        "day": "DAY",
+        "weekday": "DAYOFWEEK",
+        "dayofyear": "DAYOFYEAR",
+        "hour": "HOUR",
+        "minute": "MINUTE",
+        "second": "SECOND",
+    }
+
+    # unit names accepted by DATE_TRUNC, TIMESTAMPADD and TIMESTAMPDIFF
+    date_units = {
+        "year": "YEAR",
+        "quarter": "QUARTER",
+        "month": "MONTH",
+        "week": "WEEK",
+        "day": "DAY",
+        "hour": "HOUR",
+        "minute": "MINUTE",
+        "second": "SECOND",
+        "millisecond": "MILLISECOND",
+    }
+
     def __init__(self, *args, **kwargs):
         self.tablealiases = {}
+        start = perf_counter()
         super(MSSQLCompiler, self).__init__(*args, **kwargs)
+        self._kinetica_compile_time = perf_counter() - start
 
     def _with_legacy_schema_aliasing(fn):
         def decorate(self, *arg, **kw):
@@ -746,6 +1026,9 @@ class MSSQLCompiler(compiler.SQLCompiler):
     def visit_length_func(self, fn, **kw):
         return "LEN%s" % self.function_argspec(fn, **kw)
 
+    def visit_approx_count_distinct_func(self, fn, **kw):
+        return "APPROX_COUNT_DISTINCT%s" % self.function_argspec(fn, **kw)
+
     def visit_char_length_func(self, fn, **kw):
         return "LEN%s" % self.function_argspec(fn, **kw)
 
@@ -765,6 +1048,10 @@ class MSSQLCompiler(compiler.SQLCompiler):
         """MS-SQL puts TOP, it's version of LIMIT here"""
 
         s = ""
+        hints = select._execution_options.get("kinetica_hints")
+        if hints:
+            s += render_hints(hints, "select") + " "
+
         if select._distinct:
             s += "DISTINCT "
 
@@ -779,6 +1066,26 @@ class MSSQLCompiler(compiler.SQLCompiler):
         else:
             return compiler.SQLCompiler.get_select_precolumns(self, select, **kw)
 
+    def _with_kinetica_hints(self, stmt, text, kind):
+        hints = stmt._execution_options.get("kinetica_hints")
+        return inject_hints(text, hints, kind) if hints else text
+
+    def visit_compound_select(self, cs, **kw):
+        text = super(MSSQLCompiler, self).visit_compound_select(cs, **kw)
+        return self._with_kinetica_hints(cs, text, "select")
+
+    def visit_insert(self, insert_stmt, **kw):
+        text = super(MSSQLCompiler, self).visit_insert(insert_stmt, **kw)
+        return self._with_kinetica_hints(insert_stmt, text, "insert")
+
+    def visit_update(self, update_stmt, **kw):
+        text = super(MSSQLCompiler, self).visit_update(update_stmt, **kw)
+        return self._with_kinetica_hints(update_stmt, text, "update")
+
+    def visit_delete(self, delete_stmt, **kw):
+        text = super(MSSQLCompiler, self).visit_delete(delete_stmt, **kw)
+        return self._with_kinetica_hints(delete_stmt, text, "delete")
+
     def get_from_hint_text(self, table, text):
         return text
 
@@ -863,15 +1170,6 @@ class MSSQLCompiler(compiler.SQLCompiler):
 
     def _schema_aliased_table(self, table):
         if getattr(table, "schema", None) is not None:
-            if self.dialect._warn_schema_aliasing and table.schema.lower() != "information_schema":
-                util.warn(
-                    "legacy_schema_aliasing flag is defaulted to True; "
-                    "some schema-qualified queries may not function "
-                    "correctly. Consider setting this flag to False for "
-                    "modern SQL Server versions; this flag will default to "
-                    "False in version 1.1"
-                )
-
             if table not in self.tablealiases:
                 self.tablealiases[table] = table.alias()
             return self.tablealiases[table]
@@ -880,7 +1178,102 @@ class MSSQLCompiler(compiler.SQLCompiler):
 
     def visit_extract(self, extract, **kw):
         field = self.extract_map.get(extract.field, extract.field)
-        return "DATEPART(%s, %s)" % (field, self.process(extract.expr, **kw))
+        function = self.extract_functions.get(field)
+        if function is not None:
+            return "%s(%s)" % (function, self.process(extract.expr, **kw))
+        return "EXTRACT(%s FROM %s)" % (field.upper(), self.process(extract.expr, **kw))
+
+    def _date_unit(self, clause):
+        value = getattr(clause, "value", None)
+        if value is None:
+            value = getattr(clause, "name", None)
+        unit = str(value).lower().rstrip("s") if value is not None else None
+        unit = self.extract_map.get(unit, unit)
+        if unit not in self.date_units:
+            raise exc.CompileError("Unsupported Kinetica date unit: %r" % (value,))
+        return self.date_units[unit]
+
+    def _interval_literal(self, clause, unit, **kw):
+        # timedelta widths are rendered inline as an integer count of ``unit``
+        value = getattr(clause, "value", None)
+        if isinstance(value, datetime.timedelta):
+            count, remainder = divmod(value, unit)
+            if remainder:
+                unit_name = "days" if unit == _ONE_DAY else "milliseconds"
+                raise exc.CompileError("Interval %r is not a whole number of %s" % (value, unit_name))
+            return str(count)
+        return self.process(clause, **kw)
+
+    def visit_date_trunc_func(self, fn, **kw):
+        unit, expr = fn.clauses.clauses
+        return "DATE_TRUNC(%s, %s)" % (self._date_unit(unit), self.process(expr, **kw))
+
+    def visit_timestampadd_func(self, fn, **kw):
+        unit, amount, expr = fn.clauses.clauses
+        return "TIMESTAMPADD(%s, %s, %s)" % (
+            self._date_unit(unit),
+            self.process(amount, **kw),
+            self.process(expr, **kw),
+        )
+
+    def visit_timestampdiff_func(self, fn, **kw):
+        unit, start, end = fn.clauses.clauses
+        return "TIMESTAMPDIFF(%s, %s, %s)" % (self._date_unit(unit), self.process(start, **kw), self.process(end, **kw))
+
+    def visit_time_bucket_func(self, fn, **kw):
+        """``TIME_BUCKET(width, expr[, offset])``; ``timedelta`` widths and
+        offsets are rendered as milliseconds."""
+
+        width, expr = fn.clauses.clauses[:2]
+        args = [self._interval_literal(width, _ONE_MILLISECOND, **kw), self.process(expr, **kw)]
+        args.extend(self._interval_literal(c, _ONE_MILLISECOND, **kw) for c in fn.clauses.clauses[2:])
+        return "TIME_BUCKET(%s)" % ", ".join(args)
+
+    def visit_date_bucket_func(self, fn, **kw):
+        """``DATE_BUCKET(width, expr[, offset])``; ``timedelta`` widths and
+        offsets are rendered as days."""
+
+        width, expr = fn.clauses.clauses[:2]
+        args = [self._interval_literal(width, _ONE_DAY, **kw), self.process(expr, **kw)]
+        args.extend(self._interval_literal(c, _ONE_DAY, **kw) for c in fn.clauses.clauses[2:])
+        return "DATE_BUCKET(%s)" % ", ".join(args)
+
+    def render_literal_value(self, value, type_):
+        """
+        For date and datetime values, convert to a string
+        format acceptable to MSSQL. That seems to be the
+        so-called ODBC canonical date format which looks
+        like this:
+
+            yyyy-mm-dd hh:mi:ss.mmm(24h)
+
+        For other data types, call the base class implementation.
+        """
+        # datetime and date are both subclasses of datetime.date
+        if issubclass(type(value), datetime.date):
+            # SQL Server wants single quotes around the date string.
+            return "'" + str(value) + "'"
+        else:
+            return super(MSSQLCompiler, self).render_literal_value(value, type_)
+
+    def visit_kinetica_export(self, export, **kw):
+        if isinstance(export.source, sa_schema.Table):
+            text = "EXPORT TABLE %s" % self.preparer.format_table(export.source)
+        else:
+            kw["literal_binds"] = True
+            text = "EXPORT QUERY (%s)" % self.process(export.source, **kw)
+            # the rows returned describe the files written, not the query
+            del self._result_columns[:]
+        text += "\nINTO FILE PATH %s\nFORMAT %s" % (
+            self.render_literal_value(export.path, sqltypes.String()),
+            export_formats[export.format],
+        )
+        if export.options:
+            text += "\nWITH OPTIONS (%s)" % ", ".join(
+                "%s = %s" % (name, self.render_literal_value(value, sqltypes.String()))
+                for name, value in export.options.items()
+            )
+        return text
 
     def visit_savepoint(self, savepoint_stmt):
         return "SAVE TRANSACTION %s" % self.preparer.format_savepoint(savepoint_stmt)
@@ -945,15 +1338,11 @@ class MSSQLCompiler(compiler.SQLCompiler):
             return ""
 
     def update_from_clause(self, update_stmt, from_table, extra_froms, from_hints, **kw):
-        """Render the UPDATE..FROM clause specific to MSSQL.
+        """Render the UPDATE..FROM clause; Kinetica lists only the joined
+        tables, not the table being updated."""
 
-        In MSSQL, if the UPDATE statement involves an alias of the table to
-        be updated, then the table itself must be added to the FROM list as
-        well. Otherwise, it is optional. Here, we add it regardless.
-
-        """
         return "FROM " + ", ".join(
-            t._compiler_dispatch(self, asfrom=True, fromhints=from_hints, **kw) for t in [from_table] + extra_froms
+            t._compiler_dispatch(self, asfrom=True, fromhints=from_hints, **kw) for t in extra_froms
         )
 
 
@@ -977,24 +1366,6 @@ class MSSQLStrictCompiler(MSSQLCompiler):
         kw["literal_binds"] = True
         return "%s NOT IN %s" % (self.process(binary.left, **kw), self.process(binary.right, **kw))
 
-    def render_literal_value(self, value, type_):
-        """
-        For date and datetime values, convert to a string
-        format acceptable to MSSQL. That seems to be the
-        so-called ODBC canonical date format which looks
-        like this:
-
-            yyyy-mm-dd hh:mi:ss.mmm(24h)
-
-        For other data types, call the base class implementation.
-        """
-        # datetime and date are both subclasses of datetime.date
-        if issubclass(type(value), datetime.date):
-            # SQL Server wants single quotes around the date string.
-            return "'" + str(value) + "'"
-        else:
-            return super(MSSQLStrictCompiler, self).render_literal_value(value, type_)
-
 
 class MSDDLCompiler(compiler.DDLCompiler):
     def get_column_specification(self, column, **kwargs):
@@ -1031,6 +1402,20 @@ class MSDDLCompiler(compiler.DDLCompiler):
 
         return colspec
 
+    def post_create_table(self, table):
+        """Render ``kinetica_ttl`` (minutes) and ``kinetica_chunk_size`` as
+        ``USING TABLE PROPERTIES``."""
+
+        options = table.dialect_options[self.dialect.name]
+        properties = [
+            "%s = %d" % (name, int(options[key]))
+            for name, key in (("CHUNK_SIZE", "chunk_size"), ("TTL", "ttl"))
+            if options[key] is not None
+        ]
+        if properties:
+            return "\nUSING TABLE PROPERTIES (%s)" % ", ".join(properties)
+        return ""
+
     def visit_create_index(self, create, include_schema=False):
         index = create.element
         self._verify_index_table(index)
@@ -1141,6 +1526,79 @@ def _switch_db(dbname, connection, fn, *arg, **kw):
             connection.execute("use %s" % current_db)
 
 
+def _row_dicts(cursor):
+    names = [d[0].lower() for d in cursor.description or ()]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class KineticaInspector(reflection.Inspector):
+    """Inspector adding Kinetica specific reflection methods."""
+
+    def get_table_stats(self, table_name, schema=None, **kw):
+        """Return row count, memory size and shard / partition information
+        for a table, read from Kinetica's catalog rather than by scanning it.
+
+        ``table_name`` may be a :class:`_schema.Table`.  The result is a
+        dictionary with the keys ``row_count``, ``memory_size``,
+        ``shard_kind``, ``shard_key``, ``partition_kind``, ``partitions``,
+        ``persistence`` and ``ttl``; values not reported by the server are
+        ``None``.
+
+        """
+        if isinstance(table_name, sa_schema.Table):
+            table_name, schema = table_name.name, table_name.schema
+        elif schema is None and "." in table_name:
+            schema, table_name = table_name.split(".", 1)
+        return self.dialect.get_table_stats(self.bind, table_name, schema, info_cache=self.info_cache, **kw)
+
+
+class KineticaConnection(Connection):
+    """Connection answering the ``checkfirst`` table lookups of
+    ``MetaData.create_all()`` / ``drop_all()`` from one catalog listing per
+    schema, instead of one catalog call per table."""
+
+    _kinetica_existing_tables = None
+
+    def _run_visitor(self, visitorcallable, element, **kwargs):
+        batch = kwargs.get("checkfirst") and isinstance(element, sa_schema.MetaData)
+        if not batch or self._kinetica_existing_tables is not None:
+            return super(KineticaConnection, self)._run_visitor(visitorcallable, element, **kwargs)
+        self._kinetica_existing_tables = {}
+        try:
+            return super(KineticaConnection, self)._run_visitor(visitorcallable, element, **kwargs)
+        finally:
+            self._kinetica_existing_tables = None
+
+    def _execute_clauseelement(self, elem, multiparams, params):
+        plan = None
+        if isinstance(elem, expression.Insert) and elem._has_multi_parameters and not multiparams and not params:
+            plan = self.dialect._plan_multivalues(elem)
+        if plan is None:
+            return super(KineticaConnection, self)._execute_clauseelement(elem, multiparams, params)
+        return self._execute_multivalues(plan)
+
+    def _execute_multivalues(self, plan):
+        # the batches of a split multi-VALUES insert, in order and in one
+        # transaction; the connection stays open until the last of them
+        dialect = self.dialect
+        close_with_result, self.should_close_with_result = self.should_close_with_result, False
+        try:
+            total = 0
+            with self.begin():
+                for rows, parameters in plan.batches(dialect.multivalues_executemany):
+                    compiled = dialect._multivalues_statement(plan, rows, self.schema_for_object)
+                    result = self.execute(compiled, parameters)
+                    rowcount = result.rowcount
+                    total = total + rowcount if total >= 0 and rowcount >= 0 else -1
+            # ResultProxy.rowcount is memoized from the last batch
+            result.context._rowcount = result.rowcount = total
+            return result
+        finally:
+            self.should_close_with_result = close_with_result
+            if close_with_result:
+                self.close()
+
+
 def _owner_plus_db(dialect, schema):
     if not schema:
         return None, dialect.default_schema_name
@@ -1168,6 +1626,15 @@ class KineticaBaseDialect(default.DefaultDialect):
     engine_config_types = default.DefaultDialect.engine_config_types.union(
         [
             ("legacy_schema_aliasing", util.asbool),
+            ("slow_query_threshold", float),
+            ("slow_query_redact", util.asbool),
+            ("resource_group", str),
+            ("priority", str),
+            ("max_concurrency", int),
+            ("admission_timeout", float),
+            ("multivalues_max_parameters", int),
+            ("multivalues_max_bytes", int),
+            ("multivalues_executemany", util.asbool),
         ]
     )
 
@@ -1183,11 +1650,13 @@ class KineticaBaseDialect(default.DefaultDialect):
     ddl_compiler = MSDDLCompiler
     type_compiler = MSTypeCompiler
     preparer = MSIdentifierPreparer
+    inspector = KineticaInspector
 
     construct_arguments = [
         (sa_schema.PrimaryKeyConstraint, {"clustered": False}),
         (sa_schema.UniqueConstraint, {"clustered": False}),
         (sa_schema.Index, {"clustered": False, "include": None}),
+        (sa_schema.Table, {"ttl": None, "chunk_size": None}),
     ]
 
     def __init__(
@@ -1198,28 +1667,213 @@ class KineticaBaseDialect(default.DefaultDialect):
         schema_name="",
         deprecate_large_types=None,
         legacy_schema_aliasing=None,
+        statement_collectors=None,
+        slow_query_threshold=None,
+        slow_query_explain=None,
+        slow_query_redact=False,
+        resource_group=None,
+        priority=None,
+        resource_group_priorities=None,
+        max_concurrency=None,
+        max_concurrency_per_class=None,
+        admission_timeout=None,
+        multivalues_max_parameters=multivalues.DEFAULT_MAX_PARAMETERS,
+        multivalues_max_bytes=multivalues.DEFAULT_MAX_BYTES,
+        multivalues_executemany=False,
         **opts
     ):
         self.query_timeout = int(query_timeout or 0)
         self.schema_name = schema_name
+        self._statement_collectors = list(statement_collectors or ())
+
+        if slow_query_threshold is not None:
+            self.slow_query_log = SlowQueryLog(
+                slow_query_threshold, explain=slow_query_explain, redact=slow_query_redact
+            )
+        else:
+            self.slow_query_log = None
+
+        if max_concurrency or max_concurrency_per_class:
+            self.limiter = ConcurrencyLimiter(max_concurrency, max_concurrency_per_class, admission_timeout)
+        else:
+            self.limiter = None
+        self._update_instrumentation()
+
+        self.multivalues_max_parameters = int(multivalues_max_parameters)
+        self.multivalues_max_bytes = int(multivalues_max_bytes)
+        self.multivalues_executemany = multivalues_executemany
+        self._multivalues_cache = util.LRUCache(128)
 
         self.use_scope_identity = use_scope_identity
         self.max_identifier_length = int(max_identifier_length or 0) or self.max_identifier_length
         self.deprecate_large_types = deprecate_large_types
 
-        if legacy_schema_aliasing is None:
-            self.legacy_schema_aliasing = True
-            self._warn_schema_aliasing = True
+        # Kinetica resolves schema-qualified names itself; aliasing every
+        # schema-qualified table (the old MSSQL behaviour) is opt-in only
+        self.legacy_schema_aliasing = bool(legacy_schema_aliasing)
+
+        # priority name -> resource group ranked for it on the cluster
+        self.resource_group_priorities = dict(resource_group_priorities or {})
+        if resource_group is None and priority is not None:
+            resource_group = self._priority_group(priority)
+        self.resource_group = resource_group
+
+        super(KineticaBaseDialect, self).__init__(**opts)
+
+    @classmethod
+    def engine_created(cls, engine):
+        event.listen(engine.pool, "reset", engine.dialect._reset_resource_group)
+        if engine._connection_cls is Connection:
+            engine._connection_cls = KineticaConnection
+
+    def _priority_group(self, priority):
+        try:
+            return self.resource_group_priorities[priority]
+        except KeyError:
+            known = ", ".join(sorted(self.resource_group_priorities))
+            raise exc.ArgumentError("Unknown Kinetica priority %r; known: %s" % (priority, known))
+
+    def set_engine_execution_options(self, engine, opts):
+        if "kinetica_priority" in opts:
+            self._priority_group(opts["kinetica_priority"])
+        super(KineticaBaseDialect, self).set_engine_execution_options(engine, opts)
+
+    def set_connection_execution_options(self, connection, opts):
+        if "kinetica_priority" in opts:
+            self._priority_group(opts["kinetica_priority"])
+        super(KineticaBaseDialect, self).set_connection_execution_options(connection, opts)
+
+    def _resource_group(self, options):
+        """Resource group for a statement with execution ``options``:
+        ``kinetica_resource_group``, else the group of ``kinetica_priority``,
+        else the engine default."""
+
+        group = options.get("kinetica_resource_group")
+        if group is not None:
+            return group
+        priority = options.get("kinetica_priority")
+        if priority is not None:
+            return self._priority_group(priority)
+        return self.resource_group
+
+    def _set_resource_group_sql(self, group):
+        if group is None:
+            return "SET RESOURCE GROUP DEFAULT"
+        return "SET RESOURCE GROUP %s" % self.identifier_preparer.quote(group)
+
+    def _set_resource_group(self, dbapi_connection, cursor, group):
+        cursor.execute(self._set_resource_group_sql(group))
+
+    def _reset_resource_group(self, dbapi_connection, connection_record):
+        # on pool return: put sessions switched away from the engine default
+        # back, so the next checkout starts from it
+        info = connection_record.info
+        if RESOURCE_GROUP_KEY in info and info[RESOURCE_GROUP_KEY] != self.resource_group:
+            cursor = dbapi_connection.cursor()
+            try:
+                self._set_resource_group(dbapi_connection, cursor, self.resource_group)
+            finally:
+                cursor.close()
+            info[RESOURCE_GROUP_KEY] = self.resource_group
+
+    def add_statement_collector(self, collector):
+        """Register a callable receiving a
+        :class:`~sa_gpudb.instrumentation.StatementEvent` per statement."""
+
+        self._statement_collectors.append(collector)
+        self._update_instrumentation()
+
+    def remove_statement_collector(self, collector):
+        self._statement_collectors.remove(collector)
+        self._update_instrumentation()
+
+    def _update_instrumentation(self):
+        self._instrument_statements = bool(self._statement_collectors) or self.slow_query_log is not None
+        self._wrap_execute = self._instrument_statements or self.limiter is not None
+
+    def _dispatch_statement_event(self, context, stmt_event):
+        if self.slow_query_log is not None:
+            try:
+                self.slow_query_log(stmt_event, context.root_connection)
+            except Exception:
+                util.warn("Slow query log raised an exception")
+
+        for collector in self._statement_collectors:
+            try:
+                collector(stmt_event)
+            except Exception:
+                util.warn("Statement collector %r raised an exception" % (collector,))
+
+    def _timed_execute(self, fn, cursor, statement, parameters, context):
+        stmt_event = instrumentation.StatementEvent.for_context(context, statement, parameters)
+        context._kinetica_event = stmt_event
+        start = perf_counter()
+        try:
+            fn(cursor, statement, parameters, context)
+        except BaseException as err:
+            stmt_event.execute_time = perf_counter() - start
+            stmt_event.error = err
+            self._dispatch_statement_event(context, stmt_event)
+            raise
+        stmt_event.execute_time = perf_counter() - start
+
+    def _execute_with(self, fn, cursor, statement, parameters, context):
+        # admission control and instrumentation around one DBAPI call
+        if self.limiter is None:
+            self._timed_execute(fn, cursor, statement, parameters, context)
+            return
+        with self.limiter.admit(statement_class(context, statement)):
+            if self._instrument_statements:
+                self._timed_execute(fn, cursor, statement, parameters, context)
+            else:
+                fn(cursor, statement, parameters, context)
+
+    def _plan_multivalues(self, insert):
+        return multivalues.plan(insert, self.multivalues_max_parameters, self.multivalues_max_bytes)
+
+    def _multivalues_statement(self, plan, rows, schema_translate_map):
+        # one compiled batch of ``rows`` rows per table and column list
+        key = plan.key + (rows, schema_translate_map.hash_key)
+        compiled = self._multivalues_cache.get(key)
+        if compiled is None:
+            compiled = self._multivalues_cache[key] = plan.template(rows).compile(
+                dialect=self,
+                column_keys=[],
+                schema_translate_map=None if schema_translate_map.is_default else schema_translate_map,
+            )
+        return compiled
+
+    def do_execute(self, cursor, statement, parameters, context=None):
+        if self._wrap_execute and context is not None:
+            self._execute_with(super(KineticaBaseDialect, self).do_execute, cursor, statement, parameters, context)
         else:
-            self.legacy_schema_aliasing = legacy_schema_aliasing
-            self._warn_schema_aliasing = False
+            cursor.execute(statement, parameters)
 
-        #super(MSDialect, self).__init__(**opts) #test change
+    def do_executemany(self, cursor, statement, parameters, context=None):
+        if self._wrap_execute and context is not None:
+            self._execute_with(
+                super(KineticaBaseDialect, self).do_executemany, cursor, statement, parameters, context
+            )
+        else:
+            cursor.executemany(statement, parameters)
+
+    def do_execute_no_params(self, cursor, statement, context=None):
+        if self._wrap_execute and context is not None:
+            self._execute_with(
+                lambda cursor, statement, parameters, context: cursor.execute(statement),
+                cursor,
+                statement,
+                (),
+                context,
+            )
+        else:
+            cursor.execute(statement)
 
     def do_savepoint(self, connection, name):
         # give the DBAPI a push
         #connection.execute("IF @@TRANCOUNT = 0 BEGIN TRANSACTION")
         #super(MSDialect, self).do_savepoint(connection, name)
+        pass
 
     def do_release_savepoint(self, connection, name):
         # SQL Server does not support RELEASE SAVEPOINT
@@ -1227,6 +1881,7 @@ class KineticaBaseDialect(default.DefaultDialect):
 
     def initialize(self, connection):
         #super(MSDialect, self).initialize(connection)
+        self.default_schema_name = self._get_default_schema_name(connection)
         self._setup_version_attributes()
 
     def _setup_version_attributes(self): 
@@ -1240,16 +1895,35 @@ class KineticaBaseDialect(default.DefaultDialect):
 
     @_db_plus_owner
     def has_table(self, connection, tablename, dbname, owner, schema):
+        existing = getattr(connection, "_kinetica_existing_tables", None)
+        if existing is not None:
+            # inside create_all() / drop_all(): one catalog call per schema
+            if owner not in existing:
+                existing[owner] = self._existing_tables(connection, owner)
+            return tablename.lower() in existing[owner]
+
+        return tablename.lower() in self._existing_tables(connection, owner, tablename)
+
+    def _existing_tables(self, connection, owner, tablename=None):
+        """Return the lower-cased names of the tables in schema ``owner``
+        (any schema if empty), or only ``tablename`` if it exists."""
+
         if not hasattr(connection, "connection"):
             connection = connection.contextual_connect()
 
         cursor = connection.connection.cursor()
-
-        # Use ODBC to get table with matching name
-        if cursor.tables(table=tablename).fetchone():
-            return True
-
-        return False
+        try:
+            # ODBC catalog arguments are patterns ("_" matches any
+            # character): filter the rows on the exact names
+            rows = cursor.tables(table=tablename, schema=owner or None).fetchall()
+        finally:
+            cursor.close()
+        return set(
+            row.table_name.lower()
+            for row in rows
+            if (not owner or (row.table_schem or "").lower() == owner.lower())
+            and (tablename is None or row.table_name.lower() == tablename.lower())
+        )
 
     @reflection.cache
     @_db_plus_owner_listing
@@ -1325,7 +1999,9 @@ class KineticaBaseDialect(default.DefaultDialect):
             size = column.column_size
             nullable = column.nullable
 
-            if type.startswith(ODBC_TYPE_BYTES):
+            if type.startswith(ODBC_TYPE_VECTOR):
+                type = VECTOR(vector_dimension(type))
+            elif type.startswith(ODBC_TYPE_BYTES):
                 type = VARBINARY(length="max")
             elif type.startswith(ODBC_TYPE_DOUBLE):
                 type = FLOAT(precision=53)
@@ -1358,9 +2034,15 @@ class KineticaBaseDialect(default.DefaultDialect):
             elif type.startswith(ODBC_TYPE_DATE):
                 type = DATE()
             elif type.startswith(ODBC_TYPE_IPV4):
-                type = VARCHAR(collation="SQL_Latin1_General_CP1_CI_AS")
+                type = IPV4()
+            elif type.startswith(ODBC_TYPE_UUID):
+                type = UUID()
+            elif type.startswith(ODBC_TYPE_ULONG) or type.startswith(ODBC_TYPE_UNSIGNED_BIGINT):
+                type = ULONG()
+            elif type.startswith(ODBC_TYPE_BOOLEAN):
+                type = sqltypes.BOOLEAN(create_constraint=False)
             elif type.startswith(ODBC_TYPE_GEOMETRY):
-                type = VARCHAR(collation="SQL_Latin1_General_CP1_CI_AS")
+                type = GEOMETRY()
             elif type.startswith(ODBC_TYPE_VARCHAR):
                 if size == 1:
                     length = 1
@@ -1426,4 +2108,35 @@ class KineticaBaseDialect(default.DefaultDialect):
         # TODO: once FK info is exposed via /show/table, read it here
         return []
 
+    @reflection.cache
+    def get_table_stats(self, connection, tablename, schema=None, **kw):
+        if schema is None and "." in tablename:
+            schema, tablename = tablename.split(".", 1)
+        schema = schema or self.default_schema_name
+
+        if not hasattr(connection, "connection"):
+            connection = connection.contextual_connect()
+
+        cursor = connection.connection.cursor()
+
+        # Use the virtual catalog instead of SELECT COUNT(*)
+        cursor.execute(KI_OBJECTS_QUERY, schema, tablename)
+        objects = _row_dicts(cursor)
+        if not objects:
+            raise exc.NoSuchTableError("%s.%s" % (schema, tablename) if schema else tablename)
+        info = objects[0]
+
+        stats = {}
+        for key, candidates in TABLE_STATS_COLUMNS.items():
+            stats[key] = next((info[c] for c in candidates if info.get(c) is not None), None)
+        if isinstance(stats["shard_key"], util.string_types):
+            stats["shard_key"] = [c.strip() for c in stats["shard_key"].split(",") if c.strip()]
+
+        stats["partitions"] = []
+        if stats["partition_kind"]:
+            cursor.execute(KI_PARTITIONS_QUERY, schema, tablename)
+            stats["partitions"] = _row_dicts(cursor)
+
+        return stats
+
         
\ No newline at end of file
@@ -0,0 +1,131 @@
+# sa_gpudb/export.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Server-side export of tables and query results to files.
+
+:func:`.kinetica_export` builds an ``EXPORT QUERY`` or ``EXPORT TABLE``
+statement, which has the cluster write the rows to files in KiFS or a data
+sink without streaming them through the client::
+
+    from sa_gpudb.export import export, kinetica_export
+
+    stmt = kinetica_export(
+        select([orders]).where(orders.c.day == day),
+        "kifs://lake/orders/%s/" % day,
+        format="parquet",
+        compression="snappy",
+        max_file_size=256 * 1024 ** 2,
+    )
+    manifest = export(engine, stmt)
+    # ExportManifest(path='kifs://lake/orders/...', format='parquet', files=[...], rows=...)
+
+A :class:`~sqlalchemy.schema.Table` exports the whole table; a select is
+rendered with its parameters inlined as literals, as ``EXPORT QUERY`` does
+not take bound parameters.  ``single_file=False`` or ``max_file_size``
+split the output over several files; ``options`` passes any other
+``WITH OPTIONS`` entry, such as ``{"field_delimiter": "|"}``.
+
+"""
+
+import collections
+import re
+
+from sqlalchemy import exc, util
+from sqlalchemy.schema import Table
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.selectable import SelectBase
+
+FORMATS = {"parquet": "PARQUET", "csv": "DELIMITED TEXT", "text": "DELIMITED TEXT"}
+COMPRESSIONS = ("uncompressed", "snappy", "gzip")
+
+_option_re = re.compile(r"^[A-Za-z_]\w*$")
+
+ExportManifest = collections.namedtuple("ExportManifest", ["path", "format", "files", "rows"])
+ExportManifest.__doc__ = """Outcome of an export: the target ``path`` and
+``format``, the ``files`` the server reported writing and the number of
+``rows`` exported, ``None`` if it did not say."""
+
+
+class KineticaExport(Executable, ClauseElement):
+    """An ``EXPORT QUERY`` / ``EXPORT TABLE ... INTO FILE PATH`` statement;
+    see :func:`.kinetica_export`."""
+
+    __visit_name__ = "kinetica_export"
+
+    _execution_options = Executable._execution_options.union({"autocommit": False})
+
+    def __init__(self, source, path, format, options):
+        self.source = source
+        self.path = path
+        self.format = format
+        self.options = options
+
+    def get_children(self, **kw):
+        return (self.source,) if isinstance(self.source, SelectBase) else ()
+
+
+def kinetica_export(
+    source, path, format="parquet", compression=None, single_file=None, max_file_size=None, options=None
+):
+    """Return a statement exporting ``source`` to files at ``path``.
+
+    :param source: a :class:`~sqlalchemy.schema.Table`, or a select whose
+     rows are exported.
+    :param path: KiFS path (``kifs://...``) or data sink path of the
+     output; a directory when the output is split.
+    :param format: ``"parquet"``, or ``"csv"`` for delimited text.
+    :param compression: ``"uncompressed"``, ``"snappy"`` or ``"gzip"``.
+    :param single_file: ``False`` to let every worker rank write its own
+     file, ``True`` for one file, ``"overwrite"`` to replace it.
+    :param max_file_size: bytes after which the output continues in a
+     new file.
+    :param options: further ``WITH OPTIONS`` names and values.
+
+    """
+    if not isinstance(source, (Table, SelectBase)):
+        raise exc.ArgumentError("kinetica_export() exports a Table or a select, not %r" % (source,))
+    if format not in FORMATS:
+        raise exc.ArgumentError("Unknown export format %r; use one of %s" % (format, ", ".join(sorted(FORMATS))))
+
+    merged = util.OrderedDict()
+    if compression is not None:
+        if compression not in COMPRESSIONS:
+            raise exc.ArgumentError("Unknown compression %r; use one of %s" % (compression, ", ".join(COMPRESSIONS)))
+        merged["COMPRESSION_TYPE"] = compression
+    if single_file is not None:
+        merged["SINGLE_FILE"] = single_file if single_file == "overwrite" else str(bool(single_file)).lower()
+    if max_file_size is not None:
+        merged["SINGLE_FILE_MAX_SIZE"] = str(int(max_file_size))
+    for name, value in (options or {}).items():
+        if not _option_re.match(name):
+            raise exc.ArgumentError("Invalid export option name %r" % (name,))
+        if isinstance(value, bool):
+            value = str(value).lower()
+        merged[name.upper()] = str(value)
+    return KineticaExport(source, path, format, merged)
+
+
+def export(bind, stmt):
+    """Execute :func:`.kinetica_export` statement ``stmt`` on ``bind`` and
+    return its :class:`.ExportManifest`.
+
+    The server reports one row per file written, its path first and the
+    number of records second; without such rows, the statement's rowcount
+    is taken as the number of rows exported.
+
+    """
+    result = bind.execute(stmt)
+    files = []
+    rows = None
+    if result.returns_rows:
+        for row in result:
+            files.append(row[0])
+            if len(row) > 1 and row[1] is not None:
+                rows = (rows or 0) + int(row[1])
+    elif result.rowcount >= 0:
+        rows = result.rowcount
+    result.close()
+    return ExportManifest(stmt.path, stmt.format, files, rows)
@@ -0,0 +1,168 @@
+# sa_gpudb/geometry.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Kinetica ``GEOMETRY`` type.
+
+Geometries are transferred as binary WKB: bound values are wrapped in
+``ST_GEOMFROMWKB()`` and selected columns in ``ST_ASBINARY()``, so results
+arrive as ``bytes`` without any per-row text parsing.  Bound values may be
+WKB ``bytes``, any object with a ``wkb`` attribute (e.g. shapely
+geometries) or, when shapely is installed, WKT strings.
+``GEOMETRY(transfer="wkt")`` keeps the text representation instead.
+
+Whole result columns are decoded at once with :func:`.decode_wkb`, which uses
+the vectorized shapely 2.x API::
+
+    rows = conn.execute(select([zones.c.id, zones.c.shape])).fetchall()
+    shapes = decode_wkb(row.shape for row in rows)  # numpy array of geometries
+
+Spatial predicates are available as column methods and compile to Kinetica's
+``ST_*`` functions::
+
+    select([zones]).where(zones.c.shape.contains("POINT(-77.03 38.89)"))
+    select([zones]).where(zones.c.shape.dwithin(other.c.shape, 500))
+
+"""
+
+from sqlalchemy import exc, util
+from sqlalchemy import types as sqltypes
+from sqlalchemy.sql import expression, func
+
+
+# Kinetica's spatial predicates return 1 / 0
+_TRUE = expression.literal_column("1")
+
+
+def _solution(solution):
+    return expression.literal_column(str(int(solution)))
+
+
+def _shapely():
+    try:
+        import shapely
+    except ImportError:
+        raise ImportError("shapely>=2.0 is required for this operation; pip install shapely")
+    return shapely
+
+
+def decode_wkb(values):
+    """Decode an iterable of WKB values (``None`` allowed) into a NumPy
+    array of shapely geometries, in one vectorized call."""
+
+    import numpy
+
+    shapely = _shapely()
+    if not isinstance(values, numpy.ndarray):
+        values = numpy.array(list(values), dtype=object)
+    return shapely.from_wkb(values)
+
+
+class GEOMETRY(sqltypes.TypeEngine):
+    """Kinetica ``GEOMETRY`` column type.
+
+    :param transfer: ``"wkb"`` (the default) to exchange values as binary
+     WKB, or ``"wkt"`` to exchange them as WKT text.
+
+    """
+
+    __visit_name__ = "GEOMETRY"
+
+    def __init__(self, transfer="wkb"):
+        if transfer not in ("wkb", "wkt"):
+            raise exc.ArgumentError("GEOMETRY transfer must be 'wkb' or 'wkt'")
+        self.transfer = transfer
+
+    @property
+    def python_type(self):
+        return bytes if self.transfer == "wkb" else str
+
+    def bind_expression(self, bindvalue):
+        if self.transfer == "wkb":
+            return func.ST_GEOMFROMWKB(bindvalue, type_=self)
+        return func.ST_GEOMFROMTEXT(bindvalue, type_=self)
+
+    def column_expression(self, col):
+        if self.transfer == "wkb":
+            return func.ST_ASBINARY(col, type_=self)
+        return func.ST_ASTEXT(col, type_=self)
+
+    def bind_processor(self, dialect):
+        if self.transfer == "wkt":
+
+            def process(value):
+                if value is None or isinstance(value, util.string_types):
+                    return value
+                return getattr(value, "wkt", value)
+
+            return process
+
+        def process(value):
+            if value is None or isinstance(value, bytes):
+                return value
+            elif isinstance(value, (bytearray, memoryview)):
+                return bytes(value)
+            elif isinstance(value, util.string_types):
+                return _shapely().to_wkb(_shapely().from_wkt(value))
+            return value.wkb
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        if self.transfer == "wkt":
+            return None
+
+        def process(value):
+            if value is None or isinstance(value, bytes):
+                return value
+            return bytes(value)
+
+        return process
+
+    class comparator_factory(sqltypes.TypeEngine.Comparator):
+        def _geometry(self, other):
+            if isinstance(other, util.string_types):
+                return func.ST_GEOMFROMTEXT(expression.literal(other, sqltypes.String()))
+            elif isinstance(other, expression.ClauseElement) or hasattr(other, "__clause_element__"):
+                return other
+            return expression.literal(other, self.type)
+
+        def _predicate(self, name, other):
+            return getattr(func, name)(self.expr, self._geometry(other)) == _TRUE
+
+        def intersects(self, other):
+            return self._predicate("ST_INTERSECTS", other)
+
+        def contains(self, other, **kw):
+            return self._predicate("ST_CONTAINS", other)
+
+        def within(self, other):
+            return self._predicate("ST_WITHIN", other)
+
+        def touches(self, other):
+            return self._predicate("ST_TOUCHES", other)
+
+        def overlaps(self, other):
+            return self._predicate("ST_OVERLAPS", other)
+
+        def crosses(self, other):
+            return self._predicate("ST_CROSSES", other)
+
+        def disjoint(self, other):
+            return self._predicate("ST_DISJOINT", other)
+
+        def geom_equals(self, other):
+            return self._predicate("ST_EQUALS", other)
+
+        def dwithin(self, other, distance, solution=0):
+            """``ST_DWITHIN``; ``solution`` 0 is Euclidean (degrees), 1 is
+            great-circle (meters) and 2 is spheroid (meters)."""
+
+            return func.ST_DWITHIN(self.expr, self._geometry(other), distance, _solution(solution)) == _TRUE
+
+        def distance(self, other, solution=0):
+            return func.ST_DISTANCE(self.expr, self._geometry(other), _solution(solution), type_=sqltypes.Float())
+
+        def area(self, solution=0):
+            return func.ST_AREA(self.expr, _solution(solution), type_=sqltypes.Float())
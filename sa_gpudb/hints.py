@@ -0,0 +1,222 @@
+# sa_gpudb/hints.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Kinetica ``KI_HINT_*`` optimizer hints.
+
+Hints are attached to a statement, or to a connection or engine, through the
+``kinetica_hints`` execution option, and rendered as one comment right after
+the statement's verb::
+
+    from sa_gpudb.hints import KineticaHint, with_kinetica_hints
+
+    stmt = with_kinetica_hints(
+        select([orders]), "KI_HINT_GROUP_BY_PK", KineticaHint("KI_HINT_CHUNK_SIZE", 1000000)
+    )
+    # SELECT /* KI_HINT_GROUP_BY_PK KI_HINT_CHUNK_SIZE(1000000) */ orders.id, ...
+
+    engine.execution_options(kinetica_hints=["KI_HINT_NO_COST_BASED_OPTIMIZATION"])
+
+Hints are validated against the known ``KI_HINT_*`` names and their
+arguments when they are created; :func:`.register_hint` adds names this
+module does not know yet.  Statement-level hints are part of the statement,
+and so of its compiled cache entry; connection-level hints are added to the
+SQL at execution time, plain string statements included, and do not affect
+the cache.
+
+"""
+
+import re
+
+from sqlalchemy import exc, util
+
+
+# argument kinds
+INT = "int"
+NAME = "name"
+NAMES = "names"
+
+_ANY = None
+_INSERT = frozenset(["insert"])
+_WRITE = frozenset(["insert", "update"])
+
+_hint_specs = {
+    "KI_HINT_BATCH_SIZE": ((INT,), _INSERT),
+    "KI_HINT_CHUNK_SIZE": ((INT,), _ANY),
+    "KI_HINT_COMPARABLE_EXPLAIN": ((), _ANY),
+    "KI_HINT_DICT_PROJECTION": ((), _ANY),
+    "KI_HINT_DISTRIBUTED_OPERATIONS": ((), _ANY),
+    "KI_HINT_DONT_COMBINE": ((), _ANY),
+    "KI_HINT_DONT_FILTER_IN_AGGREGATE": ((), _ANY),
+    "KI_HINT_GROUP_BY_FORCE_REPLICATED": ((), _ANY),
+    "KI_HINT_GROUP_BY_PK": ((), _ANY),
+    "KI_HINT_IGNORE_EXISTING_PK": ((), _INSERT),
+    "KI_HINT_INDEX": ((NAMES,), _ANY),
+    "KI_HINT_JOBID_PREFIX": ((NAME,), _ANY),
+    "KI_HINT_KEEP_TEMP_TABLES": ((), _ANY),
+    "KI_HINT_MAX_ROWS_TO_FETCH": ((INT,), _ANY),
+    "KI_HINT_NO_COST_BASED_OPTIMIZATION": ((), _ANY),
+    "KI_HINT_NO_DICT_PROJECTION": ((), _ANY),
+    "KI_HINT_NO_DISTRIBUTED_OPERATIONS": ((), _ANY),
+    "KI_HINT_NO_JOIN_COUNT": ((), _ANY),
+    "KI_HINT_NO_LATE_MATERIALIZATION": ((), _ANY),
+    "KI_HINT_NO_PARALLEL_EXECUTION": ((), _ANY),
+    "KI_HINT_NO_PLAN_CACHE": ((), _ANY),
+    "KI_HINT_NO_RULE_BASED_OPTIMIZATION": ((), _ANY),
+    "KI_HINT_NO_VALIDATE_CHANGE": ((), _ANY),
+    "KI_HINT_PROJECT_MATERIALIZED_VIEW": ((), _ANY),
+    "KI_HINT_REPL_ASYNC": ((), _ANY),
+    "KI_HINT_REPL_SYNC": ((), _ANY),
+    "KI_HINT_TRUNCATE_STRINGS": ((), _WRITE),
+    "KI_HINT_UPDATE_ON_EXISTING_PK": ((), _INSERT),
+}
+
+_hint_re = re.compile(r"^\s*(KI_HINT_\w+)\s*(?:\((.*)\))?\s*$", re.S)
+_name_re = re.compile(r"^[A-Za-z_][\w.$]*$")
+_verb_re = re.compile(r"^[\s(]*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+
+
+def register_hint(name, args=(), statements=None):
+    """Make hint ``name`` known, taking ``args`` (a sequence of
+    :data:`INT`, :data:`NAME` and :data:`NAMES`) and allowed in
+    ``statements`` (a set of ``"select"``, ``"insert"``, ``"update"``,
+    ``"delete"``; ``None`` for all)."""
+
+    if not name.startswith("KI_HINT_"):
+        raise exc.ArgumentError("Kinetica hint names start with KI_HINT_")
+    _hint_specs[name] = (tuple(args), frozenset(statements) if statements is not None else None)
+
+
+class KineticaHint(object):
+    """A validated ``KI_HINT_*`` optimizer hint."""
+
+    __slots__ = ("name", "args")
+
+    def __init__(self, name, *args):
+        try:
+            kinds, _ = _hint_specs[name]
+        except KeyError:
+            raise exc.ArgumentError("Unknown Kinetica hint %r" % (name,))
+
+        if kinds and kinds[-1] == NAMES:
+            if len(args) < len(kinds):
+                raise exc.ArgumentError("%s takes at least %d argument(s)" % (name, len(kinds)))
+            kinds = kinds[:-1] + (NAME,) * (len(args) - len(kinds) + 1)
+        elif len(args) != len(kinds):
+            raise exc.ArgumentError("%s takes %d argument(s), got %d" % (name, len(kinds), len(args)))
+
+        values = []
+        for kind, arg in zip(kinds, args):
+            if kind == INT:
+                if isinstance(arg, bool) or not isinstance(arg, util.int_types + util.string_types):
+                    raise exc.ArgumentError("%s expects an integer, got %r" % (name, arg))
+                try:
+                    arg = int(arg)
+                except ValueError:
+                    raise exc.ArgumentError("%s expects an integer, got %r" % (name, arg))
+                if arg <= 0:
+                    raise exc.ArgumentError("%s expects a positive integer, got %r" % (name, arg))
+            else:
+                arg = getattr(arg, "name", arg)
+                if not isinstance(arg, util.string_types) or not _name_re.match(arg.strip()):
+                    raise exc.ArgumentError("%s expects identifiers, got %r" % (name, arg))
+                arg = arg.strip()
+            values.append(arg)
+
+        self.name = name
+        self.args = tuple(values)
+
+    @classmethod
+    def parse(cls, text):
+        """Build a hint from its SQL text, e.g. ``"KI_HINT_CHUNK_SIZE(100)"``."""
+
+        match = _hint_re.match(text)
+        if not match:
+            raise exc.ArgumentError("Invalid Kinetica hint %r" % (text,))
+        name, args = match.groups()
+        return cls(name, *([a.strip() for a in args.split(",")] if args and args.strip() else []))
+
+    def allowed_in(self, statement_kind):
+        statements = _hint_specs[self.name][1]
+        return statements is None or statement_kind in statements
+
+    def __str__(self):
+        if self.args:
+            return "%s(%s)" % (self.name, ", ".join(str(a) for a in self.args))
+        return self.name
+
+    def __repr__(self):
+        return "KineticaHint(%s)" % ", ".join(repr(v) for v in (self.name,) + self.args)
+
+    def __eq__(self, other):
+        return isinstance(other, KineticaHint) and (self.name, self.args) == (other.name, other.args)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.name, self.args))
+
+
+def coerce_hints(hints):
+    """Return ``hints`` (a hint, its text, or a sequence of those) as a tuple
+    of :class:`.KineticaHint`, keeping the last of hints with the same name."""
+
+    if not hints:
+        return ()
+    if isinstance(hints, (KineticaHint,) + util.string_types):
+        hints = (hints,)
+    if isinstance(hints, tuple) and all(type(h) is KineticaHint for h in hints):
+        if len(set(h.name for h in hints)) == len(hints):
+            return hints
+
+    by_name = {}
+    for h in hints:
+        if not isinstance(h, KineticaHint):
+            h = KineticaHint.parse(h)
+        by_name.pop(h.name, None)
+        by_name[h.name] = h
+    return tuple(by_name.values())
+
+
+def render_hints(hints, statement_kind):
+    """Render ``hints`` as a comment for a ``statement_kind`` statement."""
+
+    hints = coerce_hints(hints)
+    if not hints:
+        return ""
+    for h in hints:
+        if not h.allowed_in(statement_kind):
+            raise exc.CompileError("%s cannot be used in %s statements" % (h.name, statement_kind.upper()))
+    return "/* %s */" % " ".join(str(h) for h in hints)
+
+
+def with_kinetica_hints(stmt, *hints):
+    """Return a copy of ``stmt`` with ``hints`` added to its
+    ``kinetica_hints`` execution option."""
+
+    existing = stmt.get_execution_options().get("kinetica_hints")
+    return stmt.execution_options(kinetica_hints=coerce_hints(coerce_hints(existing) + coerce_hints(hints)))
+
+
+def statement_kind(statement):
+    """Return ``"select"``, ``"insert"``, ``"update"`` or ``"delete"`` for
+    the SQL string ``statement``, or ``None`` if hints do not apply to it."""
+
+    match = _verb_re.match(statement)
+    if match is None:
+        return None
+    verb = match.group(1).lower()
+    return "select" if verb == "with" else verb
+
+
+def inject_hints(statement, hints, statement_kind):
+    """Insert the comment for ``hints`` after the leading verb of the SQL
+    string ``statement``."""
+
+    comment = render_hints(hints, statement_kind)
+    match = _verb_re.match(statement)
+    if not comment or not match:
+        return statement
+    return "%s %s%s" % (statement[: match.end()], comment, statement[match.end() :])
@@ -0,0 +1,199 @@
+# sa_gpudb/incremental.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Incremental extraction of new and changed rows by high watermark.
+
+:func:`.extract_changes` reads the rows of a table whose watermark column,
+a last-modified timestamp or an ever increasing key, is above the value
+recorded by the previous run, and records the new high watermark in a
+local :class:`.WatermarkStore` once every batch has been consumed::
+
+    from sa_gpudb.incremental import WatermarkStore, extract_changes
+
+    store = WatermarkStore("/var/lib/sync/watermarks.json")
+    for rows in extract_changes(engine, orders, orders.c.updated_at, store, batch_size=50000):
+        cache.upsert(rows)
+
+Each run first reads ``MAX(column)`` above the stored watermark, then
+streams the rows in the closed range ``stored < column <= max`` with
+``fetchmany(batch_size)``.  Rows written while the run is in progress are
+left for the next run, and a run that fails or stops early leaves the
+stored watermark as it was, so its rows are extracted again.  ``overlap``
+re-reads a margin below the stored watermark for writers that commit
+timestamps out of order; consumers then see some rows twice and should
+upsert by key.
+
+The bounded range lets Kinetica skip the range or interval partitions
+outside it when the table is partitioned on the watermark column.  For a
+table partitioned on another column that trails the watermark, such as an
+insert date for an update timestamp, ``prune_on=`` adds ``prune_on >=
+stored - prune_lag`` so that old partitions are skipped as well; the
+table's ``partition_kind`` and ``partitions`` are reported by
+:meth:`.KineticaInspector.get_table_stats`.
+
+"""
+
+import datetime
+import decimal
+import json
+import os
+import tempfile
+
+from sqlalchemy import exc, func, sql, types as sqltypes, util
+from sqlalchemy.engine import Connection
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    elif isinstance(value, datetime.date):
+        return {"type": "date", "value": value.isoformat()}
+    elif isinstance(value, decimal.Decimal):
+        return {"type": "decimal", "value": str(value)}
+    elif isinstance(value, (bool, util.int_types, float, util.string_types)):
+        return {"type": type(value).__name__, "value": value}
+    raise exc.ArgumentError("Cannot store a watermark of type %s" % type(value).__name__)
+
+
+def _decode(entry):
+    kind, value = entry["type"], entry["value"]
+    if kind == "datetime":
+        # also reads back the UTC offset of timezone-aware values
+        return datetime.datetime.fromisoformat(value)
+    elif kind == "date":
+        return datetime.date.fromisoformat(value)
+    elif kind == "decimal":
+        return decimal.Decimal(value)
+    return value
+
+
+class WatermarkStore(object):
+    """High watermarks by name, kept in a local JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._marks = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._marks = json.load(f)
+
+    def get(self, name, default=None):
+        entry = self._marks.get(name)
+        return _decode(entry) if entry is not None else default
+
+    def set(self, name, value):
+        """Record ``value`` for ``name`` and write the file."""
+
+        self._marks[name] = _encode(value)
+        self.save()
+
+    def reset(self, name):
+        """Forget ``name``, so that its next extraction reads every row."""
+
+        if self._marks.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        # write a sibling file and rename it over the old one, so that a
+        # crash never leaves a truncated store
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".watermarks-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._marks, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def __contains__(self, name):
+        return name in self._marks
+
+
+def _prune_bound(prune_on, bound):
+    # a DATE partition column compared with a timestamp would lose the
+    # rows of the watermark's own day
+    if isinstance(bound, datetime.datetime) and prune_on.type._type_affinity is sqltypes.Date:
+        return bound.date()
+    return bound
+
+
+def extract_changes(
+    bind,
+    table,
+    column,
+    store,
+    columns=None,
+    where=None,
+    batch_size=10000,
+    overlap=None,
+    prune_on=None,
+    prune_lag=None,
+    name=None,
+    prefetch_batches=None,
+):
+    """Yield lists of at most ``batch_size`` rows of ``table`` whose
+    ``column`` is above the watermark in ``store``; record the new
+    watermark after the last batch.
+
+    :param bind: an :class:`~sqlalchemy.engine.Engine` or
+     :class:`~sqlalchemy.engine.Connection`.
+    :param column: the watermark column of ``table``, or its name.
+    :param store: a :class:`.WatermarkStore`.
+    :param columns: columns to select; every column of ``table`` by default.
+    :param where: an extra criterion, applied to the ``MAX()`` query too.
+    :param overlap: amount (a ``timedelta`` for timestamps) subtracted from
+     the stored watermark before reading.
+    :param prune_on: a partition column whose value for a changed row is no
+     less than the watermark minus ``prune_lag``; for a ``Date`` column,
+     no less than that timestamp's day.
+    :param name: the watermark's name in ``store``; ``"<table>:<column>"``
+     by default.
+    :param prefetch_batches: fetch this many batches ahead on a helper
+     thread, see :mod:`sa_gpudb.prefetch`.
+
+    """
+    if isinstance(column, util.string_types):
+        column = table.c[column]
+    if isinstance(prune_on, util.string_types):
+        prune_on = table.c[prune_on]
+    name = name or "%s:%s" % (table.fullname, column.name)
+    low = store.get(name)
+
+    criteria = [] if where is None else [where]
+    if low is not None:
+        start = low - overlap if overlap else low
+        criteria.append(column > start)
+        if prune_on is not None:
+            criteria.append(prune_on >= _prune_bound(prune_on, start - prune_lag if prune_lag else start))
+
+    high_stmt = sql.select([func.max(column)])
+    if criteria:
+        high_stmt = high_stmt.where(sql.and_(*criteria))
+    high = bind.execute(high_stmt).scalar()
+    if high is None:
+        return
+
+    stmt = sql.select(columns if columns is not None else [table]).where(sql.and_(*(criteria + [column <= high])))
+    conn = bind if isinstance(bind, Connection) else bind.connect()
+    try:
+        options = {"stream_results": True}
+        if prefetch_batches:
+            options.update(prefetch_batches=prefetch_batches, prefetch_batch_size=batch_size)
+        result = conn.execution_options(**options).execute(stmt)
+        try:
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            result.close()
+    finally:
+        if conn is not bind:
+            conn.close()
+
+    if low is None or high > low:
+        store.set(name, high)
@@ -0,0 +1,337 @@
+# sa_gpudb/instrumentation.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Per-statement instrumentation for the Kinetica dialect.
+
+Statement collectors are plain callables which receive one
+:class:`.StatementEvent` per executed statement, once its result has been
+fully consumed (or immediately, for statements which return no rows)::
+
+    from sa_gpudb.instrumentation import StatementStats
+
+    stats = StatementStats()
+    engine = create_engine("kinetica://KINETICA", statement_collectors=[stats])
+
+    # ... run the workload ...
+
+    for entry in stats.report():
+        print(entry["fingerprint"], entry["count"], entry["p95"])
+
+Collectors may also be attached to an existing engine with
+``engine.dialect.add_statement_collector(stats)``.  When no collector is
+registered the dialect takes its normal, uninstrumented code paths.
+
+"""
+
+import collections
+import math
+import operator
+import re
+import threading
+from time import perf_counter
+
+from sqlalchemy import util
+from sqlalchemy.engine.result import ResultMetaData
+
+
+_comment_re = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_string_re = re.compile(r"'(?:[^']|'')*'")
+_number_re = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_bind_re = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_in_list_re = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.I)
+_space_re = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """Return a normalized form of ``statement`` suitable for grouping.
+
+    Comments are removed, literals and bind markers are replaced by ``?``,
+    ``IN`` lists collapse to a single ``IN (?)`` and whitespace is
+    squeezed, so that executions differing only by their parameters share a
+    fingerprint.
+
+    """
+    statement = _comment_re.sub(" ", statement)
+    statement = _string_re.sub("?", statement)
+    statement = _number_re.sub("?", statement)
+    statement = _bind_re.sub("?", statement)
+    statement = _in_list_re.sub("IN (?)", statement)
+    return _space_re.sub(" ", statement).strip()
+
+
+def _approx_size(row):
+    size = 0
+    for value in row:
+        if value is None:
+            continue
+        elif isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        else:
+            size += 8
+    return size
+
+
+def _unprocessed(metadata):
+    # a copy of ``metadata`` for rows whose values are already converted
+    copy = ResultMetaData.__new__(ResultMetaData)
+    for name in ResultMetaData.__slots__:
+        setattr(copy, name, getattr(metadata, name))
+    copy._processors = [None] * len(metadata._processors)
+    copy._keymap = dict((key, (None,) + record[1:]) for key, record in metadata._keymap.items())
+    return copy
+
+
+class StatementEvent(object):
+    """Timings and volumes recorded for a single statement execution.
+
+    All timings are in seconds.  ``process_time`` covers building the rows,
+    including the result processors of the column types.  ``compile_time``
+    is ``None`` for textual statements and for compiled forms served from
+    the ``compiled_cache`` (in which case ``cache_hit`` is True).
+
+    ``plan`` is filled in by the slow query log when EXPLAIN capture is
+    enabled, see :mod:`sa_gpudb.slow_query`.
+
+    """
+
+    def __init__(self, statement, parameters, executemany=False, compile_time=None, cache_hit=None):
+        self.statement = statement
+        self.parameters = parameters
+        self.executemany = executemany
+        self.compile_time = compile_time
+        self.cache_hit = cache_hit
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.process_time = 0.0
+        self.rowcount = -1
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.error = None
+        self.plan = None
+
+    @classmethod
+    def for_context(cls, context, statement, parameters):
+        compiled = context.compiled
+        compile_time = cache_hit = None
+        if compiled is not None:
+            cache_hit = getattr(compiled, "_kinetica_executed", False)
+            compiled._kinetica_executed = True
+            if not cache_hit:
+                compile_time = getattr(compiled, "_kinetica_compile_time", None)
+        return cls(statement, parameters, context.executemany, compile_time, cache_hit)
+
+    @util.memoized_property
+    def fingerprint(self):
+        return fingerprint(self.statement)
+
+    @property
+    def total_time(self):
+        return (self.compile_time or 0.0) + self.execute_time + self.fetch_time + self.process_time
+
+    def __repr__(self):
+        return "<StatementEvent %r total=%.6fs rows=%d>" % (self.fingerprint, self.total_time, self.rows_fetched)
+
+
+class _InstrumentedResultMixin(object):
+    """Times DBAPI fetches and row processing, and hands the completed
+    :class:`.StatementEvent` back to the dialect on soft close.
+
+    Result processors normally run lazily, when a column of a row is read
+    and so possibly after the event was handed back; here they are applied
+    while the rows are built, so that ``process_time`` includes them.
+
+    """
+
+    _kinetica_processors = None
+
+    def _init_metadata(self):
+        super(_InstrumentedResultMixin, self)._init_metadata()
+        metadata = self._metadata
+        if metadata is not None and any(metadata._processors):
+            self._kinetica_processors = metadata._processors
+            self._metadata = _unprocessed(metadata)
+
+    def _timed_fetch(self, fn, *arg):
+        if self._soft_closed:
+            # rows served from a buffer, such as a spilled result's
+            return fn(*arg)
+        start = perf_counter()
+        rows = fn(*arg)
+        event = self.context._kinetica_event
+        event.fetch_time += perf_counter() - start
+        if rows:
+            event.rows_fetched += len(rows)
+            event.bytes_fetched += sum(_approx_size(row) for row in rows)
+        return rows
+
+    def _fetchone_impl(self):
+        if self._soft_closed:
+            return super(_InstrumentedResultMixin, self)._fetchone_impl()
+        start = perf_counter()
+        row = super(_InstrumentedResultMixin, self)._fetchone_impl()
+        event = self.context._kinetica_event
+        event.fetch_time += perf_counter() - start
+        if row is not None:
+            event.rows_fetched += 1
+            event.bytes_fetched += _approx_size(row)
+        return row
+
+    def _fetchmany_impl(self, size=None):
+        return self._timed_fetch(super(_InstrumentedResultMixin, self)._fetchmany_impl, size)
+
+    def _fetchall_impl(self):
+        return self._timed_fetch(super(_InstrumentedResultMixin, self)._fetchall_impl)
+
+    def _fetch_batch(self):
+        # SpillBufferedResultProxy reads every row before its soft close
+        return self._timed_fetch(super(_InstrumentedResultMixin, self)._fetch_batch)
+
+    def process_rows(self, rows):
+        start = perf_counter()
+        try:
+            processors = self._kinetica_processors
+            if processors is not None:
+                rows = [
+                    tuple(value if proc is None else proc(value) for proc, value in zip(processors, row))
+                    for row in rows
+                ]
+            return super(_InstrumentedResultMixin, self).process_rows(rows)
+        finally:
+            self.context._kinetica_event.process_time += perf_counter() - start
+
+    def _soft_close(self, **kw):
+        if self._soft_closed:
+            return super(_InstrumentedResultMixin, self)._soft_close(**kw)
+
+        # emit while the connection is still checked out, so that listeners
+        # (e.g. the slow query log) may use it
+        autoclose, self._autoclose_connection = self._autoclose_connection, False
+        super(_InstrumentedResultMixin, self)._soft_close(**kw)
+        event = self.context._kinetica_event
+        if event.rowcount == -1 and self._metadata is None:
+            event.rowcount = self.context.rowcount
+        try:
+            self.dialect._dispatch_statement_event(self.context, event)
+        finally:
+            if autoclose:
+                self.connection.close()
+
+
+_instrumented_classes = {}
+
+
+def instrumented(result_cls):
+    """Return an instrumented subclass of the given ResultProxy class."""
+
+    try:
+        return _instrumented_classes[result_cls]
+    except KeyError:
+        cls = _instrumented_classes[result_cls] = type(
+            "Instrumented%s" % result_cls.__name__, (_InstrumentedResultMixin, result_cls), {}
+        )
+        return cls
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    # nearest-rank method
+    index = max(0, int(math.ceil(pct / 100.0 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class _FingerprintStats(object):
+    __slots__ = (
+        "count",
+        "errors",
+        "total_time",
+        "samples",
+        "compile_time",
+        "execute_time",
+        "fetch_time",
+        "process_time",
+        "rows",
+        "bytes",
+        "cache_hits",
+        "cache_misses",
+    )
+
+    def __init__(self, max_samples):
+        self.count = self.errors = self.rows = self.bytes = 0
+        self.cache_hits = self.cache_misses = 0
+        self.total_time = self.compile_time = self.execute_time = 0.0
+        self.fetch_time = self.process_time = 0.0
+        self.samples = collections.deque(maxlen=max_samples)
+
+
+class StatementStats(object):
+    """In-memory statement collector reporting latency percentiles by
+    normalized SQL fingerprint.
+
+    Only the most recent ``max_samples`` timings are kept per fingerprint
+    for the percentile calculation; counters cover every execution.
+
+    """
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        total = event.total_time
+        with self._lock:
+            stats = self._stats.get(event.fingerprint)
+            if stats is None:
+                stats = self._stats[event.fingerprint] = _FingerprintStats(self.max_samples)
+            stats.count += 1
+            stats.total_time += total
+            stats.samples.append(total)
+            stats.compile_time += event.compile_time or 0.0
+            stats.execute_time += event.execute_time
+            stats.fetch_time += event.fetch_time
+            stats.process_time += event.process_time
+            stats.rows += event.rows_fetched
+            stats.bytes += event.bytes_fetched
+            if event.error is not None:
+                stats.errors += 1
+            if event.cache_hit:
+                stats.cache_hits += 1
+            elif event.cache_hit is not None:
+                stats.cache_misses += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def report(self):
+        """Return one dictionary per fingerprint, slowest total first."""
+
+        with self._lock:
+            items = [(fp, s, sorted(s.samples)) for fp, s in self._stats.items()]
+
+        report = []
+        for fp, s, ordered in items:
+            report.append(
+                {
+                    "fingerprint": fp,
+                    "count": s.count,
+                    "errors": s.errors,
+                    "total_time": s.total_time,
+                    "p50": _percentile(ordered, 50),
+                    "p95": _percentile(ordered, 95),
+                    "p99": _percentile(ordered, 99),
+                    "compile_time": s.compile_time,
+                    "execute_time": s.execute_time,
+                    "fetch_time": s.fetch_time,
+                    "process_time": s.process_time,
+                    "rows": s.rows,
+                    "bytes": s.bytes,
+                    "cache_hits": s.cache_hits,
+                    "cache_misses": s.cache_misses,
+                }
+            )
+        report.sort(key=operator.itemgetter("total_time"), reverse=True)
+        return report
@@ -0,0 +1,162 @@
+# sa_gpudb/multivalues.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Splitting of multi-VALUES inserts into bounded batches.
+
+``insert().values([...])`` with many rows compiles into a single ``INSERT
+... VALUES (?, ?), (?, ?), ...`` statement whose parameter count and size
+grow with the rows.  The dialect executes such a statement as consecutive
+inserts of at most ``multivalues_max_parameters`` parameters and about
+``multivalues_max_bytes`` bytes of SQL and parameter data each::
+
+    engine = create_engine(
+        "kinetica://KINETICA",
+        multivalues_max_parameters=10000,
+        multivalues_max_bytes=4 * 1024 ** 2,
+        multivalues_executemany=True,
+    )
+
+The rows are split before anything is compiled.  Each batch executes a
+statement of bound parameters compiled once per table, column list and
+batch size and kept in a small cache, so that every full batch, and later
+inserts into the same table, reuse it; only the last, partial batch needs
+another.  With ``multivalues_executemany=True`` the full batches go to the
+driver as a single ``executemany()``, which pipelines them, instead of one
+``execute()`` each.  The batches run in one transaction, and the result's
+``rowcount`` is their total.
+
+Only inserts whose values are all plain Python values are split; rows
+holding SQL expressions, and inserts with ``RETURNING``, are executed as
+they are.
+
+"""
+
+from sqlalchemy.sql import bindparam
+from sqlalchemy.sql.elements import ClauseElement
+
+DEFAULT_MAX_PARAMETERS = 10000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+
+def _value_size(value):
+    if value is None:
+        return 4
+    elif isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 2
+    return len(str(value))
+
+
+def _is_expression(value):
+    return isinstance(value, ClauseElement) or hasattr(value, "__clause_element__")
+
+
+def _bound_defaults(table, keys):
+    # columns missing from the rows whose Python-side default is bound as
+    # one more parameter of every row
+    return [
+        c
+        for c in table.c
+        if c.key not in keys and c.default is not None and not (c.default.is_sequence or c.default.is_clause_element)
+    ]
+
+
+def _bind_name(key, row):
+    return "%s_r%d" % (key, row)
+
+
+class Plan(object):
+    """How the rows of one multi-VALUES ``insert`` are split into batches
+    of ``batch_rows``."""
+
+    __slots__ = ("insert", "keys", "rows", "batch_rows", "key")
+
+    def __init__(self, insert, keys, rows, batch_rows):
+        self.insert = insert
+        self.keys = keys
+        self.rows = rows
+        self.batch_rows = batch_rows
+        self.key = (
+            insert.table,
+            tuple(keys),
+            insert._prefixes,
+            tuple(insert._hints.items()),
+            repr(sorted(insert._execution_options.items())),
+        )
+
+    def template(self, rows):
+        """Return a copy of the insert taking ``rows`` rows of bound
+        parameters."""
+
+        stmt = self.insert._generate()
+        stmt.parameters = [
+            dict((key, bindparam(_bind_name(key, i), type_=stmt.table.c[key].type)) for key in self.keys)
+            for i in range(rows)
+        ]
+        return stmt
+
+    def _parameters(self, rows):
+        params = {}
+        for i, row in enumerate(rows):
+            for key, value in zip(self.keys, row):
+                params[_bind_name(key, i)] = value
+        return params
+
+    def batches(self, executemany=False):
+        """Yield ``(rows, parameters)`` for each batch, in order; with
+        ``executemany``, the full batches come first as one list of
+        parameters."""
+
+        step = self.batch_rows
+        chunks = [self.rows[start : start + step] for start in range(0, len(self.rows), step)]
+        if executemany:
+            full = [self._parameters(chunk) for chunk in chunks if len(chunk) == step]
+            if len(full) > 1:
+                yield step, full
+                chunks = chunks[len(full) :]
+        for chunk in chunks:
+            yield len(chunk), self._parameters(chunk)
+
+
+def plan(insert, max_parameters, max_bytes):
+    """Return a :class:`.Plan` splitting the rows of multi-VALUES
+    ``insert``, or ``None`` when it is within both limits or cannot be
+    split."""
+
+    parameters = insert.parameters
+    if len(parameters) < 2 or insert._returning:
+        return None
+
+    columns = insert.table.c
+    first = parameters[0]
+    keys = [k if isinstance(k, str) else getattr(k, "key", None) for k in first]
+    if not all(key in columns for key in keys):
+        return None
+    defaults = _bound_defaults(insert.table, keys)
+
+    rows = []
+    row_bytes = 0
+    for row in parameters:
+        if len(row) != len(keys):
+            return None
+        try:
+            values = tuple(row[k] for k in first)
+        except KeyError:
+            return None
+        if any(_is_expression(v) for v in values):
+            return None
+        rows.append(values)
+        row_bytes = max(row_bytes, sum(_value_size(v) for v in values))
+
+    width = len(keys) + len(defaults)
+    for c in defaults:
+        row_bytes += 8 if c.default.is_callable else _value_size(c.default.arg)
+
+    # "INSERT INTO <table> (<columns>) VALUES " and "(?, ?), " per row
+    head = 28 + len(insert.table.fullname) + sum(len(c.name) + 2 for c in insert.table.c)
+    batch_rows = min(max_parameters // width, (max_bytes - head) // (3 * width + row_bytes))
+    batch_rows = max(1, batch_rows)
+    if batch_rows >= len(rows):
+        return None
+    return Plan(insert, keys, rows, batch_rows)
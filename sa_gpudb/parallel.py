@@ -0,0 +1,256 @@
+# sa_gpudb/parallel.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Parallel range-partitioned extraction.
+
+A single ODBC result stream caps large extracts.  :func:`.parallel_fetch`
+splits a ``select()`` into disjoint ranges of one column and reads them
+concurrently, each on its own pooled connection::
+
+    from sa_gpudb.parallel import parallel_fetch
+
+    stmt = select([events]).where(events.c.kind == "click")
+    for row in parallel_fetch(engine, stmt, split_on=events.c.id, workers=8):
+        ...
+
+Range boundaries come from ``bounds=`` when given, otherwise from a single
+``SELECT MIN(col), MAX(col)`` over the statement's ``FROM`` and ``WHERE``.
+Without ``split_on`` the first shard key column of the table, read from
+Kinetica's catalog (see :meth:`.KineticaInspector.get_table_stats`), is
+used.  The first range also matches ``NULL`` and the outer ranges are open
+ended, so every row is returned exactly once.
+
+Rows are yielded in the order workers produce them, not in the statement's
+``ORDER BY`` order.  Workers hand over batches of ``batch_size`` rows
+through a queue of at most ``max_pending`` batches, so a slow consumer
+stalls the workers instead of buffering the whole extract in memory.  With
+``arrow=True`` each batch is yielded as a ``pyarrow.RecordBatch``.
+
+"""
+
+import datetime
+import decimal
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import exc, util
+from sqlalchemy.sql import and_, func, or_, visitors
+from sqlalchemy.sql.elements import FunctionFilter, Over, WithinGroup
+from sqlalchemy.sql.functions import FunctionElement
+
+_DONE = object()
+
+# functions combining rows, whose per-range results do not add up to the
+# result over the whole table
+_AGGREGATES = frozenset(
+    [
+        "approx_count_distinct",
+        "approx_median",
+        "array_agg",
+        "avg",
+        "count",
+        "count_distinct",
+        "max",
+        "mean",
+        "median",
+        "min",
+        "mode",
+        "percentile_cont",
+        "percentile_disc",
+        "stddev",
+        "stddev_pop",
+        "stddev_samp",
+        "string_agg",
+        "sum",
+        "var_pop",
+        "var_samp",
+        "variance",
+    ]
+)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for arrow=True; pip install pyarrow")
+    return pyarrow
+
+
+def _is_aggregate(element):
+    if isinstance(element, (Over, FunctionFilter, WithinGroup)):
+        return True
+    return isinstance(element, FunctionElement) and getattr(element, "name", "").lower() in _AGGREGATES
+
+
+def _check_splittable(stmt):
+    if stmt._limit_clause is not None or stmt._offset_clause is not None:
+        raise exc.ArgumentError("parallel_fetch() does not support statements with LIMIT or OFFSET")
+    if stmt._group_by_clause.clauses:
+        raise exc.ArgumentError("parallel_fetch() does not support statements with GROUP BY")
+    if stmt._having is not None:
+        raise exc.ArgumentError("parallel_fetch() does not support statements with HAVING")
+    if stmt._distinct:
+        raise exc.ArgumentError("parallel_fetch() does not support DISTINCT statements")
+    for column in stmt._raw_columns:
+        if any(_is_aggregate(e) for e in visitors.iterate(column, {})):
+            raise exc.ArgumentError("parallel_fetch() does not support aggregate or window functions")
+
+
+def _shard_column(engine, stmt):
+    tables = [f for f in stmt.froms if hasattr(f, "c") and getattr(f, "name", None)]
+    if len(tables) != 1:
+        raise exc.ArgumentError("split_on is required unless the statement selects from exactly one table")
+    table = tables[0]
+    with engine.connect() as conn:
+        stats = engine.dialect.get_table_stats(conn, table.name, table.schema)
+    for name in stats["shard_key"] or ():
+        if name in table.c:
+            return table.c[name]
+    raise exc.ArgumentError("%s has no shard key; pass split_on" % table.name)
+
+
+def _bounds(engine, stmt, column, workers):
+    """Compute ``workers - 1`` inner boundaries from MIN/MAX of ``column``."""
+
+    bounds_stmt = stmt.with_only_columns([func.min(column), func.max(column)]).order_by(None)
+    for from_ in stmt.froms:
+        bounds_stmt = bounds_stmt.select_from(from_)
+    low, high = engine.execute(bounds_stmt).first()
+    if low is None or high is None or low == high:
+        return []
+
+    if isinstance(low, bool):
+        raise exc.ArgumentError("cannot split on boolean column %s" % column)
+    elif isinstance(low, util.int_types):
+        step = (high - low + 1) / float(workers)
+        bounds = [low + int(round(step * i)) for i in range(1, workers)]
+    elif isinstance(low, (float, decimal.Decimal, datetime.datetime, datetime.date)):
+        bounds = [low + (high - low) * i / workers for i in range(1, workers)]
+    else:
+        raise exc.ArgumentError(
+            "cannot compute ranges for %s values of %s; pass bounds explicitly" % (type(low).__name__, column)
+        )
+    return sorted(set(b for b in bounds if low < b <= high))
+
+
+def split_ranges(column, bounds):
+    """Return predicates for the ranges delimited by sorted ``bounds``.
+
+    The first predicate also matches ``NULL`` and the outer ranges are
+    open ended, so together the predicates cover every row exactly once.
+    """
+
+    if not bounds:
+        return [None]
+    predicates = [or_(column < bounds[0], column.is_(None))]
+    predicates.extend(and_(column >= low, column < high) for low, high in zip(bounds, bounds[1:]))
+    predicates.append(column >= bounds[-1])
+    return predicates
+
+
+def parallel_fetch(
+    engine, stmt, split_on=None, workers=4, bounds=None, batch_size=10000, max_pending=None, arrow=False
+):
+    """Run ``stmt`` as ``workers`` concurrent range queries and stream the rows.
+
+    :param engine: the :class:`~sqlalchemy.engine.Engine`; each range runs
+     on its own pooled connection, so the pool should allow ``workers``
+     connections.
+    :param stmt: a :func:`~sqlalchemy.sql.expression.select` without
+     ``LIMIT``, ``OFFSET``, ``GROUP BY``, ``HAVING``, ``DISTINCT``, or
+     aggregate or window functions, whose results would differ when
+     computed range by range.
+    :param split_on: the column to split on; defaults to the table's shard
+     key.
+    :param workers: number of ranges and threads.
+    :param bounds: sorted inner range boundaries, instead of computing them
+     from ``MIN`` / ``MAX``.
+    :param batch_size: rows fetched per ``fetchmany()`` call and per queued
+     batch.
+    :param max_pending: maximum number of batches waiting for the consumer;
+     defaults to ``2 * workers``.
+    :param arrow: yield ``pyarrow.RecordBatch`` objects instead of rows.
+
+    """
+    _check_splittable(stmt)
+    if arrow:
+        _pyarrow()
+    column = split_on if split_on is not None else _shard_column(engine, stmt)
+    if bounds is None:
+        bounds = _bounds(engine, stmt, column, workers) if workers > 1 else []
+    predicates = split_ranges(column, list(bounds))
+    return _stream(engine, stmt, predicates, batch_size, max_pending or 2 * workers, arrow)
+
+
+def put_until(queue_, item, stopped):
+    """Put ``item`` on bounded ``queue_`` unless ``stopped`` (an
+    :class:`threading.Event`) is set first; return whether it was put."""
+
+    # re-check for cancellation so that a producer thread never blocks on a
+    # consumer that went away
+    while not stopped.is_set():
+        try:
+            queue_.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _stream(engine, stmt, predicates, batch_size, max_pending, arrow):
+    batches = queue.Queue(max_pending)
+    cancelled = threading.Event()
+
+    def put(item):
+        return put_until(batches, item, cancelled)
+
+    def fetch_range(predicate):
+        try:
+            range_stmt = stmt if predicate is None else stmt.where(predicate)
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(range_stmt)
+                try:
+                    keys = result.keys()
+                    while not cancelled.is_set():
+                        rows = result.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        if not put((keys, rows)):
+                            break
+                finally:
+                    result.close()
+        except BaseException as err:
+            put(err)
+        finally:
+            put(_DONE)
+
+    pool = ThreadPoolExecutor(len(predicates), thread_name_prefix="kinetica-parallel-fetch")
+    for predicate in predicates:
+        pool.submit(fetch_range, predicate)
+
+    running = len(predicates)
+    try:
+        while running:
+            item = batches.get()
+            if item is _DONE:
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            elif arrow:
+                yield _record_batch(*item)
+            else:
+                for row in item[1]:
+                    yield row
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=True)
+
+
+def _record_batch(keys, rows):
+    pyarrow = _pyarrow()
+    columns = list(zip(*rows))
+    return pyarrow.RecordBatch.from_arrays([pyarrow.array(c) for c in columns], names=list(keys))
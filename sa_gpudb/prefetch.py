@@ -0,0 +1,169 @@
+# sa_gpudb/prefetch.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Background prefetching of result rows.
+
+With the ``prefetch_batches`` execution option a helper thread keeps
+fetching the next ``fetchmany()`` batches of a result while the application
+processes the current one, overlapping driver and network time with Python
+work::
+
+    with engine.connect() as conn:
+        result = conn.execution_options(prefetch_batches=2, prefetch_batch_size=5000).execute(stmt)
+        for row in result:
+            writer.writerow(row)
+
+At most ``prefetch_batches`` batches of ``prefetch_batch_size`` rows (1000
+by default) wait in the queue, so memory stays bounded whatever the size of
+the result.  Closing the result before it is exhausted stops the helper
+thread, cancelling a fetch in progress where the driver supports
+``Cursor.cancel()``, and waits for it before the cursor is closed.
+
+The DBAPI connection is in use by the helper thread until the result is
+exhausted or closed; like any pending result, it should be consumed or
+closed before the connection executes another statement.
+
+"""
+
+import collections
+import queue
+import threading
+import weakref
+
+from sqlalchemy.engine import ResultProxy
+
+from .parallel import put_until
+
+DEFAULT_BATCH_SIZE = 1000
+
+_DONE = object()
+
+
+class PrefetchResultProxy(ResultProxy):
+    """A :class:`~sqlalchemy.engine.ResultProxy` reading its rows from
+    batches fetched ahead on a helper thread."""
+
+    _prefetcher = None
+
+    def _init_metadata(self):
+        super(PrefetchResultProxy, self)._init_metadata()
+        self._rows = collections.deque()
+        if self._metadata is not None:
+            options = self.context.execution_options
+            self._prefetcher = _Prefetcher(
+                self.cursor,
+                int(options["prefetch_batches"]),
+                int(options.get("prefetch_batch_size") or DEFAULT_BATCH_SIZE),
+            )
+            # a result dropped without being closed still ends the thread
+            weakref.finalize(self, self._prefetcher.stopped.set)
+
+    def _more(self):
+        # refill the row buffer; False at the end of the result
+        if self._prefetcher is None:
+            return False
+        batch = self._prefetcher.get()
+        if batch is None:
+            return False
+        self._rows.extend(batch)
+        return True
+
+    def _fetchone_impl(self):
+        if self.cursor is None:
+            return self._non_result(None)
+        if not self._rows and not self._more():
+            return None
+        return self._rows.popleft()
+
+    def _fetchmany_impl(self, size=None):
+        if self.cursor is None:
+            return self._non_result([])
+        if size is None:
+            # one batch, as fetchmany() on the cursor returns arraysize rows
+            if not self._rows:
+                self._more()
+            rows, self._rows = self._rows, collections.deque()
+            return list(rows)
+        while len(self._rows) < size and self._more():
+            pass
+        rows = self._rows
+        if len(rows) <= size:
+            self._rows = collections.deque()
+            return list(rows)
+        return [rows.popleft() for _ in range(size)]
+
+    def _fetchall_impl(self):
+        if self.cursor is None:
+            return self._non_result([])
+        while self._more():
+            pass
+        rows, self._rows = self._rows, collections.deque()
+        return list(rows)
+
+    def _soft_close(self, **kw):
+        if self._prefetcher is not None:
+            # the helper thread must be off the cursor before it is closed
+            self._prefetcher.stop()
+            self._prefetcher = None
+        if getattr(self, "_rows", None):
+            self._rows.clear()
+        super(PrefetchResultProxy, self)._soft_close(**kw)
+
+
+class _Prefetcher(object):
+    """Helper thread putting ``fetchmany(batch_size)`` batches of ``cursor``
+    into a queue of at most ``batches``."""
+
+    def __init__(self, cursor, batches, batch_size):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.queue = queue.Queue(max(1, batches))
+        self.stopped = threading.Event()
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, name="kinetica-prefetch", daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        return put_until(self.queue, item, self.stopped)
+
+    def _run(self):
+        try:
+            while not self.stopped.is_set():
+                rows = self.cursor.fetchmany(self.batch_size)
+                if not rows or not self._put(rows):
+                    break
+        except BaseException as err:
+            if not self.stopped.is_set():
+                self._put(err)
+        finally:
+            self._put(_DONE)
+
+    def get(self):
+        """Return the next batch, or ``None`` at the end; re-raise what the
+        fetch raised."""
+
+        if self.finished:
+            return None
+        item = self.queue.get()
+        if item is _DONE:
+            self.finished = True
+            return None
+        elif isinstance(item, BaseException):
+            self.finished = True
+            raise item
+        return item
+
+    def stop(self):
+        if not self.thread.is_alive():
+            return
+        self.stopped.set()
+        if not self.finished:
+            cancel = getattr(self.cursor, "cancel", None)
+            if cancel is not None:
+                try:
+                    cancel()
+                except Exception:
+                    pass
+        self.thread.join()
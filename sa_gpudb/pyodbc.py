@@ -95,96 +95,63 @@ for unix + PyODBC.
 
 """
 
-from .base import MSExecutionContext, KineticaBaseDialect, VARBINARY
+import datetime
+
+from .base import MSExecutionContext, KineticaBaseDialect, RESOURCE_GROUP_KEY, TIME, VARBINARY, _MSDate, _MSDateTime
+from .routing import DEFAULT_BACKOFF, DEFAULT_BACKOFF_MAX, Router, RoutingConnection, routing_connection, split_hosts
 from sqlalchemy.connectors.pyodbc import PyODBCConnector
 from sqlalchemy.engine import reflection
-from sqlalchemy import types as sqltypes, util
-import decimal
-
-
-class _ms_numeric_pyodbc(object):
-
-    """Turns Decimals with adjusted() < 0 or > 7 into strings.
+from sqlalchemy.engine.url import URL
+from sqlalchemy import exc, types as sqltypes, util
 
-    The routines here are needed for older pyodbc versions
-    as well as current mxODBC versions.
-
-    """
 
+class _VARBINARY_pyodbc(VARBINARY):
     def bind_processor(self, dialect):
+        if dialect.dbapi is None:
+            return None
 
-        super_process = super(_ms_numeric_pyodbc, self).bind_processor(dialect)
-
-        if not dialect._need_decimal_fix:
-            return super_process
+        BinaryNull = dialect.dbapi.BinaryNull
 
         def process(value):
-            if self.asdecimal and isinstance(value, decimal.Decimal):
+            # pyodbc-specific: bind NULL as a binary NULL, not an untyped
+            # one; bytes bind as-is, without a Binary() copy
+            return BinaryNull if value is None else value
+
+        return process
 
-                adjusted = value.adjusted()
-                if adjusted < 0:
-                    return self._small_dec_to_string(value)
-                elif adjusted > 7:
-                    return self._large_dec_to_string(value)
 
-            if super_process:
-                return super_process(value)
+class _MSDate_pyodbc(_MSDate):
+    def bind_processor(self, dialect):
+        def process(value):
+            if type(value) == datetime.date:
+                return datetime.datetime(value.year, value.month, value.day)
             else:
                 return value
 
         return process
 
-    # these routines needed for older versions of pyodbc.
-    # as of 2.1.8 this logic is integrated.
-
-    def _small_dec_to_string(self, value):
-        return "%s0.%s%s" % (
-            (value < 0 and "-" or ""),
-            "0" * (abs(value.adjusted()) - 1),
-            "".join([str(nint) for nint in value.as_tuple()[1]]),
-        )
-
-    def _large_dec_to_string(self, value):
-        _int = value.as_tuple()[1]
-        if "E" in str(value):
-            result = "%s%s%s" % (
-                (value < 0 and "-" or ""),
-                "".join([str(s) for s in _int]),
-                "0" * (value.adjusted() - (len(_int) - 1)),
-            )
-        else:
-            if (len(_int) - 1) > value.adjusted():
-                result = "%s%s.%s" % (
-                    (value < 0 and "-" or ""),
-                    "".join([str(s) for s in _int][0 : value.adjusted() + 1]),
-                    "".join([str(s) for s in _int][value.adjusted() + 1 :]),
-                )
-            else:
-                result = "%s%s" % ((value < 0 and "-" or ""), "".join([str(s) for s in _int][0 : value.adjusted() + 1]))
-        return result
-
 
-class _MSNumeric_pyodbc(_ms_numeric_pyodbc, sqltypes.Numeric):
-    pass
+class _MSTime_pyodbc(TIME):
+    __zero_date = datetime.date(1900, 1, 1)
 
+    def bind_processor(self, dialect):
+        def process(value):
+            if isinstance(value, datetime.datetime):
+                value = datetime.datetime.combine(self.__zero_date, value.time())
+            elif isinstance(value, datetime.time):
+                value = datetime.datetime.combine(self.__zero_date, value)
+            return value
 
-class _MSFloat_pyodbc(_ms_numeric_pyodbc, sqltypes.Float):
-    pass
+        return process
 
 
-class _VARBINARY_pyodbc(VARBINARY):
+class _MSDateTime_pyodbc(_MSDateTime):
     def bind_processor(self, dialect):
-        if dialect.dbapi is None:
-            return None
-
-        DBAPIBinary = dialect.dbapi.Binary
-
         def process(value):
-            if value is not None:
-                return DBAPIBinary(value)
+            if type(value) == datetime.date:
+                return datetime.datetime(value.year, value.month, value.day)
             else:
-                # pyodbc-specific
-                return dialect.dbapi.BinaryNull
+                return value
 
         return process
 
@@ -192,6 +159,16 @@ class _VARBINARY_pyodbc(VARBINARY):
 class MSExecutionContext_pyodbc(MSExecutionContext):
     _embedded_scope_identity = False
 
+    def create_cursor(self):
+        cursor = super(MSExecutionContext_pyodbc, self).create_cursor()
+        route = self.execution_options.get("kinetica_route")
+        if route is not None:
+            if route != "primary":
+                raise exc.ArgumentError("kinetica_route must be 'primary'")
+            if routing_connection(self._dbapi_connection) is not None:
+                cursor.route = route
+        return cursor
+
     def pre_exec(self):
         """where appropriate, issue "select scope_identity()" in the same
         statement.
@@ -242,8 +219,9 @@ class KineticaBaseDialect_pyodbc(PyODBCConnector, KineticaBaseDialect):
     colspecs = util.update_copy(
         KineticaBaseDialect.colspecs,
         {
-            sqltypes.Numeric: _MSNumeric_pyodbc,
-            sqltypes.Float: _MSFloat_pyodbc,
+            sqltypes.DateTime: _MSDateTime_pyodbc,
+            sqltypes.Date: _MSDate_pyodbc,
+            sqltypes.Time: _MSTime_pyodbc,
             VARBINARY: _VARBINARY_pyodbc,
             sqltypes.LargeBinary: _VARBINARY_pyodbc,
         },
@@ -254,7 +232,12 @@ class KineticaBaseDialect_pyodbc(PyODBCConnector, KineticaBaseDialect):
             self.description_encoding = params.pop("description_encoding")
         super(KineticaBaseDialect_pyodbc, self).__init__(**params)
         self.use_scope_identity = self.use_scope_identity and self.dbapi and hasattr(self.dbapi.Cursor, "nextset")
-        self._need_decimal_fix = self.dbapi and self._dbapi_version() < (2, 1, 8)
+
+    def is_disconnect(self, e, connection, cursor):
+        if super(KineticaBaseDialect_pyodbc, self).is_disconnect(e, connection, cursor):
+            return True
+        # SQLSTATE class 08: connection exceptions
+        return isinstance(e, self.dbapi.Error) and bool(e.args) and str(e.args[0]).startswith("08")
 
     def _check_unicode_returns(self, connection):
         # DefaultDialect._check_unicode_returns cannot work with Kinetica: it
@@ -269,8 +252,61 @@ class KineticaDialect(KineticaBaseDialect_pyodbc):
     name = "kinetica"
     driver = "kinetica"
 
-    def __init__(self, **kwargs):
-      KineticaBaseDialect_pyodbc.__init__(self, **kwargs)
+    def __init__(
+        self,
+        hosts=None,
+        read_hosts=None,
+        failover_backoff=DEFAULT_BACKOFF,
+        failover_backoff_max=DEFAULT_BACKOFF_MAX,
+        **kwargs
+    ):
+        KineticaBaseDialect_pyodbc.__init__(self, **kwargs)
+        self.hosts = split_hosts(hosts)
+        self.read_hosts = split_hosts(read_hosts)
+        self.failover_backoff = float(failover_backoff)
+        self.failover_backoff_max = float(failover_backoff_max)
+        self._router = None
+
+    def create_connect_args(self, url):
+        """Take the routing arguments (see :mod:`sa_gpudb.routing`) out of
+        the URL query; the rest makes up the ODBC connection string."""
+
+        query = dict(url.query)
+        self.hosts = split_hosts(query.pop("hosts", None)) or self.hosts
+        self.read_hosts = split_hosts(query.pop("read_hosts", None)) or self.read_hosts
+        self.failover_backoff = float(query.pop("failover_backoff", self.failover_backoff))
+        self.failover_backoff_max = float(query.pop("failover_backoff_max", self.failover_backoff_max))
+        url = URL(url.drivername, url.username, url.password, url.host, url.port, url.database, query)
+
+        if self.read_hosts and not self.hosts:
+            raise exc.ArgumentError("read_hosts needs hosts")
+        if self.hosts:
+            self._router = Router(self.hosts, self.read_hosts, self.failover_backoff, self.failover_backoff_max)
+        return super(KineticaDialect, self).create_connect_args(url)
+
+    def connect(self, *cargs, **cparams):
+        if self._router is None:
+            return super(KineticaDialect, self).connect(*cargs, **cparams)
+
+        connection_string, rest = cargs[0], cargs[1:]
+
+        def connect(host):
+            return self.dbapi.connect("%s;URL=%s" % (connection_string, host), *rest, **cparams)
+
+        return RoutingConnection(self._router, connect, lambda e: self.is_disconnect(e, None, None), self.dbapi)
+
+    def _set_resource_group(self, dbapi_connection, cursor, group):
+        # on the head and every replica, without pinning reads to the head
+        routing = routing_connection(dbapi_connection)
+        if routing is None:
+            return super(KineticaDialect, self)._set_resource_group(dbapi_connection, cursor, group)
+        routing.set_session(RESOURCE_GROUP_KEY, self._set_resource_group_sql(group))
+
+    def do_begin(self, dbapi_connection):
+        # keep every statement of the transaction on the head
+        routing = routing_connection(dbapi_connection)
+        if routing is not None:
+            routing.pin()
 
 
 dialect = KineticaDialect
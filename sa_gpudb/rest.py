@@ -0,0 +1,624 @@
+# sa_gpudb/rest.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""A DBAPI 2.0 module talking to Kinetica's REST API directly.
+
+Used by the ``kinetica+gpudb`` dialect in place of pyodbc and the Kinetica
+ODBC driver.  Statements are sent to the ``/execute/sql`` endpoint as
+Avro-encoded requests over one keep-alive HTTP(S) connection per DBAPI
+connection; result sets come back as binary (Avro) column-major batches of
+``batch_size`` rows, which are decoded a column at a time.  Results larger
+than one batch are paged from the server's paging table as the cursor is
+read, and the paging table is cleared when the cursor is closed.
+
+Parameters use the ``qmark`` style and are sent as the JSON
+``query_parameters`` option; ``executemany()`` sends every row in one
+request.  Binary values cannot be bound over JSON (use
+``GEOMETRY(transfer="wkt")`` for geometries).
+
+"""
+
+import base64
+import collections
+import datetime
+import decimal
+import http.client
+import json
+import socket
+
+from . import avro
+from .routing import is_read_only
+
+apilevel = "2.0"
+threadsafety = 1
+paramstyle = "qmark"
+
+DEFAULT_PORT = 9191
+DEFAULT_BATCH_SIZE = 10000
+
+
+class Warning(Exception):
+    pass
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    """Server or transport failure; ``disconnect`` is true when the
+    connection to the server was lost."""
+
+    def __init__(self, message, disconnect=False):
+        super(OperationalError, self).__init__(message)
+        self.disconnect = disconnect
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+class _TypeObject(frozenset):
+    def __eq__(self, other):
+        return other in self
+
+    def __ne__(self, other):
+        return other not in self
+
+    def __hash__(self):
+        return frozenset.__hash__(self)
+
+
+STRING = _TypeObject([str])
+BINARY = _TypeObject([bytes])
+NUMBER = _TypeObject([int, float, decimal.Decimal, bool])
+DATETIME = _TypeObject([datetime.datetime, datetime.date, datetime.time])
+ROWID = _TypeObject([int])
+
+Binary = bytes
+Date = datetime.date
+Time = datetime.time
+Timestamp = datetime.datetime
+
+
+GPUDB_RESPONSE_SCHEMA = json.dumps(
+    {
+        "type": "record",
+        "name": "gpudb_response",
+        "fields": [
+            {"name": "status", "type": "string"},
+            {"name": "message", "type": "string"},
+            {"name": "data_type", "type": "string"},
+            {"name": "data", "type": "bytes"},
+            {"name": "data_str", "type": "string"},
+        ],
+    }
+)
+
+EXECUTE_SQL_REQUEST_SCHEMA = json.dumps(
+    {
+        "type": "record",
+        "name": "execute_sql_request",
+        "fields": [
+            {"name": "statement", "type": "string"},
+            {"name": "offset", "type": "long"},
+            {"name": "limit", "type": "long"},
+            {"name": "encoding", "type": "string"},
+            {"name": "request_schema_str", "type": "string"},
+            {"name": "data", "type": {"type": "array", "items": "bytes"}},
+            {"name": "options", "type": {"type": "map", "values": "string"}},
+        ],
+    }
+)
+
+EXECUTE_SQL_RESPONSE_SCHEMA = json.dumps(
+    {
+        "type": "record",
+        "name": "execute_sql_response",
+        "fields": [
+            {"name": "count_affected", "type": "long"},
+            {"name": "response_schema_str", "type": "string"},
+            {"name": "binary_encoded_response", "type": "bytes"},
+            {"name": "json_encoded_response", "type": "string"},
+            {"name": "total_number_of_records", "type": "long"},
+            {"name": "has_more_records", "type": "boolean"},
+            {"name": "paging_table", "type": "string"},
+            {"name": "info", "type": {"type": "map", "values": "string"}},
+        ],
+    }
+)
+
+TABLES_QUERY = "SELECT schema_name, object_name, object_type FROM ki_catalog.ki_objects"
+
+_TableRow = collections.namedtuple("Row", "table_cat table_schem table_name table_type remarks")
+_ColumnRow = collections.namedtuple(
+    "Row",
+    "table_cat table_schem table_name column_name data_type type_name column_size "
+    "buffer_length decimal_digits num_prec_radix nullable remarks column_def "
+    "sql_data_type sql_datetime_sub char_octet_length ordinal_position is_nullable",
+)
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _timestamp(value):
+    return None if value is None else _EPOCH + datetime.timedelta(milliseconds=value)
+
+
+def _parser(parse):
+    def convert(value):
+        return None if value is None else parse(value)
+
+    return convert
+
+
+def _parse_time(value):
+    return datetime.time.fromisoformat(_pad_fraction(value))
+
+
+def _parse_datetime(value):
+    return datetime.datetime.fromisoformat(_pad_fraction(value))
+
+
+def _pad_fraction(value):
+    # fromisoformat() wants 3 or 6 fractional digits
+    head, dot, fraction = value.partition(".")
+    if dot and len(fraction) not in (3, 6):
+        return "%s.%s" % (head, fraction[:6].ljust(6, "0"))
+    return value
+
+
+# column_datatypes entry -> (converter, Python type for cursor.description)
+_column_types = {
+    "int": (None, int),
+    "int8": (None, int),
+    "int16": (None, int),
+    "long": (None, int),
+    "float": (None, float),
+    "double": (None, float),
+    "boolean": (_parser(bool), bool),
+    "timestamp": (_timestamp, datetime.datetime),
+    "datetime": (_parser(_parse_datetime), datetime.datetime),
+    "date": (_parser(datetime.date.fromisoformat), datetime.date),
+    "time": (_parser(_parse_time), datetime.time),
+    "decimal": (_parser(decimal.Decimal), decimal.Decimal),
+    "ulong": (_parser(int), int),
+    "bytes": (None, bytes),
+    "wkb": (None, bytes),
+}
+
+# /show/table (base Avro type, column properties) -> ODBC type name, as
+# reported by the Kinetica ODBC driver and read by get_columns()
+_string_properties = (
+    ("date", "DATE"),
+    ("time", "TYPE_TIME"),
+    ("datetime", "DATETIME"),
+    ("decimal", "DECIMAL"),
+    ("ipv4", "IPV4"),
+    ("uuid", "UUID"),
+    ("ulong", "UNSIGNED BIGINT"),
+    ("wkt", "GEOMETRY"),
+)
+
+
+def _odbc_type(base_type, properties):
+    if base_type == "int":
+        if "int8" in properties:
+            return "TINYINT"
+        elif "int16" in properties:
+            return "SMALLINT"
+        elif "boolean" in properties:
+            return "BOOLEAN"
+        return "INTEGER"
+    elif base_type == "long":
+        return "TYPE_TIMESTAMP" if "timestamp" in properties else "BIGINT"
+    elif base_type == "float":
+        return "REAL"
+    elif base_type == "double":
+        return "DOUBLE"
+    elif base_type == "bytes":
+        if "wkt" in properties:
+            return "GEOMETRY"
+        for p in properties:
+            if p.startswith("vector("):
+                return p.upper()
+        return "BYTES"
+    for prop, type_name in _string_properties:
+        if prop in properties:
+            return type_name
+    return "VARCHAR"
+
+
+def _char_size(properties):
+    for p in properties:
+        if p.startswith("char") and p[4:].isdigit():
+            return int(p[4:])
+    return None
+
+
+def _json_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ", timespec="milliseconds")
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, decimal.Decimal):
+        return str(value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        raise NotSupportedError("Binary parameters cannot be sent as query_parameters")
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _error(message):
+    lowered = message.lower()
+    if "syntax" in lowered or "does not exist" in lowered or "not found" in lowered:
+        return ProgrammingError(message)
+    elif "primary key" in lowered or "unique" in lowered:
+        return IntegrityError(message)
+    elif "invalid" in lowered or "out of range" in lowered or "cannot convert" in lowered:
+        return DataError(message)
+    return DatabaseError(message)
+
+
+class Cursor(object):
+    arraysize = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+        self._pos = 0
+        self._query = None
+        self._offset = 0
+        self._has_more = False
+        self._paging_table = ""
+
+    def _check_open(self):
+        if self.connection is None or self.connection.closed:
+            raise InterfaceError("Attempt to use a closed connection.")
+
+    def execute(self, statement, *parameters):
+        self._check_open()
+        if len(parameters) == 1 and isinstance(parameters[0], (list, tuple)):
+            parameters = parameters[0]
+        options = {}
+        if parameters:
+            options["query_parameters"] = json.dumps([_json_value(p) for p in parameters])
+        self._run(statement, options)
+        return self
+
+    def executemany(self, statement, seq_of_parameters):
+        self._check_open()
+        rows = [[_json_value(p) for p in params] for params in seq_of_parameters]
+        if not rows:
+            return
+        self._run(statement, {"query_parameters": json.dumps(rows)})
+        self.description = None
+
+    def _run(self, statement, options):
+        self._clear_paging_table()
+        self._query = (statement, options)
+        self._offset = 0
+        self._load(self.connection._execute_sql(statement, 0, options))
+
+    def _load(self, response):
+        self._has_more = response["has_more_records"]
+        self._paging_table = response["paging_table"]
+        self._pos = 0
+        if not response["response_schema_str"]:
+            self.description = None
+            self.rowcount = response["count_affected"]
+            self._rows = []
+            return
+
+        batch = avro.decode(response["binary_encoded_response"], response["response_schema_str"])
+        headers = batch["column_headers"]
+        datatypes = batch["column_datatypes"]
+        description = []
+        columns = []
+        for i, (name, datatype) in enumerate(zip(headers, datatypes), 1):
+            convert, type_code = _column_types.get(datatype, (None, str))
+            values = batch["column_%d" % i]
+            columns.append(values if convert is None else list(map(convert, values)))
+            description.append((name, type_code, None, None, None, None, True))
+
+        self.description = description
+        self.rowcount = response["total_number_of_records"]
+        self._rows = list(zip(*columns)) if columns else []
+        self._offset += len(self._rows)
+
+    def _fill(self):
+        # read the next page once the current one is consumed
+        while self._pos >= len(self._rows) and self._has_more:
+            statement, options = self._query
+            options = dict(options, paging_table=self._paging_table)
+            description = self.description
+            self._load(self.connection._execute_sql(statement, self._offset, options))
+            self.description = description
+            if not self._rows:
+                break
+        return self._pos < len(self._rows)
+
+    def fetchone(self):
+        if not self._fill():
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = []
+        while len(rows) < size and self._fill():
+            start = self._pos
+            self._pos = min(len(self._rows), start + size - len(rows))
+            rows.extend(self._rows[start : self._pos])
+        return rows
+
+    def fetchall(self):
+        rows = []
+        while self._fill():
+            rows.extend(self._rows[self._pos :])
+            self._pos = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def nextset(self):
+        return False
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def setoutputsize(self, size, column=None):
+        pass
+
+    def _clear_paging_table(self):
+        table, self._paging_table, self._has_more = self._paging_table, "", False
+        if table and self.connection is not None and not self.connection.closed:
+            try:
+                self.connection._post_json("/clear/table", {"table_name": table, "authorization": "", "options": {}})
+            except Error:
+                # paging tables also expire on the server
+                pass
+
+    def close(self):
+        self._clear_paging_table()
+        self._rows = []
+        self.description = None
+
+    def tables(self, table=None, catalog=None, schema=None, tableType=None):
+        self._check_open()
+        conditions, params = [], []
+        if schema is not None:
+            conditions.append("schema_name = ?")
+            params.append(schema)
+        if table is not None:
+            conditions.append("object_name = ?")
+            params.append(table)
+        statement = TABLES_QUERY + (" WHERE " + " AND ".join(conditions) if conditions else "")
+        self.execute(statement, params)
+        rows = [_TableRow(None, s, n, t or "TABLE", None) for s, n, t in self.fetchall()]
+        self._set_catalog_result(rows, _TableRow._fields)
+        return self
+
+    def columns(self, table=None, catalog=None, schema=None, column=None):
+        self._check_open()
+        name = table if schema is None else "%s.%s" % (schema, table)
+        response = self.connection._post_json(
+            "/show/table", {"table_name": name, "options": {"no_error_if_not_exists": "true"}}
+        )
+        rows = []
+        for qualified, type_schema, properties in zip(
+            response.get("table_names", ()), response.get("type_schemas", ()), response.get("properties", ())
+        ):
+            table_schema, _, table_name = qualified.rpartition(".")
+            fields = json.loads(type_schema)["fields"] if type_schema else []
+            for position, field in enumerate(fields, 1):
+                if column is not None and field["name"] != column:
+                    continue
+                types = field["type"] if isinstance(field["type"], list) else [field["type"]]
+                props = properties.get(field["name"], [])
+                nullable = "null" in types or "nullable" in props
+                base_type = next(t for t in types if t != "null")
+                rows.append(
+                    _ColumnRow(
+                        None,
+                        table_schema or schema,
+                        table_name,
+                        field["name"],
+                        None,
+                        _odbc_type(base_type, props),
+                        _char_size(props),
+                        None,
+                        None,
+                        None,
+                        1 if nullable else 0,
+                        None,
+                        None,
+                        None,
+                        None,
+                        None,
+                        position,
+                        "YES" if nullable else "NO",
+                    )
+                )
+        self._set_catalog_result(rows, _ColumnRow._fields)
+        return self
+
+    def _set_catalog_result(self, rows, fields):
+        self.description = [(f, str, None, None, None, None, True) for f in fields]
+        self.rowcount = len(rows)
+        self._rows = rows
+        self._pos = 0
+        self._has_more = False
+
+
+class Connection(object):
+    """One keep-alive HTTP(S) session with a Kinetica head node."""
+
+    def __init__(
+        self,
+        host="localhost",
+        port=DEFAULT_PORT,
+        username=None,
+        password=None,
+        protocol="http",
+        path="",
+        batch_size=DEFAULT_BATCH_SIZE,
+        timeout=None,
+    ):
+        if protocol not in ("http", "https"):
+            raise InterfaceError("protocol must be 'http' or 'https'")
+        self.host = host
+        self.port = int(port or DEFAULT_PORT)
+        self.protocol = protocol
+        self.path = "/" + path.strip("/") if path and path.strip("/") else ""
+        self.batch_size = int(batch_size)
+        self.timeout = timeout
+        self.closed = False
+        self.autocommit = True
+        self._headers = {"Connection": "keep-alive"}
+        if username is not None:
+            token = base64.b64encode(("%s:%s" % (username, password or "")).encode("utf-8")).decode("ascii")
+            self._headers["Authorization"] = "Basic " + token
+        self._http = None
+        self._used = False
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.protocol == "https" else http.client.HTTPConnection
+        self._http = cls(self.host, self.port, timeout=self.timeout)
+        self._used = False
+
+    def _request(self, endpoint, body, content_type, idempotent=True):
+        if self.closed:
+            raise InterfaceError("Attempt to use a closed connection.")
+        headers = dict(self._headers, **{"Content-Type": content_type})
+        while True:
+            if self._http is None:
+                self._connect()
+            reused = self._used
+            sent = False
+            try:
+                self._http.request("POST", self.path + endpoint, body, headers)
+                sent = True
+                response = self._http.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError, socket.timeout, OSError) as err:
+                self._http.close()
+                self._http = None
+                # a kept-alive connection the server has since closed: retry
+                # once on a fresh one.  Once the request is sent, the server
+                # may have run it before dropping the connection, so only a
+                # request that can safely run twice is sent again.
+                if (
+                    reused
+                    and (idempotent or not sent)
+                    and isinstance(err, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+                ):
+                    continue
+                raise OperationalError("Connection to %s:%s failed: %s" % (self.host, self.port, err), disconnect=True)
+            self._used = True
+            if response.getheader("Connection", "").lower() == "close":
+                self._http.close()
+                self._http = None
+            return response.status, data
+
+    def _post_binary(self, endpoint, body, idempotent=True):
+        status, data = self._request(endpoint, body, "application/octet-stream", idempotent)
+        try:
+            envelope = avro.decode(data, GPUDB_RESPONSE_SCHEMA)
+        except Exception:
+            raise OperationalError("HTTP %d from %s: %r" % (status, endpoint, data[:200]))
+        if envelope["status"] != "OK":
+            raise _error(envelope["message"])
+        return envelope["data"]
+
+    def _post_json(self, endpoint, request):
+        status, data = self._request(endpoint, json.dumps(request).encode("utf-8"), "application/json")
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            raise OperationalError("HTTP %d from %s: %r" % (status, endpoint, data[:200]))
+        if envelope.get("status") != "OK":
+            raise _error(envelope.get("message", "HTTP %d" % status))
+        if envelope.get("data_str"):
+            return json.loads(envelope["data_str"])
+        return envelope.get("data") or {}
+
+    def _execute_sql(self, statement, offset, options):
+        request = avro.encode(
+            {
+                "statement": statement,
+                "offset": offset,
+                "limit": self.batch_size,
+                "encoding": "binary",
+                "request_schema_str": "",
+                "data": [],
+                "options": options,
+            },
+            EXECUTE_SQL_REQUEST_SCHEMA,
+        )
+        # later pages only read the paging table
+        idempotent = offset > 0 or is_read_only(statement)
+        return avro.decode(self._post_binary("/execute/sql", request, idempotent), EXECUTE_SQL_RESPONSE_SCHEMA)
+
+    def server_version(self):
+        response = self._post_json("/show/system/properties", {"options": {}})
+        return response.get("property_map", {}).get("version.gpudb_core_version")
+
+    def cursor(self):
+        if self.closed:
+            raise InterfaceError("Attempt to use a closed connection.")
+        return Cursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self.closed = True
+
+
+def connect(host="localhost", port=DEFAULT_PORT, username=None, password=None, **kw):
+    return Connection(host, port, username=username, password=password, **kw)
@@ -0,0 +1,359 @@
+# sa_gpudb/routing.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Routing of statements across several Kinetica head nodes.
+
+Configured with the ``hosts`` and ``read_hosts`` arguments of the
+``kinetica`` (ODBC) dialect, either in the URL query or as
+:func:`~sqlalchemy.create_engine` keywords::
+
+    engine = create_engine(
+        "kinetica://user:pw@KINETICA/?hosts=http://head-a:9191,http://head-b:9191"
+        "&read_hosts=http://replica-a:9191,http://replica-b:9191"
+    )
+
+Each host URL replaces the ``URL=`` of the ODBC data source.  ``hosts`` are
+the read-write heads in failover order: a pooled connection opens on the
+first one that is up.  ``read_hosts`` serve read-only statements (``SELECT``
+and ``WITH`` without ``INTO``) round-robin; without them every statement
+goes to the connection's head.
+
+A host whose connection fails with a communication error (SQLSTATE
+``08xxx``) is marked down and skipped for a backoff period, doubling with
+each consecutive failure up to ``failover_backoff_max`` seconds.  The next
+attempt to connect to it after the backoff is its health check: success
+puts it back in rotation.  Read-only statements failing on a replica are
+retried on the next replica, then on the head.  Failures on the head
+invalidate the pooled connection as usual, and the pool reconnects to the
+next head that is up.
+
+Session settings, such as the ``SET RESOURCE GROUP`` issued for the
+``kinetica_resource_group`` execution option, are applied to the head and
+to every replica connection, including those opened later, and do not pin
+reads to the head.
+
+Reads stick to the head inside a transaction begun with
+``Connection.begin()`` and after a write until the next commit or
+rollback, so a connection always reads its own writes.  The
+``kinetica_route="primary"`` execution option sends a statement to the
+head regardless.
+
+"""
+
+import re
+import threading
+import time
+
+DEFAULT_BACKOFF = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+_read_only_re = re.compile(r"^[\s(]*(?:SELECT|WITH)\b", re.I)
+_into_re = re.compile(r"\bINTO\b", re.I)
+
+
+def is_read_only(statement):
+    """Return whether SQL ``statement`` only reads."""
+
+    return bool(_read_only_re.match(statement)) and not _into_re.search(statement)
+
+
+def split_hosts(hosts):
+    """Return ``hosts`` (a comma-separated string or a sequence) as a list."""
+
+    if not hosts:
+        return []
+    if isinstance(hosts, str):
+        hosts = hosts.split(",")
+    return [h.strip() for h in hosts if h.strip()]
+
+
+class Host(object):
+    """Health of one head node or replica."""
+
+    __slots__ = ("url", "failures", "down_until")
+
+    def __init__(self, url):
+        self.url = url
+        self.failures = 0
+        self.down_until = 0.0
+
+    def __repr__(self):
+        return "Host(%r, failures=%d)" % (self.url, self.failures)
+
+
+class Router(object):
+    """Host health and selection shared by the pooled connections of an
+    engine."""
+
+    def __init__(self, hosts, read_hosts=(), backoff=DEFAULT_BACKOFF, backoff_max=DEFAULT_BACKOFF_MAX):
+        if not hosts:
+            raise ValueError("Router needs at least one host")
+        self.hosts = [Host(url) for url in hosts]
+        self.read_hosts = [Host(url) for url in read_hosts]
+        self.backoff = float(backoff)
+        self.backoff_max = float(backoff_max)
+        self._next_read = 0
+        self._lock = threading.Lock()
+        self._clock = time.monotonic
+
+    def _host(self, url):
+        for host in self.hosts + self.read_hosts:
+            if host.url == url:
+                return host
+        raise KeyError(url)
+
+    def is_up(self, url):
+        return self._clock() >= self._host(url).down_until
+
+    def mark_down(self, url):
+        with self._lock:
+            host = self._host(url)
+            host.failures += 1
+            delay = min(self.backoff_max, self.backoff * 2 ** (host.failures - 1))
+            host.down_until = self._clock() + delay
+
+    def mark_up(self, url):
+        with self._lock:
+            host = self._host(url)
+            host.failures = 0
+            host.down_until = 0.0
+
+    def candidates(self, read_only=False):
+        """Hosts to try, in order: the next replicas round-robin for reads,
+        the heads in failover order otherwise.  Hosts in backoff are left
+        out; if every head is, all heads are returned."""
+
+        now = self._clock()
+        if read_only:
+            with self._lock:
+                start = self._next_read
+                self._next_read += 1
+            count = len(self.read_hosts)
+            ordered = [self.read_hosts[(start + i) % count] for i in range(count)]
+            return [h.url for h in ordered if now >= h.down_until]
+        up = [h.url for h in self.hosts if now >= h.down_until]
+        return up or [h.url for h in sorted(self.hosts, key=lambda h: h.down_until)]
+
+    def connect(self, connect, is_disconnect):
+        """Open a connection with ``connect(url)`` on the first head that
+        accepts it; return ``(url, connection)``."""
+
+        error = None
+        for url in self.candidates():
+            try:
+                connection = connect(url)
+            except Exception as err:
+                if not is_disconnect(err):
+                    raise
+                self.mark_down(url)
+                error = err
+                continue
+            self.mark_up(url)
+            return url, connection
+        raise error
+
+
+class RoutingConnection(object):
+    """DBAPI connection spreading statements over a head connection and
+    lazily opened replica connections."""
+
+    def __init__(self, router, connect, is_disconnect, dbapi):
+        self.router = router
+        self.dbapi = dbapi
+        self._connect = connect
+        self._is_disconnect = is_disconnect
+        self._primary = None
+        self.primary_url = None
+        self._replicas = {}
+        self._session = {}
+        self.pinned = False
+        self.closed = False
+
+    @property
+    def primary(self):
+        if self.closed:
+            raise self.dbapi.ProgrammingError("Attempt to use a closed connection.")
+        if self._primary is None:
+            url, connection = self.router.connect(self._connect, self._is_disconnect)
+            self._apply_session(connection, self._session.values())
+            self.primary_url, self._primary = url, connection
+        return self._primary
+
+    def set_session(self, name, statement):
+        """Run session setting ``statement`` on the head and on every
+        replica connection, now for those that are open and later for the
+        others; it replaces the previous setting called ``name``."""
+
+        self._session[name] = statement
+        for connection in [self._primary] + list(self._replicas.values()):
+            if connection is not None:
+                self._apply_session(connection, [statement])
+
+    def _apply_session(self, connection, statements):
+        cursor = connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def replica(self):
+        """Return ``(url, connection)`` of the next replica that is up, or
+        ``(None, None)``."""
+
+        for url in self.router.candidates(read_only=True):
+            if url in self._replicas:
+                return url, self._replicas[url]
+            try:
+                connection = self._connect(url)
+                self._apply_session(connection, self._session.values())
+            except Exception as err:
+                if not self._is_disconnect(err):
+                    raise
+                self.router.mark_down(url)
+                continue
+            self.router.mark_up(url)
+            self._replicas[url] = connection
+            return url, connection
+        return None, None
+
+    def drop_replica(self, url):
+        connection = self._replicas.pop(url, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def cursor(self):
+        if self.closed:
+            raise self.dbapi.ProgrammingError("Attempt to use a closed connection.")
+        return RoutingCursor(self)
+
+    def pin(self):
+        self.pinned = True
+
+    def commit(self):
+        self.pinned = False
+        if self._primary is not None:
+            self._primary.commit()
+
+    def rollback(self):
+        self.pinned = False
+        if self._primary is not None:
+            self._primary.rollback()
+        for connection in self._replicas.values():
+            connection.rollback()
+
+    def close(self):
+        self.closed = True
+        for connection in [self._primary] + list(self._replicas.values()):
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+        self._primary = None
+        self._replicas.clear()
+
+    def __getattr__(self, name):
+        # getinfo(), autocommit, timeout, ... of the head connection
+        return getattr(self.primary, name)
+
+
+class RoutingCursor(object):
+    """Cursor sending each statement to the head or a replica."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.route = None
+        self.host = None
+        self._cursors = {}
+        self._cursor = None
+
+    def _cursor_for(self, url, dbapi_connection):
+        cursor = self._cursors.get(url)
+        if cursor is None:
+            cursor = self._cursors[url] = dbapi_connection.cursor()
+        self._cursor = cursor
+        self.host = url
+        return cursor
+
+    def _primary_cursor(self):
+        connection = self.connection
+        dbapi_connection = connection.primary
+        return self._cursor_for(connection.primary_url, dbapi_connection)
+
+    def _run(self, method, statement, *args):
+        connection = self.connection
+        if not is_read_only(statement):
+            connection.pinned = True
+        if self.route == "primary" or connection.pinned or not connection.router.read_hosts:
+            return self._execute_primary(method, statement, *args)
+
+        while True:
+            url, dbapi_connection = connection.replica()
+            if url is None:
+                return self._execute_primary(method, statement, *args)
+            cursor = self._cursor_for(url, dbapi_connection)
+            try:
+                return getattr(cursor, method)(statement, *args)
+            except Exception as err:
+                if not connection._is_disconnect(err):
+                    raise
+                # reads are safe to retry elsewhere
+                connection.router.mark_down(url)
+                connection.drop_replica(url)
+                self._cursors.pop(url, None)
+
+    def _execute_primary(self, method, statement, *args):
+        cursor = self._primary_cursor()
+        try:
+            return getattr(cursor, method)(statement, *args)
+        except Exception as err:
+            if self.connection._is_disconnect(err):
+                # the pool invalidates this connection; the next one opens
+                # on another head
+                self.connection.router.mark_down(self.host)
+            raise
+
+    def execute(self, statement, *parameters):
+        self._run("execute", statement, *parameters)
+        return self
+
+    def executemany(self, statement, seq_of_parameters):
+        self.connection.pinned = True
+        self._execute_primary("executemany", statement, seq_of_parameters)
+
+    def tables(self, *args, **kw):
+        self._primary_cursor().tables(*args, **kw)
+        return self
+
+    def columns(self, *args, **kw):
+        self._primary_cursor().columns(*args, **kw)
+        return self
+
+    def close(self):
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors.clear()
+        self._cursor = None
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        # description, rowcount, fetch*() ... of the cursor that ran last
+        if self._cursor is None:
+            self._primary_cursor()
+        return getattr(self._cursor, name)
+
+
+def routing_connection(dbapi_connection):
+    """Return the :class:`.RoutingConnection` behind a pooled connection, or
+    ``None``."""
+
+    raw = getattr(dbapi_connection, "connection", dbapi_connection)
+    return raw if isinstance(raw, RoutingConnection) else None
@@ -0,0 +1,139 @@
+# sa_gpudb/slow_query.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Slow query log for the Kinetica dialect.
+
+Enabled by passing ``slow_query_threshold`` (in seconds) to
+:func:`~sqlalchemy.create_engine`::
+
+    engine = create_engine(
+        "kinetica://KINETICA",
+        slow_query_threshold=2.0,
+        slow_query_explain="explain",
+        slow_query_redact=True,
+    )
+
+Statements whose total time (compile, execute, fetch and result processing,
+see :mod:`sa_gpudb.instrumentation`) exceeds the threshold are logged to the
+``sa_gpudb.slow_query`` logger at WARNING level with their normalized SQL,
+parameters and elapsed time.
+
+When ``slow_query_explain`` is ``"explain"`` or ``"analyze"``, ``SELECT``
+statements are additionally run through Kinetica's ``EXPLAIN`` /
+``EXPLAIN ANALYZE`` on the same connection and the plan is attached to the
+log record and to :attr:`.StatementEvent.plan`.  Plans are cached per
+fingerprint, so each distinct query is explained only once.  Note that
+``EXPLAIN ANALYZE`` executes the query a second time.
+
+"""
+
+import collections
+import logging
+import re
+import threading
+
+from sqlalchemy import exc, util
+
+
+log = logging.getLogger("sa_gpudb.slow_query")
+
+EXPLAIN_PREFIXES = {"explain": "EXPLAIN ", "analyze": "EXPLAIN ANALYZE "}
+
+_explainable_re = re.compile(r"^\s*(?:/\*.*?\*/\s*)*(SELECT|WITH)\b", re.I | re.S)
+
+REDACTED = "[redacted]"
+
+
+class SlowQueryLog(object):
+    """Logs statements slower than ``threshold`` seconds.
+
+    :param threshold: elapsed time, in seconds, above which a statement is
+     considered slow.
+    :param explain: ``None``, ``"explain"`` or ``"analyze"``.
+    :param redact: ``True`` to replace parameters with ``[redacted]`` in the
+     log, or a callable receiving the parameters and returning what to log.
+    :param max_plans: number of fingerprints whose plans are kept.
+    :param history: number of recent slow statements kept in :attr:`recent`.
+
+    """
+
+    def __init__(self, threshold, explain=None, redact=False, max_plans=500, history=100):
+        if explain is not None and explain not in EXPLAIN_PREFIXES:
+            raise exc.ArgumentError("slow_query_explain must be one of %s" % ", ".join(sorted(EXPLAIN_PREFIXES)))
+        self.threshold = float(threshold)
+        self.explain = explain
+        self.redact = redact
+        self.max_plans = max_plans
+        self.recent = collections.deque(maxlen=history)
+        self._plans = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _redacted(self, parameters):
+        if callable(self.redact):
+            return self.redact(parameters)
+        elif self.redact:
+            return REDACTED
+        return parameters
+
+    def plan_for(self, event, connection):
+        """Return the cached plan for ``event``'s fingerprint, running
+        ``EXPLAIN`` on ``connection`` on a cache miss."""
+
+        fp = event.fingerprint
+        with self._lock:
+            if fp in self._plans:
+                self._plans.move_to_end(fp)
+                return self._plans[fp]
+
+        # a raw DBAPI cursor, so that EXPLAIN itself is neither
+        # instrumented nor subject to the statement events
+        cursor = connection.connection.cursor()
+        try:
+            if event.parameters:
+                cursor.execute(EXPLAIN_PREFIXES[self.explain] + event.statement, event.parameters)
+            else:
+                cursor.execute(EXPLAIN_PREFIXES[self.explain] + event.statement)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        finally:
+            cursor.close()
+
+        with self._lock:
+            self._plans[fp] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return plan
+
+    def __call__(self, event, connection=None):
+        elapsed = event.total_time
+        if elapsed < self.threshold:
+            return
+
+        if (
+            self.explain
+            and event.error is None
+            and not event.executemany
+            and connection is not None
+            and not connection.closed
+            and _explainable_re.match(event.statement)
+        ):
+            try:
+                event.plan = self.plan_for(event, connection)
+            except Exception as err:
+                util.warn("Could not capture plan for slow query: %s" % (err,))
+
+        parameters = self._redacted(event.parameters)
+        self.recent.append((event.fingerprint, parameters, elapsed, event.plan))
+        log.warning(
+            "Slow query (%.3fs): %s; parameters: %r%s",
+            elapsed,
+            event.fingerprint,
+            parameters,
+            "\n" + event.plan if event.plan else "",
+            extra={
+                "kinetica_fingerprint": event.fingerprint,
+                "kinetica_elapsed": elapsed,
+                "kinetica_plan": event.plan,
+            },
+        )
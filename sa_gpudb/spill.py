@@ -0,0 +1,206 @@
+# sa_gpudb/spill.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Fully buffered results that spill to disk.
+
+With the ``spill_threshold`` execution option (bytes), a result is read to
+the end when the statement executes, releasing the cursor and, for
+connectionless execution, the connection.  Rows are kept in memory up to
+about ``spill_threshold`` bytes; the rest go to an unlinked temporary file
+in ``spill_dir`` (the system default if not given), memory-mapped to read
+them back::
+
+    result = engine.execution_options(spill_threshold=64 * 1024 ** 2).execute(stmt)
+    for row in result:              # fetch*() and iteration work as usual
+        ...
+    rows = result.rows              # re-iterable, indexable, sliceable
+    rows[-1], len(rows), rows[1000:1010]
+
+Spilled rows are stored as pickled tuples one after another, found through
+an array of file offsets, so a spilled result costs 8 bytes of Python memory
+per row plus the rows being looked at.  The file is removed when the result
+is closed or garbage collected.  The same buffering is used for
+``INSERT ... OUTPUT`` results when the option is set.
+
+Sizes are estimates from the length of strings and bytes and 8 bytes for
+other values; ``fetchall()`` still builds every row in memory, use
+iteration or :attr:`.SpillBufferedResultProxy.rows` instead.
+
+"""
+
+import array
+import mmap
+import pickle
+import tempfile
+from collections.abc import Sequence
+
+from sqlalchemy.engine import ResultProxy
+
+from .instrumentation import _approx_size
+
+_BATCH_SIZE = 1000
+
+
+class SpillBuffer(Sequence):
+    """Append-only sequence of row tuples kept in memory up to
+    ``threshold`` bytes and in a memory-mapped file beyond."""
+
+    def __init__(self, threshold, directory=None):
+        self.threshold = threshold
+        self.directory = directory
+        self._memory = []
+        self._size = 0
+        self._file = None
+        self._offsets = array.array("Q")
+        self._map = None
+
+    def append(self, row):
+        row = tuple(row)
+        if self._file is None:
+            self._size += _approx_size(row) + 56 + 8 * len(row)
+            if self._size <= self.threshold:
+                self._memory.append(row)
+                return
+            self._file = tempfile.TemporaryFile(prefix="kinetica-spill-", dir=self.directory)
+        self._offsets.append(self._file.tell())
+        self._file.write(pickle.dumps(row, pickle.HIGHEST_PROTOCOL))
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def finish(self):
+        """Stop appending and map the spilled rows for reading."""
+
+        if self._file is not None and self._map is None:
+            self._file.flush()
+            self._offsets.append(self._file.tell())
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def spilled(self):
+        """Number of rows stored on disk."""
+
+        return max(0, len(self._offsets) - 1) if self._map is not None else len(self._offsets)
+
+    def __len__(self):
+        return len(self._memory) + self.spilled
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("row index out of range")
+        if index < len(self._memory):
+            return self._memory[index]
+        index -= len(self._memory)
+        return pickle.loads(self._map[self._offsets[index] : self._offsets[index + 1]])
+
+    def __iter__(self):
+        for row in self._memory:
+            yield row
+        for index in range(self.spilled):
+            yield pickle.loads(self._map[self._offsets[index] : self._offsets[index + 1]])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = []
+        self._offsets = array.array("Q")
+
+
+class _Rows(Sequence):
+    """Processed rows of a :class:`.SpillBufferedResultProxy`."""
+
+    def __init__(self, result):
+        self._result = result
+
+    def __len__(self):
+        return len(self._result._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._result.process_rows(self._result._buffer[index])
+        return self._result.process_rows([self._result._buffer[index]])[0]
+
+    def __iter__(self):
+        process_rows = self._result.process_rows
+        for row in self._result._buffer:
+            yield process_rows([row])[0]
+
+
+class SpillBufferedResultProxy(ResultProxy):
+    """A result proxy reading every row up front into a
+    :class:`.SpillBuffer`."""
+
+    _buffer = None
+    _position = 0
+
+    def _init_metadata(self):
+        super(SpillBufferedResultProxy, self)._init_metadata()
+        if self._metadata is None:
+            return
+        options = self.context.execution_options
+        self._buffer = SpillBuffer(int(options["spill_threshold"]), options.get("spill_dir"))
+        try:
+            while True:
+                rows = self._fetch_batch()
+                if not rows:
+                    break
+                self._buffer.extend(rows)
+            self._buffer.finish()
+        except BaseException:
+            self._buffer.close()
+            raise
+        # the rows are all here: give the cursor (and connection) back
+        self._soft_close()
+
+    def _fetch_batch(self):
+        return self.cursor.fetchmany(_BATCH_SIZE)
+
+    @property
+    def rows(self):
+        """The rows as a read-only sequence, independent of the fetch
+        position."""
+
+        if self._buffer is None:
+            return self._non_result(None)
+        return _Rows(self)
+
+    def _fetchone_impl(self):
+        if self.closed or self._buffer is None:
+            return self._non_result(None)
+        if self._position >= len(self._buffer):
+            return None
+        self._position += 1
+        return self._buffer[self._position - 1]
+
+    def _fetchmany_impl(self, size=None):
+        if size is None:
+            # a DBAPI cursor's default arraysize
+            size = 1
+        if self.closed or self._buffer is None:
+            return self._non_result([])
+        start = self._position
+        self._position = min(len(self._buffer), start + size)
+        return self._buffer[start : self._position]
+
+    def _fetchall_impl(self):
+        if self.closed or self._buffer is None:
+            return self._non_result([])
+        start, self._position = self._position, len(self._buffer)
+        return self._buffer[start:]
+
+    def close(self):
+        super(SpillBufferedResultProxy, self).close()
+        if self._buffer is not None:
+            self._buffer.close()
@@ -0,0 +1,234 @@
+# sa_gpudb/staging.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Scratch tables for staging intermediate results, and set-based bulk
+mutations built on them.
+
+:func:`.temp_table` creates a uniquely named Kinetica table, optionally
+fills it, yields it as a :class:`~sqlalchemy.schema.Table` and drops it on
+exit::
+
+    from sa_gpudb.staging import temp_table
+
+    with temp_table(engine, [Column("id", BigInteger)], rows=[{"id": i} for i in ids]) as keys:
+        stmt = select([orders]).where(orders.c.id.in_(select([keys.c.id])))
+        rows = engine.execute(stmt).fetchall()
+
+Tables are created as ``TEMP`` (memory-only) unless ``persist=True``, and
+with a ``TTL`` in minutes, so that a job which dies before its ``with``
+block exits still has its scratch tables expire on the cluster.  Kinetica
+tables are not tied to a session: the staged table is visible from every
+pooled connection, and the generated name keeps concurrent jobs apart.
+
+:func:`.bulk_update` and :func:`.bulk_delete` stage changed rows or keys in
+such a table and apply them with a single ``UPDATE ... FROM`` or
+``DELETE ... WHERE key IN (SELECT ...)``, instead of one statement per row
+as ``Session.bulk_update_mappings()`` does::
+
+    bulk_update(session.connection(), Order.__table__, [{"id": 1, "status": "void"}, ...])
+
+"""
+
+import contextlib
+import uuid
+
+from sqlalchemy import MetaData, Table, exc, sql, util
+from sqlalchemy.engine import Connection
+
+from .hints import with_kinetica_hints
+
+
+DEFAULT_TTL = 20
+
+
+def _columns(columns):
+    if isinstance(columns, Table):
+        columns = columns.columns
+    # staged rows carry their own keys: no IDENTITY columns
+    copies = [c.copy() for c in columns]
+    for c in copies:
+        c.autoincrement = False
+    return copies
+
+
+def fill(bind, table, rows=None, select=None, batch_size=10000):
+    """Insert ``rows`` (mappings or tuples in column order) in
+    ``executemany`` batches of ``batch_size``, or the result of ``select``
+    with a single server-side ``INSERT ... SELECT``."""
+
+    if select is not None:
+        names = [c.name for c in table.columns][: len(select.columns)]
+        bind.execute(table.insert().from_select(names, select))
+    if rows is None:
+        return
+
+    keys = [c.key for c in table.columns]
+    insert = table.insert()
+    batch = []
+    for row in rows:
+        batch.append(row if isinstance(row, dict) else dict(zip(keys, row)))
+        if len(batch) >= batch_size:
+            bind.execute(insert, batch)
+            batch = []
+    if batch:
+        bind.execute(insert, batch)
+
+
+@contextlib.contextmanager
+def temp_table(
+    bind,
+    columns,
+    rows=None,
+    select=None,
+    ttl=DEFAULT_TTL,
+    persist=False,
+    schema=None,
+    name=None,
+    keep=False,
+    batch_size=10000,
+):
+    """Create a scratch table and drop it when the block exits.
+
+    :param bind: an :class:`~sqlalchemy.engine.Engine` or
+     :class:`~sqlalchemy.engine.Connection`.
+    :param columns: :class:`~sqlalchemy.schema.Column` objects, or a
+     :class:`~sqlalchemy.schema.Table` whose columns are copied.
+    :param rows: rows to insert, see :func:`.fill`.
+    :param select: a select whose rows are inserted server-side.
+    :param ttl: minutes of inactivity after which Kinetica drops the table;
+     ``None`` for no TTL.
+    :param persist: create a persisted table instead of a ``TEMP`` one.
+    :param schema: schema of the table; the connection's default if
+     ``None``.
+    :param name: table name; a unique ``sa_staging_<hex>`` name by default.
+    :param keep: leave the table for its TTL to expire instead of dropping
+     it on exit.
+    :param batch_size: rows per ``executemany`` batch.
+
+    """
+    if keep and ttl is None:
+        raise exc.ArgumentError("keep=True needs a ttl for the table to expire")
+    name = name or "sa_staging_%s" % uuid.uuid4().hex[:16]
+    prefixes = [] if persist else ["TEMP"]
+    table = Table(
+        name,
+        MetaData(),
+        *_columns(columns),
+        schema=schema,
+        prefixes=prefixes,
+        kinetica_ttl=ttl,
+    )
+
+    table.create(bind, checkfirst=False)
+    try:
+        fill(bind, table, rows, select, batch_size)
+        yield table
+    finally:
+        if not keep:
+            _drop(bind, table)
+
+
+def _drop(bind, table):
+    if isinstance(bind, Connection) and (bind.closed or bind.invalidated):
+        bind = bind.engine
+    try:
+        table.drop(bind, checkfirst=False)
+    except Exception as err:
+        # the TTL still expires the table
+        util.warn("Could not drop staging table %s: %s" % (table.fullname, err))
+
+
+def _key_columns(table, key):
+    if key is None:
+        columns = list(table.primary_key.columns)
+        if not columns:
+            raise exc.ArgumentError("%s has no primary key; pass key" % table.fullname)
+        return columns
+    columns = []
+    for k in util.to_list(key):
+        if isinstance(k, util.string_types):
+            if k not in table.c:
+                raise exc.ArgumentError("%s has no column %r" % (table.fullname, k))
+            k = table.c[k]
+        columns.append(k)
+    return columns
+
+
+def _matches(table, staged, keys):
+    return sql.and_(*[c == staged.c[c.name] for c in keys])
+
+
+def bulk_update(bind, table, rows, key=None, upsert=False, batch_size=10000, ttl=DEFAULT_TTL):
+    """Apply ``rows`` (mappings of column key to new value, including the
+    key columns) to ``table`` with one set-based statement.
+
+    The rows are staged in a :func:`.temp_table`, then applied with
+    ``UPDATE table SET ... FROM staged WHERE <keys match>``.  With
+    ``upsert=True`` the rows must hold every column and are applied with
+    ``INSERT /* KI_HINT_UPDATE_ON_EXISTING_PK */ INTO table SELECT ...
+    FROM staged`` instead, which also inserts rows whose key is new.
+
+    :param key: key column(s) or names; the primary key by default.
+    :return: the number of rows updated, as reported by the server.
+
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    keys = _key_columns(table, key)
+    columns = _key_columns(table, list(rows[0]))
+    staged_columns = keys + [c for c in columns if c not in keys]
+    values = [c for c in staged_columns if c not in keys]
+    if not values and not upsert:
+        raise exc.ArgumentError("bulk_update() rows have no columns besides the key")
+
+    with temp_table(bind, staged_columns, rows=rows, ttl=ttl, batch_size=batch_size) as staged:
+        if upsert:
+            names = [c.name for c in staged_columns]
+            stmt = with_kinetica_hints(
+                table.insert().from_select(names, sql.select([staged.c[n] for n in names])),
+                "KI_HINT_UPDATE_ON_EXISTING_PK",
+            )
+        else:
+            stmt = (
+                table.update()
+                .values({c.key: staged.c[c.name] for c in values})
+                .where(_matches(table, staged, keys))
+            )
+        return bind.execute(stmt).rowcount
+
+
+def bulk_delete(bind, table, keys, key=None, batch_size=10000, ttl=DEFAULT_TTL):
+    """Delete the rows of ``table`` whose key is in ``keys`` with one
+    set-based statement.
+
+    ``keys`` are key values (tuples for composite keys) or mappings.  They
+    are staged in a :func:`.temp_table` and deleted with ``DELETE FROM
+    table WHERE key IN (SELECT key FROM staged)``, or a correlated
+    ``EXISTS`` for composite keys.
+
+    :return: the number of rows deleted, as reported by the server.
+
+    """
+    key_columns = _key_columns(table, key)
+    names = [c.key for c in key_columns]
+    rows = []
+    for value in keys:
+        if isinstance(value, dict):
+            rows.append({n: value[n] for n in names})
+        elif len(key_columns) == 1:
+            rows.append({names[0]: value})
+        else:
+            rows.append(dict(zip(names, value)))
+    if not rows:
+        return 0
+
+    with temp_table(bind, key_columns, rows=rows, ttl=ttl, batch_size=batch_size) as staged:
+        if len(key_columns) == 1:
+            column = key_columns[0]
+            criterion = column.in_(sql.select([staged.c[column.name]]))
+        else:
+            criterion = sql.exists().where(_matches(table, staged, key_columns))
+        return bind.execute(table.delete().where(criterion)).rowcount
@@ -0,0 +1,67 @@
+# sa_gpudb/superset.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Apache Superset engine spec for Kinetica.
+
+Registered through the ``superset.db_engine_specs`` entry point, so Superset
+picks it up when both packages are installed.  Time grains map to Kinetica's
+native ``DATE_TRUNC`` and ``TIME_BUCKET`` functions, the same SQL the dialect
+compiles ``func.date_trunc()`` and ``func.time_bucket()`` to, instead of
+generic ``DATEPART`` arithmetic.
+
+"""
+
+try:
+    from superset.db_engine_specs.base import BaseEngineSpec
+except ImportError:  # superset is optional; the mapping stays importable
+    BaseEngineSpec = object
+
+
+TIME_GRAIN_EXPRESSIONS = {
+    None: "{col}",
+    "PT1S": "DATE_TRUNC(SECOND, {col})",
+    "PT1M": "DATE_TRUNC(MINUTE, {col})",
+    "PT5M": "TIME_BUCKET(300000, {col})",
+    "PT10M": "TIME_BUCKET(600000, {col})",
+    "PT15M": "TIME_BUCKET(900000, {col})",
+    "PT30M": "TIME_BUCKET(1800000, {col})",
+    "PT1H": "DATE_TRUNC(HOUR, {col})",
+    "P1D": "DATE_TRUNC(DAY, {col})",
+    "P1W": "DATE_TRUNC(WEEK, {col})",
+    "P1M": "DATE_TRUNC(MONTH, {col})",
+    "P3M": "DATE_TRUNC(QUARTER, {col})",
+    "P1Y": "DATE_TRUNC(YEAR, {col})",
+}
+
+
+def convert_dttm(target_type, dttm):
+    """Return a Kinetica literal for ``dttm`` as ``target_type``, or ``None``."""
+
+    target_type = target_type.upper()
+    if target_type == "DATE":
+        return "DATE('%s')" % dttm.date().isoformat()
+    elif target_type in ("DATETIME", "TIMESTAMP", "TYPE_TIMESTAMP"):
+        return "DATETIME('%s')" % dttm.isoformat(sep=" ", timespec="milliseconds")
+    return None
+
+
+class KineticaEngineSpec(BaseEngineSpec):
+    engine = "kinetica"
+    engine_aliases = {"sa_gpudb"}
+    engine_name = "Kinetica"
+
+    _time_grain_expressions = TIME_GRAIN_EXPRESSIONS
+
+    @classmethod
+    def epoch_to_dttm(cls):
+        return "TIMESTAMPADD(SECOND, {col}, DATETIME('1970-01-01 00:00:00'))"
+
+    @classmethod
+    def epoch_ms_to_dttm(cls):
+        return "TIMESTAMPADD(MILLISECOND, {col}, DATETIME('1970-01-01 00:00:00'))"
+
+    @classmethod
+    def convert_dttm(cls, target_type, dttm, *args, **kwargs):
+        return convert_dttm(target_type, dttm)
@@ -0,0 +1,7 @@
+# sa_gpudb/testing/__init__.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""In-process stand-ins for exercising the dialect without a Kinetica
+cluster, used by the test and benchmark suites."""
@@ -0,0 +1,490 @@
+# sa_gpudb/testing/fake_odbc.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""A pyodbc-compatible stand-in for the Kinetica ODBC driver.
+
+The module exposes the subset of the pyodbc API used by the dialect
+(``connect()``, cursors with ``execute``/``executemany``/``fetch*``, the
+``tables()`` and ``columns()`` catalog functions and the DBAPI exception
+hierarchy), backed by an in-memory :class:`.Server`::
+
+    from sa_gpudb.testing import fake_odbc
+
+    server = fake_odbc.Server()
+    server.add_table("ki_home", "orders", [("id", "INTEGER"), ("placed", "DATE")])
+    server.insert("ki_home", "orders", [(1, datetime.datetime(2020, 1, 1))])
+
+    engine = create_engine(
+        "sa_gpudb://KINETICA", module=fake_odbc, connect_args={"server": server}
+    )
+
+There is no SQL engine behind it.  ``CREATE TABLE`` and ``DROP TABLE`` update
+the catalog, ``INSERT INTO <table>`` statements append their parameters to
+the table, ``SELECT ... FROM <table>`` returns every column of the table, and
+anything else returns no rows.  Tests register
+their own responders with :meth:`.Server.respond` for other statements.
+
+"""
+
+import collections
+import datetime
+import decimal
+import re
+import threading
+
+version = "4.0.30"
+apilevel = "2.0"
+threadsafety = 1
+paramstyle = "qmark"
+
+SQL_DBMS_NAME = 17
+SQL_DBMS_VER = 18
+
+
+class Warning(Exception):
+    pass
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+Binary = bytes
+
+
+class _BinaryNull(object):
+    # pyodbc's typed NULL for binary parameters; stored as None
+    def __repr__(self):
+        return "BinaryNull"
+
+
+BinaryNull = _BinaryNull()
+
+# ODBC type name -> Python type reported in cursor.description
+_python_types = {
+    "BYTES": bytes,
+    "DOUBLE": float,
+    "FLOAT": float,
+    "REAL": float,
+    "DECIMAL": decimal.Decimal,
+    "NUMERIC": decimal.Decimal,
+    "INTEGER": int,
+    "BIGINT": int,
+    "SMALLINT": int,
+    "TINYINT": int,
+    "LONG": int,
+    "TIMESTAMP": datetime.datetime,
+    "TYPE_TIMESTAMP": datetime.datetime,
+    "DATETIME": datetime.datetime,
+    "DATE": datetime.date,
+    "TYPE_DATE": datetime.date,
+    "TYPE_TIME": datetime.time,
+}
+
+_TableRow = collections.namedtuple("Row", "table_cat table_schem table_name table_type remarks")
+_ColumnRow = collections.namedtuple(
+    "Row",
+    "table_cat table_schem table_name column_name data_type type_name column_size "
+    "buffer_length decimal_digits num_prec_radix nullable remarks column_def "
+    "sql_data_type sql_datetime_sub char_octet_length ordinal_position is_nullable",
+)
+
+
+class Column(object):
+    def __init__(self, name, type_name, column_size=None, nullable=True):
+        self.name = name
+        self.type_name = type_name
+        self.column_size = column_size
+        self.nullable = nullable
+
+    @property
+    def description(self):
+        type_code = _python_types.get(self.type_name.split("(")[0], str)
+        return (self.name, type_code, None, self.column_size, None, None, self.nullable)
+
+
+class Table(object):
+    def __init__(self, schema, name, columns, table_type="TABLE"):
+        self.schema = schema
+        self.name = name
+        self.columns = columns
+        self.table_type = table_type
+        self.rows = []
+
+    @property
+    def description(self):
+        return [column.description for column in self.columns]
+
+
+class Result(object):
+    """Rows, column description and rowcount returned for a statement."""
+
+    def __init__(self, rows=(), description=None, rowcount=-1):
+        self.rows = rows
+        self.description = description
+        self.rowcount = rowcount
+
+    @classmethod
+    def from_columns(cls, names, rows):
+        return cls(rows, [(name, str, None, None, None, None, True) for name in names])
+
+
+_insert_re = re.compile(r"^\s*INSERT\s+INTO\s+([\w.\"]+)\s*(?:\(([^)]*)\))?", re.I)
+_select_re = re.compile(r"^\s*SELECT\b.*?\bFROM\s+([\w.\"]+)", re.I | re.S)
+_create_re = re.compile(
+    r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:REPLICATED\s+)?(?:TEMP\s+)?TABLE\s+([\w.\"]+)\s*\((.*)\)", re.I | re.S
+)
+_drop_re = re.compile(r"^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?([\w.\"]+)", re.I)
+_constraint_re = re.compile(r"^\s*(?:PRIMARY|CONSTRAINT|UNIQUE|FOREIGN|CHECK|SHARD)\b", re.I)
+
+
+def _split_columns(body):
+    # split a CREATE TABLE body on the commas outside parentheses
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(body):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip() and not _constraint_re.match(p)]
+
+
+def _like(pattern, name):
+    # ODBC catalog arguments are search patterns: "_" and "%" are wildcards
+    if pattern is None:
+        return True
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.match(regex + "$", name, re.I) is not None
+
+
+def _split_name(qualified_name, default_schema="ki_home"):
+    parts = qualified_name.replace('"', "").split(".")
+    return (parts[-2] if len(parts) > 1 else default_schema), parts[-1]
+
+
+class Server(object):
+    """In-memory catalog and statement responder shared by connections."""
+
+    def __init__(self):
+        self.tables = collections.OrderedDict()
+        self.responders = []
+        self.log = collections.deque(maxlen=1000)
+        self.statement_count = 0
+        self.catalog_calls = 0
+        self.fetch_calls = 0
+        self.cancels = 0
+        self.connections = 0
+        # a down server refuses connections and fails statements on open ones
+        self.down = False
+        self._lock = threading.Lock()
+
+    def add_table(self, schema, name, columns, table_type="TABLE"):
+        """Add a table; ``columns`` are ``(name, ODBC type name[, size[,
+        nullable]])`` tuples or :class:`.Column` objects."""
+
+        columns = [c if isinstance(c, Column) else Column(*c) for c in columns]
+        table = self.tables[(schema, name)] = Table(schema, name, columns, table_type)
+        return table
+
+    def drop_table(self, schema, name):
+        del self.tables[(schema, name)]
+
+    def insert(self, schema, name, rows):
+        self.tables[(schema, name)].rows.extend(tuple(row) for row in rows)
+
+    def respond(self, pattern, result):
+        """Answer statements matching regular expression ``pattern`` with
+        ``result``: a :class:`.Result`, a callable receiving ``(statement,
+        parameters)`` and returning one, or an exception instance to raise.
+
+        Responders registered later take precedence.
+        """
+
+        self.responders.insert(0, (re.compile(pattern, re.I | re.S), result))
+
+    def find_table(self, qualified_name):
+        parts = qualified_name.replace('"', "").split(".")
+        if len(parts) == 1:
+            for (schema, name), table in self.tables.items():
+                if name == parts[0]:
+                    return table
+            return None
+        return self.tables.get((parts[-2], parts[-1]))
+
+    def execute(self, statement, parameters, many=False):
+        with self._lock:
+            self.statement_count += 1
+            self.log.append((statement, parameters))
+
+        for pattern, result in self.responders:
+            if pattern.search(statement):
+                if isinstance(result, Exception):
+                    raise result
+                if callable(result):
+                    result = result(statement, parameters)
+                return result
+
+        match = _create_re.match(statement)
+        if match:
+            schema, name = _split_name(match.group(1))
+            if (schema, name) in self.tables:
+                raise ProgrammingError("Table %s already exists" % match.group(1))
+            columns = []
+            for definition in _split_columns(match.group(2)):
+                column_name, type_name = definition.replace('"', "").split(None, 2)[:2]
+                columns.append(Column(column_name, type_name.upper(), nullable="NOT NULL" not in definition.upper()))
+            self.add_table(schema, name, columns)
+            return Result()
+
+        match = _drop_re.match(statement)
+        if match:
+            table = self.find_table(match.group(1))
+            if table is None:
+                if "EXISTS" in statement.upper():
+                    return Result()
+                raise ProgrammingError("Table %s does not exist" % match.group(1))
+            self.drop_table(table.schema, table.name)
+            return Result()
+
+        match = _insert_re.match(statement)
+        if match:
+            table = self.find_table(match.group(1))
+            if table is None:
+                raise ProgrammingError("Table %s does not exist" % match.group(1))
+            sets = parameters if many else [parameters]
+            if match.group(2):
+                # multi-VALUES inserts flatten every row into one parameter list
+                width = match.group(2).count(",") + 1
+                rows = [p[i : i + width] for p in sets for i in range(0, len(p), width)]
+            else:
+                rows = sets
+            table.rows.extend(tuple(None if v is BinaryNull else v for v in row) for row in rows)
+            return Result(rowcount=len(rows))
+
+        match = _select_re.match(statement)
+        if match:
+            table = self.find_table(match.group(1))
+            if table is None:
+                raise ProgrammingError("Table %s does not exist" % match.group(1))
+            return Result(table.rows, table.description)
+
+        return Result()
+
+
+class Cursor(object):
+    arraysize = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+        self._pos = 0
+
+    def _check_open(self):
+        if self.connection is None or self.connection.closed:
+            raise ProgrammingError("Attempt to use a closed connection.")
+        if self.connection.server.down:
+            raise OperationalError("08S01", "[Kinetica][ODBC] Communication link failure")
+
+    def _set_result(self, result):
+        self.description = result.description
+        self.rowcount = result.rowcount
+        self._rows = result.rows
+        self._pos = 0
+
+    def execute(self, statement, *parameters):
+        self._check_open()
+        if len(parameters) == 1 and isinstance(parameters[0], (list, tuple)):
+            parameters = parameters[0]
+        self._set_result(self.connection.server.execute(statement, tuple(parameters)))
+        return self
+
+    def executemany(self, statement, seq_of_parameters):
+        self._check_open()
+        seq_of_parameters = [tuple(p) for p in seq_of_parameters]
+        result = self.connection.server.execute(statement, seq_of_parameters, many=True)
+        self._set_result(result)
+        self.description = None
+
+    def fetchone(self):
+        if self._pos < len(self._rows):
+            row = self._rows[self._pos]
+            self._pos += 1
+            return row
+        return None
+
+    def fetchmany(self, size=None):
+        self.connection.server.fetch_calls += 1
+        start = self._pos
+        self._pos = min(len(self._rows), start + (size or self.arraysize))
+        return list(self._rows[start : self._pos])
+
+    def fetchall(self):
+        start, self._pos = self._pos, len(self._rows)
+        return list(self._rows[start:])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def nextset(self):
+        return False
+
+    def cancel(self):
+        self.connection.server.cancels += 1
+
+    def close(self):
+        self._rows = []
+        self.description = None
+
+    def tables(self, table=None, catalog=None, schema=None, tableType=None):
+        self._check_open()
+        self.connection.server.catalog_calls += 1
+        rows = [
+            _TableRow(None, t.schema, t.name, t.table_type, None)
+            for t in self.connection.server.tables.values()
+            if _like(table, t.name) and _like(schema, t.schema)
+        ]
+        self._set_result(Result(rows, [(f, str, None, None, None, None, True) for f in _TableRow._fields]))
+        return self
+
+    def columns(self, table=None, catalog=None, schema=None, column=None):
+        self._check_open()
+        server = self.connection.server
+        if table is not None and "." in table and schema is None:
+            tables = [server.find_table(table)]
+        else:
+            tables = [
+                t
+                for t in server.tables.values()
+                if (table is None or t.name == table) and (schema is None or t.schema == schema)
+            ]
+        rows = []
+        for t in tables:
+            if t is None:
+                continue
+            for position, c in enumerate(t.columns, 1):
+                if column is not None and c.name != column:
+                    continue
+                rows.append(
+                    _ColumnRow(
+                        None,
+                        t.schema,
+                        t.name,
+                        c.name,
+                        None,
+                        c.type_name,
+                        c.column_size,
+                        None,
+                        None,
+                        None,
+                        1 if c.nullable else 0,
+                        None,
+                        None,
+                        None,
+                        None,
+                        None,
+                        position,
+                        "YES" if c.nullable else "NO",
+                    )
+                )
+        self._set_result(Result(rows, [(f, str, None, None, None, None, True) for f in _ColumnRow._fields]))
+        return self
+
+
+class Connection(object):
+    def __init__(self, server, autocommit=False, **kw):
+        self.server = server
+        self.autocommit = autocommit
+        self.closed = False
+        self.timeout = 0
+        self.attributes = kw
+
+    def cursor(self):
+        if self.closed:
+            raise ProgrammingError("Attempt to use a closed connection.")
+        return Cursor(self)
+
+    def getinfo(self, info_type):
+        if info_type == SQL_DBMS_NAME:
+            return "Kinetica"
+        elif info_type == SQL_DBMS_VER:
+            return "7.1.0.0"
+        return None
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+default_server = Server()
+
+
+_url_re = re.compile(r"(?:^|;)\s*URL=([^;]*)", re.I)
+
+
+def connect(connection_string="", server=None, servers=None, autocommit=False, ansi=False, unicode_results=False, **kw):
+    """Connect to ``server``, or to the entry of ``servers`` (a mapping of
+    URL to :class:`.Server`) named by the last ``URL=`` of the connection
+    string."""
+
+    if servers is not None:
+        urls = _url_re.findall(connection_string)
+        if not urls or urls[-1] not in servers:
+            raise OperationalError("08001", "[Kinetica][ODBC] Unknown host %s" % (urls[-1:] or [""])[0])
+        server = servers[urls[-1]]
+    server = server if server is not None else default_server
+    if server.down:
+        raise OperationalError("08001", "[Kinetica][ODBC] Unable to connect")
+    with server._lock:
+        server.connections += 1
+    return Connection(server, autocommit=autocommit, connection_string=connection_string, **kw)
@@ -0,0 +1,137 @@
+# sa_gpudb/vector.py
+#
+# This module is part of sqlalchemy-gpudb and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Kinetica ``VECTOR(n)`` type.
+
+Vectors are bound as one packed little-endian float32 buffer instead of a
+list of Python floats.  NumPy arrays are packed with a single
+``tobytes()`` call, other sequences through :mod:`array`; results are
+returned as read-only float32 NumPy arrays viewing the fetched buffer
+(``numpy.frombuffer``), or as ``array.array("f")`` when NumPy is not
+installed.
+
+Distance functions are available as column methods, for nearest-neighbour
+queries::
+
+    query = numpy.asarray(embedding, dtype=numpy.float32)
+    stmt = select([docs.c.id]).order_by(docs.c.embedding.cosine_distance(query)).limit(10)
+
+"""
+
+import array
+import re
+import sys
+
+from sqlalchemy import exc
+from sqlalchemy import types as sqltypes
+from sqlalchemy.sql import expression, func
+
+
+_vector_type_re = re.compile(r"VECTOR\s*\(\s*(\d+)\s*\)", re.I)
+_little_endian = sys.byteorder == "little"
+
+
+def _numpy():
+    # imported on first use only; numpy is optional and slow to import
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _pack(values):
+    if hasattr(values, "astype"):
+        return values.astype("<f4", copy=False).tobytes()
+    packed = array.array("f", values)
+    if not _little_endian:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_array(buffer):
+    values = array.array("f")
+    values.frombytes(buffer)
+    if not _little_endian:
+        values.byteswap()
+    return values
+
+
+def _literal(values):
+    """Kinetica's textual vector literal, used for query vectors."""
+
+    return "[%s]" % ",".join(repr(float(v)) for v in values)
+
+
+def vector_dimension(type_name):
+    """Return ``n`` for a ``VECTOR(n)`` type name, or ``None``."""
+
+    match = _vector_type_re.search(type_name)
+    return int(match.group(1)) if match else None
+
+
+class VECTOR(sqltypes.TypeEngine):
+    """Kinetica ``VECTOR(dim)`` column type of float32 components."""
+
+    __visit_name__ = "VECTOR"
+
+    def __init__(self, dim=None):
+        self.dim = dim
+
+    @property
+    def python_type(self):
+        numpy = _numpy()
+        return numpy.ndarray if numpy is not None else array.array
+
+    def bind_processor(self, dialect):
+        dim = self.dim
+
+        def process(value):
+            if value is None or isinstance(value, bytes):
+                return value
+            if dim is not None and len(value) != dim:
+                raise ValueError("expected %d dimensions, got %d" % (dim, len(value)))
+            return _pack(value)
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        numpy = _numpy()
+        if numpy is not None:
+
+            def _unpack(buffer):
+                return numpy.frombuffer(buffer, dtype="<f4")
+
+        else:
+            _unpack = _unpack_array
+
+        def process(value):
+            if value is None:
+                return None
+            elif isinstance(value, str):
+                return _unpack(_pack([float(v) for v in value.strip("[] ").split(",") if v.strip()]))
+            return _unpack(value)
+
+        return process
+
+    class comparator_factory(sqltypes.TypeEngine.Comparator):
+        def _distance(self, name, other):
+            if not hasattr(other, "__clause_element__") and not isinstance(other, expression.ClauseElement):
+                if self.type.dim is not None and len(other) != self.type.dim:
+                    raise exc.ArgumentError("expected %d dimensions, got %d" % (self.type.dim, len(other)))
+                other = expression.literal(_literal(other), sqltypes.String())
+            return getattr(func, name)(self.expr, other, type_=sqltypes.Float())
+
+        def l1_distance(self, other):
+            return self._distance("L1_DISTANCE", other)
+
+        def l2_distance(self, other):
+            return self._distance("L2_DISTANCE", other)
+
+        def cosine_distance(self, other):
+            return self._distance("COSINE_DISTANCE", other)
+
+        def dot_product(self, other):
+            return self._distance("DOT_PRODUCT", other)
@@ -35,7 +35,6 @@ setup(
         "License :: OSI Approved :: Apache Software License",
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3 :: Only",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -48,10 +47,23 @@ setup(
     extras_require={
         "dev": [
             "pytest",
+            "pytest-benchmark",
             "black",
         ]
     },
-    packages=find_packages(include=["sa_gpudb"]),
+    entry_points={
+        "sqlalchemy.dialects": [
+            "kinetica = sa_gpudb.pyodbc:dialect",
+            "kinetica.pyodbc = sa_gpudb.pyodbc:dialect",
+            "kinetica.gpudb = sa_gpudb.gpudb:dialect",
+            "sa_gpudb = sa_gpudb.pyodbc:dialect",
+        ],
+        "superset.db_engine_specs": [
+            "kinetica = sa_gpudb.superset:KineticaEngineSpec",
+        ],
+    },
+    packages=find_packages(include=["sa_gpudb", "sa_gpudb.*"]),
     include_package_data=True,
+    python_requires=">=3.7",
     install_requires=["SQLAlchemy", "pyodbc"],
 )
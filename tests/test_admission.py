@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from sa_gpudb.admission import AdmissionTimeout, Gate
+from sa_gpudb.testing import fake_odbc
+
+
+def _blocking(server, pattern, release):
+    state = {"running": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def respond(statement, params):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        release.wait(5)
+        with lock:
+            state["running"] -= 1
+        return fake_odbc.Result()
+
+    server.respond(pattern, respond)
+    return state
+
+
+def _run(engine, statements):
+    threads = [threading.Thread(target=engine.execute, args=(s,)) for s in statements]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def test_limit_queues_and_reports(fake_server, make_fake_engine):
+    engine = make_fake_engine(pool_size=10, max_concurrency=2)
+    release = threading.Event()
+    state = _blocking(fake_server, r"^SELECT slow", release)
+
+    threads = _run(engine, ["SELECT slow"] * 5)
+    deadline = time.time() + 5
+    while engine.dialect.limiter.stats()["total"]["queued"] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    stats = engine.dialect.limiter.stats()["total"]
+    assert (stats["in_flight"], stats["queued"]) == (2, 3)
+
+    release.set()
+    for t in threads:
+        t.join()
+    stats = engine.dialect.limiter.stats()["total"]
+    assert state["peak"] == 2
+    assert (stats["in_flight"], stats["queued"], stats["max_queue_depth"], stats["admitted"]) == (0, 0, 3, 5)
+
+
+def test_per_class_limits_and_timeout(fake_server, make_fake_engine):
+    engine = make_fake_engine(pool_size=10, max_concurrency_per_class={"write": 1}, admission_timeout=0.05)
+    release = threading.Event()
+    _blocking(fake_server, r"^INSERT", release)
+    fake_server.add_table("ki_home", "events", [("id", "INTEGER")])
+
+    threads = _run(engine, ["INSERT INTO events (id) VALUES (1)"])
+    while engine.dialect.limiter.stats()["write"]["in_flight"] < 1:
+        time.sleep(0.01)
+
+    # reads are not limited; a second write times out
+    assert engine.execute("SELECT id FROM events").fetchall() == []
+    with pytest.raises(AdmissionTimeout):
+        engine.execute("INSERT INTO events (id) VALUES (2)")
+
+    release.set()
+    for t in threads:
+        t.join()
+    assert engine.dialect.limiter.stats()["write"]["timeouts"] == 1
+    engine.execute("INSERT INTO events (id) VALUES (3)")
+
+
+def test_gate_is_first_come_first_served():
+    gate = Gate(1)
+    gate.acquire()
+    order = []
+
+    def wait(i):
+        gate.acquire()
+        order.append(i)
+        gate.release()
+
+    threads = []
+    for i in range(5):
+        threads.append(threading.Thread(target=wait, args=(i,)))
+        threads[-1].start()
+        while gate.stats()["queued"] < i + 1:
+            time.sleep(0.001)
+    gate.release()
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2, 3, 4]
@@ -1,9 +1,12 @@
 # See README.md
 import sa_gpudb
 
+import pytest
 import sqlalchemy
 from sqlalchemy import create_engine
 
+pytestmark = pytest.mark.live
+
 
 def test_execution():
     engine = create_engine("sa_gpudb://KINETICA", connect_args={"autocommit": True, "fast_executemany": False})
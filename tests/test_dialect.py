@@ -0,0 +1,91 @@
+import datetime
+
+import sqlalchemy as sa
+
+
+def _orders(fake_server):
+    fake_server.add_table(
+        "ki_home",
+        "orders",
+        [("id", "INTEGER", 4, False), ("name", "VARCHAR(32)", 32), ("placed", "DATE"), ("at", "TYPE_TIME")],
+    )
+    return sa.Table(
+        "orders",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer),
+        sa.Column("name", sa.String(32)),
+        sa.Column("placed", sa.Date),
+        sa.Column("at", sa.Time),
+        schema="ki_home",
+    )
+
+
+def test_reflection(fake_engine, fake_server):
+    _orders(fake_server)
+    fake_server.add_table("other", "events", [("ts", "TIMESTAMP")])
+
+    inspector = sa.inspect(fake_engine)
+    assert inspector.get_table_names() == ["ki_home.orders", "other.events"]
+    columns = inspector.get_columns("orders", schema="ki_home")
+    assert [c["name"] for c in columns] == ["id", "name", "placed", "at"]
+    assert [c["nullable"] for c in columns] == [False, True, True, True]
+    assert columns[1]["type"].length == 32
+    assert isinstance(columns[2]["type"], sa.DATE)
+
+
+def test_round_trip(fake_engine, fake_server):
+    orders = _orders(fake_server)
+    placed = datetime.date(2021, 3, 4)
+
+    fake_engine.execute(orders.insert(), [{"id": i, "name": "o%d" % i, "placed": placed} for i in range(3)])
+    assert fake_server.tables[("ki_home", "orders")].rows[0][2] == datetime.datetime(2021, 3, 4)
+
+    rows = fake_engine.execute(sa.select([orders])).fetchall()
+    assert [(r.id, r.placed) for r in rows] == [(0, placed), (1, placed), (2, placed)]
+
+
+def test_bind_processors(fake_engine, fake_server):
+    dialect = fake_engine.dialect
+    for type_ in (sa.Numeric(10, 2), sa.Float()):
+        assert type_._cached_bind_processor(dialect) is None, type_
+
+    # the ODBC driver gets typed binary NULLs and datetimes for dates and times
+    binary = sa.LargeBinary()._cached_bind_processor(dialect)
+    assert dialect.dbapi.BinaryNull is not None
+    assert binary(None) is dialect.dbapi.BinaryNull and binary(b"\x00") == b"\x00"
+    blobs = sa.Table("blobs", sa.MetaData(), sa.Column("data", sa.LargeBinary), schema="ki_home")
+    fake_server.add_table("ki_home", "blobs", [("data", "BYTES")])
+    fake_engine.execute(blobs.insert(), [{"data": None}, {"data": b"\x01"}])
+    assert fake_server.log[-1][1] == [(dialect.dbapi.BinaryNull,), (b"\x01",)]
+    assert fake_server.find_table("ki_home.blobs").rows == [(None,), (b"\x01",)]
+    assert sa.Date()._cached_bind_processor(dialect)(datetime.date(2021, 3, 4)) == datetime.datetime(2021, 3, 4)
+    assert sa.Time()._cached_bind_processor(dialect)(datetime.time(5, 6)) == datetime.datetime(1900, 1, 1, 5, 6)
+
+
+def test_has_table_is_schema_exact(fake_engine, fake_server):
+    fake_server.add_table("other", "orders", [("id", "INTEGER")])
+    fake_server.add_table("ki_home", "orders1", [("id", "INTEGER")])
+    with fake_engine.connect() as conn:
+        assert fake_engine.dialect.has_table(conn, "orders", schema="other")
+        assert not fake_engine.dialect.has_table(conn, "orders", schema="ki_home")
+        # "_" is an ODBC pattern wildcard, not a match for "1"
+        assert not fake_engine.dialect.has_table(conn, "orders_", schema="ki_home")
+
+
+def test_create_all_checks_each_schema_once(fake_engine, fake_server):
+    metadata = sa.MetaData()
+    for i in range(20):
+        sa.Table("t%d" % i, metadata, sa.Column("id", sa.Integer), schema="ki_home" if i % 2 else "other")
+    fake_server.add_table("ki_home", "t1", [("id", "INTEGER")])
+    fake_server.add_table("ki_home", "t2", [("id", "INTEGER")])
+
+    metadata.create_all(fake_engine)
+    assert fake_server.catalog_calls == 2
+    created = [s.split()[2] for s, _ in fake_server.log if s.lstrip().startswith("CREATE TABLE")]
+    assert len(created) == 19 and "ki_home.t1" not in created and "other.t2" in created
+
+    fake_server.catalog_calls = 0
+    with fake_engine.connect() as conn:
+        metadata.drop_all(conn)
+    assert fake_server.catalog_calls == 2
+    assert list(fake_server.tables) == [("ki_home", "t2")]
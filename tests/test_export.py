@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb import kinetica_export
+from sa_gpudb.export import export
+from sa_gpudb.testing import fake_odbc
+
+orders = sa.Table(
+    "orders",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer),
+    sa.Column("day", sa.Date),
+    schema="ki_home",
+)
+
+
+def _sql(fake_engine, stmt):
+    return str(stmt.compile(dialect=fake_engine.dialect))
+
+
+def test_export_query(fake_engine):
+    stmt = kinetica_export(
+        sa.select([orders.c.id]).where(orders.c.day == datetime.date(2024, 1, 2)),
+        "kifs://lake/orders/2024-01-02/",
+        compression="snappy",
+        single_file=False,
+        max_file_size=1024**3,
+        options={"kifs_permissions": "rw"},
+    )
+    assert _sql(fake_engine, stmt) == (
+        "EXPORT QUERY (SELECT ki_home.orders.id \nFROM ki_home.orders \nWHERE ki_home.orders.day = '2024-01-02')\n"
+        "INTO FILE PATH 'kifs://lake/orders/2024-01-02/'\n"
+        "FORMAT PARQUET\n"
+        "WITH OPTIONS (COMPRESSION_TYPE = 'snappy', SINGLE_FILE = 'false', SINGLE_FILE_MAX_SIZE = '1073741824', "
+        "KIFS_PERMISSIONS = 'rw')"
+    )
+
+
+def test_export_table(fake_engine):
+    stmt = kinetica_export(orders, "kifs://lake/orders.csv", format="csv", single_file="overwrite")
+    assert _sql(fake_engine, stmt) == (
+        "EXPORT TABLE ki_home.orders\nINTO FILE PATH 'kifs://lake/orders.csv'\n"
+        "FORMAT DELIMITED TEXT\nWITH OPTIONS (SINGLE_FILE = 'overwrite')"
+    )
+
+    for kw in ({"format": "orc"}, {"compression": "zstd"}, {"options": {"bad name": 1}}):
+        with pytest.raises(sa.exc.ArgumentError):
+            kinetica_export(orders, "kifs://lake/orders", **kw)
+
+
+def test_export_manifest(fake_engine, fake_server):
+    files = [("kifs://lake/orders/part-0.parquet", 600), ("kifs://lake/orders/part-1.parquet", 400)]
+    fake_server.respond(r"^EXPORT QUERY", fake_odbc.Result.from_columns(["file_name", "count"], files))
+    fake_server.respond(r"^EXPORT TABLE", fake_odbc.Result(rowcount=1000))
+
+    manifest = export(fake_engine, kinetica_export(sa.select([orders]), "kifs://lake/orders/", single_file=False))
+    assert manifest.files == [f for f, _ in files]
+    assert (manifest.path, manifest.format, manifest.rows) == ("kifs://lake/orders/", "parquet", 1000)
+
+    with fake_engine.connect() as conn:
+        manifest = export(conn, kinetica_export(orders, "kifs://lake/orders.parquet"))
+    assert (manifest.files, manifest.rows) == ([], 1000)
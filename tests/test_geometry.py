@@ -0,0 +1,47 @@
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.geometry import GEOMETRY, decode_wkb
+
+# WKB for POINT (1 2)
+POINT_WKB = bytes.fromhex("0101000000000000000000f03f0000000000000040")
+
+
+def _zones():
+    return sa.Table("zones", sa.MetaData(), sa.Column("id", sa.Integer), sa.Column("shape", GEOMETRY()), schema="geo")
+
+
+def test_compile_wkb_transfer_and_predicates(fake_engine):
+    zones = _zones()
+    stmt = (
+        sa.select([zones])
+        .where(zones.c.shape.intersects("POINT(1 2)"))
+        .where(zones.c.shape.dwithin(zones.c.shape, 5, 1))
+    )
+    sql = str(stmt.compile(dialect=fake_engine.dialect))
+    assert "ST_ASBINARY(" in sql and "AS shape" in sql
+    assert "ST_INTERSECTS(" in sql and "ST_GEOMFROMTEXT(" in sql and ") = 1" in sql
+    assert ", 1) = 1" in sql
+
+    insert = str(zones.insert().compile(dialect=fake_engine.dialect))
+    assert "ST_GEOMFROMWKB(" in insert
+
+
+def test_reflect_and_round_trip(fake_engine, fake_server):
+    fake_server.add_table("geo", "zones", [("id", "INTEGER"), ("shape", "GEOMETRY")])
+    columns = sa.inspect(fake_engine).get_columns("zones", schema="geo")
+    assert isinstance(columns[1]["type"], GEOMETRY)
+
+    zones = _zones()
+    fake_engine.execute(zones.insert(), [{"id": 1, "shape": bytearray(POINT_WKB)}, {"id": 2, "shape": None}])
+    assert fake_server.tables[("geo", "zones")].rows[0] == (1, POINT_WKB)
+
+    rows = fake_engine.execute(sa.select([zones])).fetchall()
+    assert [row.shape for row in rows] == [POINT_WKB, None]
+
+
+def test_decode_wkb():
+    shapely = pytest.importorskip("shapely")
+    decoded = decode_wkb(iter([POINT_WKB, None]))
+    assert decoded[0].equals(shapely.Point(1, 2))
+    assert decoded[1] is None
@@ -0,0 +1,80 @@
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.hints import KineticaHint, with_kinetica_hints
+
+
+orders = sa.Table("orders", sa.MetaData(), sa.Column("id", sa.Integer), sa.Column("total", sa.Float))
+
+
+def test_hint_validation():
+    assert str(KineticaHint.parse("KI_HINT_CHUNK_SIZE( 100 )")) == "KI_HINT_CHUNK_SIZE(100)"
+    assert str(KineticaHint("KI_HINT_INDEX", orders.c.id, "total")) == "KI_HINT_INDEX(id, total)"
+    assert KineticaHint.parse("KI_HINT_GROUP_BY_PK") == KineticaHint("KI_HINT_GROUP_BY_PK")
+
+    for bad in ("KI_HINT_NOPE", "KI_HINT_CHUNK_SIZE", "KI_HINT_CHUNK_SIZE(-1)", "KI_HINT_GROUP_BY_PK(1)"):
+        with pytest.raises(sa.exc.ArgumentError):
+            KineticaHint.parse(bad)
+    with pytest.raises(sa.exc.ArgumentError):
+        KineticaHint("KI_HINT_INDEX", "id */ DROP TABLE x")
+
+
+def test_hint_rendering(fake_engine):
+    def sql(stmt):
+        return str(stmt.compile(dialect=fake_engine.dialect))
+
+    hinted = with_kinetica_hints(sa.select([orders]).distinct(), "KI_HINT_GROUP_BY_PK")
+    hinted = with_kinetica_hints(hinted, KineticaHint("KI_HINT_CHUNK_SIZE", 1000))
+    assert sql(hinted).startswith("SELECT /* KI_HINT_GROUP_BY_PK KI_HINT_CHUNK_SIZE(1000) */ DISTINCT orders.id")
+
+    insert = orders.insert().execution_options(kinetica_hints=["KI_HINT_UPDATE_ON_EXISTING_PK"])
+    assert sql(insert).startswith("INSERT /* KI_HINT_UPDATE_ON_EXISTING_PK */ INTO orders")
+    assert sql(with_kinetica_hints(orders.update(), "KI_HINT_TRUNCATE_STRINGS")).startswith(
+        "UPDATE /* KI_HINT_TRUNCATE_STRINGS */ orders SET"
+    )
+    assert sql(with_kinetica_hints(orders.delete(), "KI_HINT_REPL_SYNC")).startswith(
+        "DELETE /* KI_HINT_REPL_SYNC */ FROM orders"
+    )
+
+    with pytest.raises(sa.exc.CompileError):
+        sql(with_kinetica_hints(sa.select([orders]), "KI_HINT_UPDATE_ON_EXISTING_PK"))
+
+
+def test_hints_at_execution(fake_engine, fake_server):
+    fake_server.add_table("ki_home", "orders", [("id", "INTEGER"), ("total", "DOUBLE")])
+    plain = sa.select([orders])
+    hinted = with_kinetica_hints(plain, "KI_HINT_NO_PLAN_CACHE")
+
+    with fake_engine.connect() as conn:
+        conn = conn.execution_options(compiled_cache={})
+        conn.execute(plain)
+        conn.execute(hinted)
+        conn.execute(plain)
+        hinted_conn = conn.execution_options(kinetica_hints=["KI_HINT_NO_COST_BASED_OPTIMIZATION"])
+        hinted_conn.execute(hinted)
+
+    statements = [statement.split(" orders.id")[0] for statement, _ in fake_server.log]
+    assert statements == [
+        "SELECT",
+        "SELECT /* KI_HINT_NO_PLAN_CACHE */",
+        "SELECT",
+        "SELECT /* KI_HINT_NO_COST_BASED_OPTIMIZATION */ /* KI_HINT_NO_PLAN_CACHE */",
+    ]
+
+
+def test_connection_hints_on_textual_statements(fake_engine, fake_server):
+    fake_server.add_table("ki_home", "orders", [("id", "INTEGER"), ("total", "DOUBLE")])
+    with fake_engine.connect() as conn:
+        hinted = conn.execution_options(kinetica_hints=["KI_HINT_NO_PLAN_CACHE"])
+        hinted.execute("SELECT id FROM orders")
+        hinted.execute("CREATE TABLE notes (id INTEGER)")
+        upsert = conn.execution_options(kinetica_hints=["KI_HINT_UPDATE_ON_EXISTING_PK"])
+        upsert.execute(sa.text("INSERT INTO orders (id) VALUES (:id)"), id=1)
+        with pytest.raises(sa.exc.StatementError):
+            upsert.execute("SELECT id FROM orders")
+
+    assert [statement for statement, _ in fake_server.log] == [
+        "SELECT /* KI_HINT_NO_PLAN_CACHE */ id FROM orders",
+        "CREATE TABLE notes (id INTEGER)",
+        "INSERT /* KI_HINT_UPDATE_ON_EXISTING_PK */ INTO orders (id) VALUES (?)",
+    ]
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+
+def _check(code):
+    subprocess.check_call([sys.executable, "-c", code])
+
+
+def test_package_import_is_lazy():
+    _check(
+        "import sys, sa_gpudb; "
+        "assert 'sqlalchemy' not in sys.modules; "
+        "assert 'sa_gpudb.base' not in sys.modules"
+    )
+
+
+def test_package_import_leaves_mssql_alone():
+    _check(
+        "import sa_gpudb; "
+        "from sqlalchemy.dialects.mssql import base, pyodbc; "
+        "assert sa_gpudb.dialect.name == 'kinetica'; "
+        "assert sa_gpudb.VARCHAR is base.VARCHAR; "
+        "assert base.dialect is not sa_gpudb.dialect"
+    )
@@ -0,0 +1,139 @@
+import datetime
+import decimal
+import json
+
+import sqlalchemy as sa
+
+from sa_gpudb.incremental import WatermarkStore, extract_changes
+from sa_gpudb.testing import fake_odbc
+
+events = sa.Table(
+    "events",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer),
+    sa.Column("updated", sa.DateTime),
+    sa.Column("day", sa.Date),
+    schema="ki_home",
+)
+
+T0 = datetime.datetime(2024, 5, 1)
+
+
+def _server(fake_server):
+    fake_server.add_table("ki_home", "events", [("id", "INTEGER"), ("updated", "TIMESTAMP"), ("day", "DATE")])
+    table = fake_server.find_table("ki_home.events")
+
+    def between(params, high=True):
+        # (start, [prune], high) after the first run, (high,) before
+        low = params[0] if len(params) > (1 if high else 0) else None
+        prune = params[1] if len(params) == (3 if high else 2) else None
+        top = params[-1] if high else None
+        return [
+            r
+            for r in table.rows
+            if (low is None or r[1] > low)
+            and (prune is None or datetime.datetime.combine(r[2], datetime.time()) >= prune)
+            and (top is None or r[1] <= top)
+        ]
+
+    def high(statement, params):
+        rows = between(params, high=False)
+        return fake_odbc.Result.from_columns(["max_1"], [(max(r[1] for r in rows),)] if rows else [(None,)])
+
+    fake_server.respond(r"^SELECT max\(", high)
+    fake_server.respond(r"^SELECT ki_home\.events\.id", lambda s, p: fake_odbc.Result(between(p), table.description))
+    return table
+
+
+def _add(table, first, count):
+    table.rows.extend(
+        (i, T0 + datetime.timedelta(minutes=i), (T0 + datetime.timedelta(minutes=i)).date())
+        for i in range(first, first + count)
+    )
+
+
+def test_extracts_only_new_rows(fake_engine, fake_server, tmp_path):
+    table = _server(fake_server)
+    path = str(tmp_path / "marks.json")
+    _add(table, 0, 25)
+
+    batches = list(extract_changes(fake_engine, events, "updated", WatermarkStore(path), batch_size=10))
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert json.load(open(path)) == {"ki_home.events:updated": {"type": "datetime", "value": "2024-05-01T00:24:00"}}
+
+    _add(table, 25, 3)
+    store = WatermarkStore(path)
+    assert [r.id for b in extract_changes(fake_engine, events, events.c.updated, store) for r in b] == [25, 26, 27]
+    select = [s for s, _ in fake_server.log if s.startswith("SELECT ki_home.events.id")][-1]
+    assert "WHERE ki_home.events.updated > ? AND ki_home.events.updated <= ?" in select
+
+    # nothing new: no scan, watermark unchanged
+    count = fake_server.statement_count
+    assert list(extract_changes(fake_engine, events, "updated", store)) == []
+    assert fake_server.statement_count == count + 1
+    assert WatermarkStore(path).get("ki_home.events:updated") == T0 + datetime.timedelta(minutes=27)
+
+
+def test_watermark_store_round_trip(tmp_path):
+    path = str(tmp_path / "marks.json")
+    marks = {
+        "naive": T0 + datetime.timedelta(microseconds=5),
+        "aware": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+        "day": T0.date(),
+        "amount": decimal.Decimal("12.50"),
+        "id": 42,
+    }
+    store = WatermarkStore(path)
+    for name, value in marks.items():
+        store.set(name, value)
+    reloaded = WatermarkStore(path)
+    for name, value in marks.items():
+        assert reloaded.get(name) == value and type(reloaded.get(name)) is type(value), name
+    assert reloaded.get("aware").utcoffset() == datetime.timedelta(hours=2)
+
+
+def test_watermark_kept_when_consumer_stops(fake_engine, fake_server, tmp_path):
+    table = _server(fake_server)
+    store = WatermarkStore(str(tmp_path / "marks.json"))
+    _add(table, 0, 30)
+
+    with fake_engine.connect() as conn:
+        changes = extract_changes(conn, events, "updated", store, batch_size=10)
+        next(changes)
+        changes.close()
+    assert "ki_home.events:updated" not in store
+    assert sum(len(b) for b in extract_changes(fake_engine, events, "updated", store, prefetch_batches=2)) == 30
+
+
+def test_overlap_and_partition_pruning(fake_engine, fake_server, tmp_path):
+    table = _server(fake_server)
+    store = WatermarkStore(str(tmp_path / "marks.json"))
+    store.set("ki_home.events:updated", T0 + datetime.timedelta(minutes=9))
+    _add(table, 0, 20)
+
+    changes = extract_changes(
+        fake_engine,
+        events,
+        "updated",
+        store,
+        overlap=datetime.timedelta(minutes=2),
+        prune_on="day",
+        prune_lag=datetime.timedelta(days=1),
+    )
+    assert [r.id for b in changes for r in b][:3] == [8, 9, 10]
+    statement, params = [(s, p) for s, p in fake_server.log if s.startswith("SELECT ki_home.events.id")][-1]
+    assert "AND ki_home.events.day >= ?" in statement
+    assert params[:2] == (T0 + datetime.timedelta(minutes=7), T0 - datetime.timedelta(days=1))
+
+
+def test_partition_pruning_on_date_column(fake_engine, fake_server, tmp_path):
+    table = _server(fake_server)
+    store = WatermarkStore(str(tmp_path / "marks.json"))
+    store.set("ki_home.events:updated", T0 + datetime.timedelta(minutes=9))
+    _add(table, 0, 20)
+
+    # the DATE bound is the watermark's day, not its time of day
+    changes = extract_changes(fake_engine, events, "updated", store, prune_on="day")
+    assert [r.id for b in changes for r in b] == list(range(10, 20))
+    params = [p for s, p in fake_server.log if s.startswith("SELECT ki_home.events.id")][-1]
+    assert params[1] == T0
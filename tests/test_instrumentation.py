@@ -0,0 +1,91 @@
+import time
+
+import sqlalchemy as sa
+
+from sa_gpudb.instrumentation import StatementEvent, StatementStats, fingerprint
+
+
+def test_fingerprint_normalizes_literals_and_binds():
+    assert fingerprint("SELECT a FROM t WHERE b IN (?, ?, ?) AND c = 'x''y'  -- note\n AND d = 1.5") == (
+        "SELECT a FROM t WHERE b IN (?) AND c = ? AND d = ?"
+    )
+    assert fingerprint("select x1 from t2 where y = 3") == "select x1 from t2 where y = ?"
+
+
+def test_statement_stats_percentiles():
+    stats = StatementStats()
+    for i in range(1, 101):
+        event = StatementEvent("SELECT * FROM t WHERE a = %d" % i, (), cache_hit=i > 1)
+        event.execute_time = i / 1000.0
+        event.rows_fetched = 2
+        stats(event)
+
+    (entry,) = stats.report()
+    assert entry["fingerprint"] == "SELECT * FROM t WHERE a = ?"
+    assert entry["count"] == 100
+    assert entry["p50"] == 0.05
+    assert entry["p95"] == 0.095
+    assert entry["p99"] == 0.099
+    assert entry["rows"] == 200
+    assert (entry["cache_hits"], entry["cache_misses"]) == (99, 1)
+
+
+events = sa.Table(
+    "events",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer),
+    sa.Column("label", sa.String(32)),
+    sa.Column("ts", sa.DateTime),
+    schema="ki_home",
+)
+
+
+def test_engine_statement_events(make_fake_engine, fake_events, tmp_path):
+    fake_events(10)
+    collected = []
+    engine = make_fake_engine(statement_collectors=[collected.append])
+    cached = engine.execution_options(compiled_cache={})
+
+    stmt = sa.select([events])
+    for _ in range(2):
+        assert len(cached.execute(stmt).fetchall()) == 10
+    first, second = collected
+    assert (first.cache_hit, second.cache_hit) == (False, True)
+    assert first.compile_time > 0 and second.compile_time is None
+    # eight bytes for each id and ts, seven for each "event <n>" label
+    assert (second.rows_fetched, second.bytes_fetched) == (10, 230)
+    assert second.fingerprint == "SELECT ki_home.events.id, ki_home.events.label, ki_home.events.ts FROM ki_home.events"
+
+    # delivered on soft close, for plain, spilled and prefetched results
+    del collected[:]
+    result = engine.execute("SELECT id, label, ts FROM events")
+    assert collected == []
+    result.fetchall()
+    spill = engine.execution_options(spill_threshold=100, spill_dir=str(tmp_path))
+    spill.execute("SELECT id, label, ts FROM events")
+    prefetch = engine.execution_options(prefetch_batches=2, prefetch_batch_size=3)
+    result = prefetch.execute("SELECT id, label, ts FROM events")
+    assert len(collected) == 2
+    assert len(result.fetchall()) == 10
+    assert [(e.rows_fetched, e.bytes_fetched, e.cache_hit) for e in collected] == [(10, 230, None)] * 3
+
+
+class _SlowLabel(sa.types.TypeDecorator):
+    impl = sa.String(32)
+
+    def process_result_value(self, value, dialect):
+        time.sleep(0.002)
+        return value.upper()
+
+
+def test_result_processors_in_process_time(make_fake_engine, fake_events):
+    fake_events(10)
+    seen = []
+    engine = make_fake_engine(statement_collectors=[lambda e: seen.append(e.process_time)])
+    stmt = sa.select([events.c.id, sa.type_coerce(events.c.label, _SlowLabel).label("label")])
+
+    rows = engine.execute(stmt).fetchall()
+    # the ten conversions ran, and were timed, before the event was handed on
+    assert seen[0] >= 0.02
+    assert [r.label for r in rows][:2] == [r[1] for r in rows][:2] == ["EVENT 0", "EVENT 1"]
+    assert rows[0][events.c.id] == 0
@@ -0,0 +1,76 @@
+import sqlalchemy as sa
+
+events = sa.Table(
+    "events",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer, autoincrement=False),
+    sa.Column("label", sa.String(32)),
+    schema="ki_home",
+)
+
+
+def _inserts(server):
+    return [(statement, params) for statement, params in server.log if statement.startswith("INSERT")]
+
+
+def _setup(server):
+    server.add_table("ki_home", "events", [("id", "INTEGER"), ("label", "VARCHAR(32)")])
+    return server.find_table("ki_home.events")
+
+
+def test_split_by_parameter_count(fake_server, make_fake_engine):
+    table = _setup(fake_server)
+    engine = make_fake_engine(multivalues_max_parameters=8)
+    rows = [{"id": i, "label": "e%d" % i} for i in range(10)]
+    assert engine.execute(events.insert().values(rows)).rowcount == 10
+
+    inserts = _inserts(fake_server)
+    assert [len(params) for _, params in inserts] == [8, 8, 4]
+    assert inserts[0][0] == "INSERT INTO ki_home.events (id, label) VALUES (?, ?), (?, ?), (?, ?), (?, ?)"
+    assert inserts[0][0] is inserts[1][0]
+    assert table.rows == [(i, "e%d" % i) for i in range(10)]
+
+    # the batch statements are compiled once and reused by later inserts
+    engine.execute(events.insert().values([{"id": i, "label": "f%d" % i} for i in range(10, 20)]))
+    again = _inserts(fake_server)[3:]
+    assert [len(params) for _, params in again] == [8, 8, 4]
+    assert again[0][0] is inserts[0][0] and again[2][0] is inserts[2][0]
+    assert len(engine.dialect._multivalues_cache) == 2
+
+
+def test_split_by_size_and_pipelined(fake_server, make_fake_engine):
+    table = _setup(fake_server)
+    engine = make_fake_engine(multivalues_max_bytes=1000, multivalues_executemany=True)
+    rows = [{"id": i, "label": "x" * 30} for i in range(100)]
+    engine.execute(events.insert().values(rows))
+
+    (many, full), (last, rest) = _inserts(fake_server)
+    batch = len(full[0]) // 2
+    assert 1 < batch < 30 and all(len(p) == 2 * batch for p in full)
+    assert len(many) < 1000 and len(last) < len(many)
+    assert len(rest) == 2 * (100 % batch)
+    assert [r[0] for r in table.rows] == list(range(100))
+
+
+def test_small_and_expression_inserts_unsplit(fake_server, make_fake_engine):
+    _setup(fake_server)
+    engine = make_fake_engine(multivalues_max_parameters=4)
+    engine.execute(events.insert().values([{"id": 1, "label": "a"}, {"id": 2, "label": "b"}]))
+    rows = [{"id": i, "label": sa.func.upper("e")} for i in range(5)]
+    engine.execute(events.insert().values(rows))
+    assert [len(params) for _, params in _inserts(fake_server)] == [4, 10]
+
+
+def test_python_defaults_count_as_parameters(fake_server, make_fake_engine):
+    table = _setup(fake_server)
+    labelled = sa.Table(
+        "events",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, autoincrement=False),
+        sa.Column("label", sa.String(32), default=lambda: "default"),
+        schema="ki_home",
+    )
+    engine = make_fake_engine(multivalues_max_parameters=4)
+    engine.execute(labelled.insert().values([{"id": i} for i in range(5)]))
+    assert [len(params) for _, params in _inserts(fake_server)] == [4, 4, 2]
+    assert table.rows == [(i, "default") for i in range(5)]
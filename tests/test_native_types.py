@@ -0,0 +1,60 @@
+import ipaddress
+import uuid
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.base import IPV4, ULONG, UUID
+
+
+def _flows(fake_server):
+    fake_server.add_table(
+        "net",
+        "flows",
+        [("src", "IPV4"), ("session", "UUID"), ("bytes", "UNSIGNED BIGINT"), ("blocked", "BOOLEAN")],
+    )
+    return sa.Table(
+        "flows",
+        sa.MetaData(),
+        sa.Column("src", IPV4()),
+        sa.Column("session", UUID()),
+        sa.Column("bytes", ULONG()),
+        sa.Column("blocked", sa.Boolean(create_constraint=False)),
+        schema="net",
+    )
+
+
+def test_reflection(fake_engine, fake_server):
+    _flows(fake_server)
+    types = [c["type"] for c in sa.inspect(fake_engine).get_columns("flows", schema="net")]
+    assert [type(t) for t in types] == [IPV4, UUID, ULONG, sa.BOOLEAN]
+
+
+def test_round_trip(fake_engine, fake_server):
+    flows = _flows(fake_server)
+    session = uuid.uuid4()
+    fake_engine.execute(
+        flows.insert(),
+        [
+            {"src": ipaddress.IPv4Address("10.1.2.3"), "session": session, "bytes": 2 ** 64 - 1, "blocked": 1},
+            {"src": 3232235777, "session": None, "bytes": 0, "blocked": 0},
+        ],
+    )
+    assert fake_server.tables[("net", "flows")].rows[1][0] == "192.168.1.1"
+
+    fake_server.tables[("net", "flows")].rows[0] = ("10.1.2.3", str(session), str(2 ** 64 - 1), 1)
+    rows = fake_engine.execute(sa.select([flows])).fetchall()
+    assert rows[0] == (ipaddress.IPv4Address("10.1.2.3"), session, 2 ** 64 - 1, True)
+    assert rows[1].src == ipaddress.IPv4Address("192.168.1.1")
+
+    with pytest.raises(sa.exc.StatementError):
+        fake_engine.execute(flows.insert(), bytes=-1)
+
+
+def test_network_predicates(fake_engine):
+    src = sa.column("src", IPV4(as_int=True))
+    compiled = sa.select([src.part(1)]).where(src.in_network("10.0.0.0/8")).compile(dialect=fake_engine.dialect)
+    assert "IPV4_PART(src, ?)" in str(compiled) and "src BETWEEN ? AND ?" in str(compiled)
+    process = IPV4().bind_processor(None)
+    assert [process(compiled.params[name]) for name in ("src_1", "src_2")] == ["10.0.0.0", "10.255.255.255"]
+    assert IPV4(as_int=True).result_processor(None, None)("10.0.0.1") == 167772161
@@ -0,0 +1,95 @@
+import sys
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.parallel import parallel_fetch
+from sa_gpudb.testing.fake_odbc import Result
+
+
+events = sa.Table("events", sa.MetaData(), sa.Column("id", sa.Integer), sa.Column("kind", sa.String))
+
+
+def _events(fake_server, count=1000, barrier=None):
+    table = fake_server.add_table("ki_home", "events", [("id", "INTEGER"), ("kind", "VARCHAR")])
+    fake_server.insert("ki_home", "events", [(i, "click") for i in range(1, count + 1)] + [(None, "view")])
+
+    def ranges(statement, params):
+        if barrier is not None:
+            barrier.wait()
+        if "<" not in statement and ">=" not in statement:
+            return Result(table.rows, table.description)
+        if "IS NULL" in statement:
+            keep = lambda i: i is None or i < params[0]  # noqa: E731
+        elif "<" in statement:
+            keep = lambda i: i is not None and params[0] <= i < params[1]  # noqa: E731
+        else:
+            keep = lambda i: i is not None and i >= params[0]  # noqa: E731
+        return Result([row for row in table.rows if keep(row[0])], table.description)
+
+    fake_server.respond(r"^SELECT events\.id", ranges)
+    fake_server.respond(r"min\(events\.id\)", Result.from_columns(["min", "max"], [(1, count)]))
+
+
+def test_parallel_fetch(fake_engine, fake_server):
+    # every range query waits for the others: passes only if all four run concurrently
+    _events(fake_server, barrier=threading.Barrier(4, timeout=5))
+    rows = list(parallel_fetch(fake_engine, sa.select([events]), split_on=events.c.id, workers=4, batch_size=100))
+
+    assert sorted(rows, key=lambda r: (r.id is None, r.id)) == [(i, "click") for i in range(1, 1001)] + [
+        (None, "view")
+    ]
+    range_params = [params for statement, params in fake_server.log if statement.startswith("SELECT events.id")]
+    assert sorted(range_params) == [(251,), (251, 501), (501, 751), (751,)]
+
+
+def test_parallel_fetch_explicit_bounds_and_cancel(fake_engine, fake_server):
+    _events(fake_server)
+    stream = parallel_fetch(fake_engine, sa.select([events]), split_on=events.c.id, bounds=[500], batch_size=10)
+    assert len([next(stream) for _ in range(25)]) == 25
+    stream.close()
+
+    assert not any("min(" in statement for statement, _ in fake_server.log)
+    assert fake_engine.pool.checkedout() == 0
+
+
+def test_parallel_fetch_rejects_unsplittable(fake_engine):
+    for stmt in (
+        sa.select([events]).limit(10),
+        sa.select([events.c.kind]).group_by(events.c.kind),
+        sa.select([events.c.kind]).group_by(events.c.kind).having(sa.func.count() > 1),
+        sa.select([events.c.kind]).distinct(),
+        sa.select([sa.func.count()]).select_from(events),
+        sa.select([sa.func.max(events.c.id) + 1]),
+        sa.select([events.c.id, sa.func.row_number().over(order_by=events.c.id)]),
+    ):
+        with pytest.raises(sa.exc.ArgumentError):
+            parallel_fetch(fake_engine, stmt, split_on=events.c.id)
+
+
+def test_parallel_fetch_splits_on_shard_key(fake_engine, fake_server):
+    _events(fake_server)
+    fake_server.respond(
+        r"ki_catalog\.ki_objects",
+        Result.from_columns(["schema_name", "object_name", "shard_key"], [("ki_home", "events", "id")]),
+    )
+    rows = list(parallel_fetch(fake_engine, sa.select([events]), workers=2))
+
+    assert len(rows) == 1001
+    range_params = [params for statement, params in fake_server.log if statement.startswith("SELECT events.id")]
+    assert sorted(range_params) == [(501,), (501,)]
+
+
+def test_parallel_fetch_arrow(fake_engine, fake_server, monkeypatch):
+    _events(fake_server, count=100)
+    stmt = sa.select([events])
+    with monkeypatch.context() as patch:
+        patch.setitem(sys.modules, "pyarrow", None)
+        with pytest.raises(ImportError):
+            parallel_fetch(fake_engine, stmt, split_on=events.c.id, arrow=True)
+
+    pytest.importorskip("pyarrow")
+    batches = list(parallel_fetch(fake_engine, stmt, split_on=events.c.id, workers=2, batch_size=20, arrow=True))
+    assert all(b.schema.names == ["id", "kind"] and b.num_rows <= 20 for b in batches)
+    assert sorted(i for b in batches for i in b.column(0).to_pylist() if i is not None) == list(range(1, 101))
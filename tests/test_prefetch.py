@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.testing import fake_odbc
+
+
+def _wait_for(condition):
+    deadline = time.time() + 5
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def test_prefetched_rows_in_order(fake_engine, fake_server, fake_events):
+    fake_events(1050)
+    with fake_engine.connect() as conn:
+        options = conn.execution_options(prefetch_batches=2, prefetch_batch_size=100)
+        result = options.execute("SELECT id FROM events")
+        assert [r.id for r in result.fetchmany(250)] == list(range(250))
+        assert result.fetchone().id == 250
+        assert [r.id for r in result.fetchall()] == list(range(251, 1050))
+        assert result.fetchone() is None
+
+        assert [r.id for r in options.execute("SELECT id FROM events")] == list(range(1050))
+        stmt = sa.text("SELECT id FROM events").execution_options(prefetch_batches=1)
+        assert len(fake_engine.execute(stmt).fetchall()) == 1050
+
+
+def test_fetchmany_without_size_returns_one_batch(fake_engine, fake_events):
+    fake_events(1050)
+    with fake_engine.connect() as conn:
+        result = conn.execution_options(prefetch_batches=2, prefetch_batch_size=100).execute("SELECT id FROM events")
+        assert [r.id for r in result.fetchmany()] == list(range(100))
+        assert result.fetchone().id == 100
+        # the rest of the current batch, then one batch per call
+        assert [r.id for r in result.fetchmany()] == list(range(101, 200))
+        sizes = []
+        while True:
+            rows = result.fetchmany()
+            if not rows:
+                break
+            sizes.append(len(rows))
+        assert sizes == [100] * 8 + [50]
+
+
+def test_prefetch_is_bounded_and_cancelled(fake_engine, fake_server, fake_events):
+    fake_events(10000)
+    with fake_engine.connect() as conn:
+        result = conn.execution_options(prefetch_batches=2, prefetch_batch_size=10).execute("SELECT id FROM events")
+        assert result.fetchone().id == 0
+        # one batch being read, two queued, one waiting to be queued
+        _wait_for(lambda: fake_server.fetch_calls >= 4)
+        time.sleep(0.05)
+        assert fake_server.fetch_calls == 4
+
+        result.close()
+        assert not [t for t in threading.enumerate() if t.name == "kinetica-prefetch"]
+        assert fake_server.cancels == 1
+        assert conn.execute("SELECT id FROM events").fetchone().id == 0
+
+
+def test_fetch_errors_reach_the_consumer(fake_engine, fake_server):
+    class FailingRows(list):
+        def __getitem__(self, index):
+            if isinstance(index, slice) and index.start >= 20:
+                raise fake_odbc.OperationalError("HY000", "fetch failed")
+            return list.__getitem__(self, index)
+
+    fake_server.respond(r"^SELECT", fake_odbc.Result.from_columns(["id"], FailingRows((i,) for i in range(50))))
+    result = fake_engine.execution_options(prefetch_batches=2, prefetch_batch_size=10).execute("SELECT id")
+    assert len(result.fetchmany(20)) == 20
+    with pytest.raises(sa.exc.OperationalError):
+        result.fetchall()
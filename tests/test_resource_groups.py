@@ -0,0 +1,61 @@
+import pytest
+import sqlalchemy as sa
+
+
+def _sets(server):
+    return [statement for statement, _ in server.log if statement.startswith("SET RESOURCE GROUP")]
+
+
+def test_resource_group_issued_only_on_change(fake_engine, fake_server):
+    with fake_engine.connect() as conn:
+        conn.execute("SELECT 1")
+        etl = conn.execution_options(kinetica_resource_group="etl")
+        etl.execute("SELECT 2")
+        etl.execute("SELECT 3")
+        conn.execute(sa.text("SELECT 4").execution_options(kinetica_resource_group="etl"))
+        conn.execute("SELECT 5")
+    assert _sets(fake_server) == ["SET RESOURCE GROUP etl", "SET RESOURCE GROUP DEFAULT"]
+
+    # returned to the pool already at the default: nothing to reset
+    with fake_engine.connect() as conn:
+        conn.execute("SELECT 6")
+    assert len(_sets(fake_server)) == 2
+
+
+def test_reset_on_pool_return(fake_engine, fake_server):
+    with fake_engine.connect() as conn:
+        conn.execution_options(kinetica_resource_group="etl").execute("SELECT 1")
+    assert _sets(fake_server) == ["SET RESOURCE GROUP etl", "SET RESOURCE GROUP DEFAULT"]
+
+    with fake_engine.connect() as conn:
+        conn.execute("SELECT 2")
+    assert len(_sets(fake_server)) == 2
+
+
+def test_engine_defaults_and_priorities(fake_server, make_fake_engine):
+    engine = make_fake_engine(
+        pool_size=1,
+        priority="interactive",
+        resource_group_priorities={"interactive": "dashboards", "batch": "etl"},
+    )
+    with engine.connect() as conn:
+        conn.execute("SELECT 1")
+        conn.execute("SELECT 2")
+        conn.execution_options(kinetica_priority="batch").execute("SELECT 3")
+    with engine.connect() as conn:
+        conn.execute("SELECT 4")
+
+    assert _sets(fake_server) == [
+        "SET RESOURCE GROUP dashboards",
+        "SET RESOURCE GROUP etl",
+        "SET RESOURCE GROUP dashboards",
+    ]
+    # the switch back happened on pool return, not on the next checkout
+    assert [statement for statement, _ in fake_server.log][-3:] == [
+        "SELECT 3",
+        "SET RESOURCE GROUP dashboards",
+        "SELECT 4",
+    ]
+
+    with pytest.raises(sa.exc.ArgumentError):
+        engine.execution_options(kinetica_priority="urgent").execute("SELECT 5")
@@ -0,0 +1,135 @@
+import datetime
+import decimal
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb import avro
+from sa_gpudb.testing import fake_odbc
+
+metadata = sa.MetaData()
+orders = sa.Table(
+    "orders",
+    metadata,
+    sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=False),
+    sa.Column("placed", sa.Date),
+    sa.Column("amount", sa.Numeric(10, 2)),
+    sa.Column("note", sa.String(32)),
+    schema="ki_home",
+)
+
+
+def test_avro_round_trip():
+    schema = {
+        "type": "record",
+        "name": "r",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "values", "type": {"type": "array", "items": ["double", "null"]}},
+            {"name": "options", "type": {"type": "map", "values": "string"}},
+            {"name": "raw", "type": "bytes"},
+        ],
+    }
+    value = {"id": -(2**40), "values": [1.5, None, -2.0], "options": {"k": "välue"}, "raw": b"\x00\xff"}
+    assert avro.decode(avro.encode(value, schema), schema) == value
+
+
+def test_insert_select_round_trip(rest_engine, fake_http):
+    metadata.create_all(rest_engine)
+    rows = [
+        {"id": i, "placed": datetime.date(2021, 1, i), "amount": decimal.Decimal("%d.25" % i), "note": None}
+        for i in range(1, 6)
+    ]
+    requests = fake_http.requests["/execute/sql"]
+    with rest_engine.connect() as conn:
+        assert conn.execute(orders.insert(), rows).rowcount == 5
+        result = conn.execute(sa.select([orders]).order_by(orders.c.id)).fetchall()
+
+    assert [tuple(r) for r in result] == [(r["id"], r["placed"], r["amount"], None) for r in rows]
+    assert type(result[0].placed) is datetime.date
+    assert fake_http.requests["/execute/sql"] == requests + 2
+
+
+def test_reflection(rest_engine, fake_server):
+    fake_server.add_table(
+        "ki_home",
+        "events",
+        [("id", "INTEGER", None, False), ("at", "TYPE_TIMESTAMP"), ("kind", "VARCHAR", 16), ("src", "IPV4")],
+    )
+    inspector = sa.inspect(rest_engine)
+
+    assert inspector.get_table_names() == ["ki_home.events"]
+    assert rest_engine.has_table("events")
+    columns = inspector.get_columns("events", schema="ki_home")
+    assert [(c["name"], type(c["type"]).__name__, c["nullable"]) for c in columns] == [
+        ("id", "INTEGER", False),
+        ("at", "DATETIME", True),
+        ("kind", "VARCHAR", True),
+        ("src", "IPV4", True),
+    ]
+    assert columns[2]["type"].length == 16
+
+
+def test_paging_and_keep_alive(fake_http, fake_server):
+    fake_server.add_table("ki_home", "events", [("id", "INTEGER"), ("at", "TIMESTAMP")])
+    at = datetime.datetime(2021, 3, 4, 5, 6, 7, 125000)
+    fake_server.insert("ki_home", "events", [(i, at) for i in range(2500)])
+    engine = sa.create_engine(fake_http.url + "/?batch_size=1000")
+
+    with engine.connect() as conn:
+        result = conn.execute("SELECT * FROM ki_home.events")
+        first = result.fetchmany(10)
+        rows = first + result.fetchall()
+        result = conn.execute("SELECT * FROM ki_home.events")
+        result.fetchone()
+        result.close()
+
+    assert [r[0] for r in rows] == list(range(2500))
+    assert rows[-1][1] == at
+    # three pages for the first query, one for the second, and their paging tables cleared
+    assert fake_http.requests["/execute/sql"] == 4
+    assert fake_http.requests["/clear/table"] == 2
+    assert fake_http.paging_tables == {}
+    assert fake_http.connections == 1
+    engine.dispose()
+
+
+def test_errors(rest_engine, fake_server):
+    fake_server.respond(r"^SELECT broken", fake_odbc.ProgrammingError("Syntax error at 'broken'"))
+    with pytest.raises(sa.exc.ProgrammingError, match="Syntax error"):
+        rest_engine.execute("SELECT broken")
+
+    with pytest.raises(sa.exc.StatementError):
+        rest_engine.execute(sa.text("SELECT 1 WHERE x = :x"), x=b"\x00")
+
+
+def test_connection_refused():
+    engine = sa.create_engine("kinetica+gpudb://127.0.0.1:9/?timeout=1")
+    with pytest.raises(sa.exc.OperationalError) as err:
+        engine.connect().execute("SELECT 1")
+    assert err.value.connection_invalidated
+
+
+def test_dropped_keep_alive_connection(rest_engine, fake_server):
+    fake_server.add_table("ki_home", "events", [("id", "INTEGER")])
+    runs = []
+
+    def run_then_drop(statement, params):
+        runs.append(statement)
+        if len(runs) == 1:
+            raise ConnectionResetError()
+        return fake_odbc.Result()
+
+    fake_server.respond(r"^(SELECT|INSERT) .*events", run_then_drop)
+    with rest_engine.connect() as conn:
+        conn.execute("SELECT 1")
+        # a read is sent again on a fresh connection
+        conn.execute("SELECT id FROM ki_home.events")
+        assert len(runs) == 2
+
+        # a write may have run: it is not
+        del runs[:]
+        with pytest.raises(sa.exc.OperationalError) as err:
+            conn.execute("INSERT INTO ki_home.events (id) VALUES (1)")
+        assert err.value.connection_invalidated
+        assert len(runs) == 1
@@ -0,0 +1,117 @@
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.testing import fake_odbc
+
+HEADS = ["http://head-a:9191", "http://head-b:9191"]
+REPLICAS = ["http://replica-a:9191", "http://replica-b:9191"]
+
+
+@pytest.fixture
+def servers():
+    servers = {url: fake_odbc.Server() for url in HEADS + REPLICAS}
+    for server in servers.values():
+        server.add_table("ki_home", "events", [("id", "INTEGER")])
+    return servers
+
+
+def _engine(servers, query="hosts=%s&read_hosts=%s" % (",".join(HEADS), ",".join(REPLICAS))):
+    return sa.create_engine(
+        "kinetica://KINETICA/?" + query, module=fake_odbc, connect_args={"servers": servers}, pool_size=1
+    )
+
+
+def _statements(server):
+    return [statement for statement, _ in server.log]
+
+
+def test_reads_round_robin_and_writes_on_head(servers):
+    engine = _engine(servers)
+    with engine.connect() as conn:
+        for _ in range(4):
+            conn.execute("SELECT id FROM events")
+        conn.execute("INSERT INTO events (id) VALUES (?)", 1)
+
+    assert len(_statements(servers[REPLICAS[0]])) == len(_statements(servers[REPLICAS[1]])) == 2
+    assert _statements(servers[HEADS[0]]) == ["INSERT INTO events (id) VALUES (?)"]
+    assert not servers[HEADS[1]].log
+
+
+def test_transaction_sticks_to_head(servers):
+    engine = _engine(servers)
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute("SELECT id FROM events")
+        conn.execute("INSERT INTO events (id) VALUES (?)", 1)
+        conn.execute("SELECT id FROM events")
+        conn.execute(sa.text("SELECT 1").execution_options(kinetica_route="primary"))
+
+    # the autocommitted INSERT released the pin before the last SELECT
+    assert _statements(servers[HEADS[0]]) == [
+        "SELECT id FROM events",
+        "INSERT INTO events (id) VALUES (?)",
+        "SELECT 1",
+    ]
+    assert _statements(servers[REPLICAS[0]]) == ["SELECT id FROM events"]
+
+
+def test_failover_with_backoff(servers):
+    engine = _engine(servers, "hosts=" + ",".join(HEADS))
+    router = engine.dialect._router
+    now = [100.0]
+    router._clock = lambda: now[0]
+
+    servers[HEADS[0]].down = True
+    engine.execute("INSERT INTO events (id) VALUES (?)", 1)
+    assert servers[HEADS[1]].log and servers[HEADS[0]].connections == 0
+
+    # a head failing mid-statement invalidates the connection; the pool
+    # reconnects to the other head, skipping the one in backoff
+    servers[HEADS[0]].down = False
+    now[0] += 1
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute("SELECT 1")
+        servers[HEADS[0]].down = True
+        with pytest.raises(sa.exc.OperationalError) as err:
+            conn.execute("SELECT 2")
+        assert err.value.connection_invalidated
+        conn.execute("SELECT 3")
+    assert _statements(servers[HEADS[1]])[-1] == "SELECT 3"
+    assert router.hosts[0].failures == 1
+
+    # after the backoff the head is tried again, and back in use once up
+    servers[HEADS[0]].down = False
+    now[0] += router.backoff
+    engine.dispose()
+    engine.execute("SELECT 4")
+    assert _statements(servers[HEADS[0]])[-1] == "SELECT 4"
+    assert router.hosts[0].failures == 0
+
+
+def test_read_retried_on_next_replica(servers):
+    engine = _engine(servers)
+    servers[REPLICAS[0]].down = True
+    with engine.connect() as conn:
+        for _ in range(3):
+            assert conn.execute("SELECT id FROM events").fetchall() == []
+
+    assert not servers[REPLICAS[0]].log
+    assert len(_statements(servers[REPLICAS[1]])) == 3
+    assert engine.dialect._router.read_hosts[0].failures == 1
+
+
+def test_resource_group_on_every_host(servers):
+    engine = _engine(servers)
+    with engine.connect() as conn:
+        etl = conn.execution_options(kinetica_resource_group="etl")
+        for _ in range(4):
+            etl.execute("SELECT id FROM events")
+        etl.execute("INSERT INTO events (id) VALUES (?)", 1)
+
+    # reads still go to the replicas, the head opened later is switched as
+    # well, and all of them are reset on pool return
+    select, reset = "SELECT id FROM events", "SET RESOURCE GROUP DEFAULT"
+    for url in REPLICAS:
+        assert _statements(servers[url]) == ["SET RESOURCE GROUP etl", select, select, reset]
+    assert _statements(servers[HEADS[0]]) == ["SET RESOURCE GROUP etl", "INSERT INTO events (id) VALUES (?)", reset]
@@ -0,0 +1,80 @@
+import logging
+import time
+
+import sqlalchemy as sa
+
+from sa_gpudb.testing import fake_odbc
+
+events = sa.Table(
+    "events",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer),
+    sa.Column("label", sa.String(32)),
+    sa.Column("ts", sa.DateTime),
+    schema="ki_home",
+)
+
+by_id = sa.select([events]).where(events.c.id == sa.bindparam("id"))
+
+
+def _slow_lookups(server, table, delay):
+    def respond(statement, params):
+        time.sleep(delay)
+        return fake_odbc.Result([r for r in table.rows if r[0] == params[0]], table.description)
+
+    def delete(statement, params):
+        time.sleep(delay)
+        return fake_odbc.Result(rowcount=1)
+
+    server.respond(r"^SELECT ki_home\.events\.id", respond)
+    server.respond(r"^DELETE ", delete)
+    server.respond(r"^EXPLAIN ", fake_odbc.Result.from_columns(["plan"], [("PROJECT",), ("FILTER ki_home.events",)]))
+
+
+def _explains(server):
+    return [(statement, params) for statement, params in server.log if statement.startswith("EXPLAIN")]
+
+
+def test_slow_statements_logged_and_explained(make_fake_engine, fake_server, fake_events, caplog):
+    _slow_lookups(fake_server, fake_events(10), 0.1)
+    collected = []
+    engine = make_fake_engine(
+        slow_query_threshold=0.05, slow_query_explain="explain", statement_collectors=[collected.append]
+    )
+
+    with caplog.at_level(logging.WARNING, logger="sa_gpudb.slow_query"):
+        for id_ in (3, 4):
+            assert engine.execute(by_id, id=id_).first().label == "event %d" % id_
+        assert len(engine.execute("SELECT id, label, ts FROM events").fetchall()) == 10
+        engine.execute(events.delete().where(events.c.id == 5))
+
+    slow_log = engine.dialect.slow_query_log
+    fp = collected[0].fingerprint
+    assert [(entry[0], tuple(entry[1])) for entry in slow_log.recent] == [
+        (fp, (3,)),
+        (fp, (4,)),
+        ("DELETE FROM ki_home.events WHERE ki_home.events.id = ?", (5,)),
+    ]
+    assert [r.getMessage().split("\n")[0] for r in caplog.records] == [
+        "Slow query (%.3fs): %s; parameters: %r" % (entry[2], entry[0], entry[1]) for entry in slow_log.recent
+    ]
+
+    # one EXPLAIN per SELECT fingerprint, on the raw cursor with the real
+    # parameters
+    ((statement, params),) = _explains(fake_server)
+    assert statement == "EXPLAIN " + collected[0].statement and tuple(params) == (3,)
+    assert [e.plan for e in collected] == ["PROJECT\nFILTER ki_home.events"] * 2 + [None, None]
+    assert not any(e.statement.startswith("EXPLAIN") for e in collected)
+
+
+def test_slow_query_parameters_redacted(make_fake_engine, fake_server, fake_events, caplog):
+    _slow_lookups(fake_server, fake_events(10), 0.1)
+    engine = make_fake_engine(slow_query_threshold=0.05, slow_query_redact=True)
+
+    with caplog.at_level(logging.WARNING, logger="sa_gpudb.slow_query"):
+        assert engine.execute(by_id, id=7).first().id == 7
+    assert [entry[1] for entry in engine.dialect.slow_query_log.recent] == ["[redacted]"]
+    (record,) = caplog.records
+    assert record.getMessage().endswith("parameters: '[redacted]'")
+    # no plan unless slow_query_explain is set
+    assert _explains(fake_server) == []
@@ -0,0 +1,56 @@
+import datetime
+import gc
+import os
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.spill import SpillBuffer
+
+
+def test_spill_buffer(tmp_path):
+    buffer = SpillBuffer(1000, str(tmp_path))
+    buffer.extend((i, "x" * 20) for i in range(100))
+    buffer.finish()
+    assert 0 < buffer.spilled < 100 and len(buffer) == 100
+    assert buffer[0] == (0, "x" * 20) and buffer[99] == buffer[-1] == (99, "x" * 20)
+    assert [r[0] for r in buffer[10:90:20]] == [10, 30, 50, 70]
+    assert [r[0] for r in buffer] == [r[0] for r in buffer] == list(range(100))
+    with pytest.raises(IndexError):
+        buffer[100]
+    buffer.close()
+    # the spill file is unlinked from the start
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_spilled_result(fake_engine, fake_events, tmp_path):
+    fake_events(5000)
+    engine = fake_engine.execution_options(spill_threshold=10000, spill_dir=str(tmp_path))
+    result = engine.execute("SELECT id, label, ts FROM events")
+    # fully read: the connection is back in the pool
+    assert fake_engine.pool.checkedout() == 0
+    assert result._buffer.spilled > 4800
+
+    assert result.fetchone().id == 0
+    assert [r.id for r in result.fetchmany(3)] == [1, 2, 3]
+    assert [r.id for r in result.fetchmany()] == [4]
+    assert [r.label for r in result][-1] == "event 4999"
+    assert result.fetchone() is None
+
+    rows = result.rows
+    assert len(rows) == 5000
+    assert rows[4321].label == "event 4321" and rows[-1].ts == datetime.datetime(2024, 1, 1)
+    assert [r.id for r in rows[10:13]] == [10, 11, 12]
+    assert sum(1 for _ in rows) == sum(1 for _ in rows) == 5000
+
+    result.close()
+    with pytest.raises(sa.exc.ResourceClosedError):
+        result.fetchone()
+    gc.collect()
+
+
+def test_small_result_stays_in_memory(fake_engine, fake_events):
+    fake_events(10)
+    result = fake_engine.execution_options(spill_threshold=1024**2).execute("SELECT id FROM events")
+    assert result._buffer.spilled == 0
+    assert [r.id for r in result.fetchall()] == list(range(10))
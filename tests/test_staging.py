@@ -0,0 +1,85 @@
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.staging import bulk_delete, bulk_update, temp_table
+from sa_gpudb.testing import fake_odbc
+
+
+def test_temp_table_lifecycle(fake_engine, fake_server):
+    columns = [sa.Column("id", sa.BigInteger), sa.Column("label", sa.String(16))]
+    with temp_table(fake_engine, columns, rows=[(i, "k%d" % i) for i in range(25)], batch_size=10) as keys:
+        assert keys.name.startswith("sa_staging_")
+        assert fake_server.find_table(keys.name).rows[24] == (24, "k24")
+        with fake_engine.connect() as conn:
+            assert fake_engine.dialect.has_table(conn, keys.name)
+
+    create = next(statement for statement, _ in fake_server.log if statement.lstrip().startswith("CREATE"))
+    assert create.lstrip().startswith("CREATE TEMP TABLE %s" % keys.name)
+    assert create.rstrip().endswith("USING TABLE PROPERTIES (TTL = 20)")
+    inserts = [params for statement, params in fake_server.log if statement.startswith("INSERT INTO %s" % keys.name)]
+    assert [len(params) for params in inserts] == [10, 10, 5]
+    assert fake_server.find_table(keys.name) is None
+
+
+def test_temp_table_dropped_on_error_and_kept_on_request(fake_engine, fake_server):
+    source = sa.Table("orders", sa.MetaData(), sa.Column("id", sa.Integer, primary_key=True), schema="ki_home")
+    with pytest.raises(RuntimeError):
+        with temp_table(fake_engine, source, persist=True, ttl=None) as keys:
+            raise RuntimeError("boom")
+    assert fake_server.find_table(keys.name) is None
+    assert not any("TEMP" in statement or "TTL" in statement for statement, _ in fake_server.log)
+
+    with fake_engine.connect() as conn:
+        with temp_table(conn, source, keep=True, ttl=5) as kept:
+            pass
+    assert fake_server.find_table(kept.name) is not None
+
+
+orders = sa.Table(
+    "orders",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column("status", sa.String(16)),
+    sa.Column("total", sa.Float),
+    schema="ki_home",
+)
+
+
+def _mutations(fake_server):
+    fake_server.add_table("ki_home", "orders", [("id", "INTEGER"), ("status", "VARCHAR(16)"), ("total", "DOUBLE")])
+    staged = {}
+
+    def apply(statement, params):
+        table = next(t for t in fake_server.tables.values() if t.name.startswith("sa_staging_"))
+        staged["rows"] = list(table.rows)
+        return fake_odbc.Result(rowcount=len(table.rows))
+
+    fake_server.respond(r"^(UPDATE|DELETE|INSERT /\*)", apply)
+    return staged
+
+
+def test_bulk_update(fake_engine, fake_server):
+    staged = _mutations(fake_server)
+    rows = [{"id": i, "status": "void"} for i in range(1000)]
+    assert bulk_update(fake_engine, orders, rows, batch_size=400) == 1000
+
+    updates = [s for s, _ in fake_server.log if s.startswith("UPDATE")]
+    assert len(updates) == 1
+    assert updates[0].startswith("UPDATE ki_home.orders SET status=sa_staging_")
+    assert "WHERE ki_home.orders.id = sa_staging_" in updates[0]
+    assert staged["rows"][999] == (999, "void")
+    assert not [t for t in fake_server.tables.values() if t.name.startswith("sa_staging_")]
+
+    bulk_update(fake_engine, orders, [{"id": 1, "status": "paid", "total": 2.5}], upsert=True)
+    assert fake_server.log[-2][0].startswith("INSERT /* KI_HINT_UPDATE_ON_EXISTING_PK */ INTO ki_home.orders")
+
+
+def test_bulk_delete(fake_engine, fake_server):
+    staged = _mutations(fake_server)
+    assert bulk_delete(fake_engine, orders, range(10)) == 10
+    delete = next(s for s, _ in fake_server.log if s.startswith("DELETE"))
+    assert delete.startswith("DELETE FROM ki_home.orders WHERE ki_home.orders.id IN (SELECT sa_staging_")
+    assert staged["rows"] == [(i,) for i in range(10)]
+
+    with pytest.raises(sa.exc.ArgumentError):
+        bulk_delete(fake_engine, orders, [(1, "x")], key=["id", "nope"])
@@ -0,0 +1,49 @@
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.testing.fake_odbc import Result
+
+
+def _catalog(fake_server):
+    fake_server.respond(
+        r"ki_catalog\.ki_objects",
+        lambda statement, params: Result.from_columns(
+            ["schema_name", "object_name", "size", "memory_size", "shard_kind", "shard_key", "partition_kind"],
+            [("ki_home", "orders", 1250000, 96000000, "S", "customer_id, region", "RANGE")]
+            if params == ("ki_home", "orders")
+            else [],
+        ),
+    )
+    fake_server.respond(
+        r"ki_catalog\.ki_partitions",
+        Result.from_columns(["PARTITION_NAME", "PARTITION_DEFINITION"], [("p2020", "< 2021"), ("p2021", "< 2022")]),
+    )
+
+
+def test_get_table_stats(fake_engine, fake_server):
+    _catalog(fake_server)
+    inspector = sa.inspect(fake_engine)
+
+    stats = inspector.get_table_stats("orders", schema="ki_home")
+    assert stats["row_count"] == 1250000
+    assert stats["memory_size"] == 96000000
+    assert stats["shard_key"] == ["customer_id", "region"]
+    assert stats["partitions"][0] == {"partition_name": "p2020", "partition_definition": "< 2021"}
+    assert stats["ttl"] is None
+
+    count = fake_server.statement_count
+    table = sa.Table("orders", sa.MetaData(), schema="ki_home")
+    assert inspector.get_table_stats(table) == inspector.get_table_stats("ki_home.orders") == stats
+    assert fake_server.statement_count == count
+    assert not any("COUNT(" in statement.upper() for statement, _ in fake_server.log)
+
+    with pytest.raises(sa.exc.NoSuchTableError):
+        inspector.get_table_stats("missing", schema="ki_home")
+
+
+def test_approx_count_distinct(fake_engine):
+    column = sa.column("customer_id")
+    stmt = sa.select([sa.func.approx_count_distinct(column)])
+    assert str(stmt.compile(dialect=fake_engine.dialect)) == (
+        "SELECT APPROX_COUNT_DISTINCT(customer_id) AS approx_count_distinct_1"
+    )
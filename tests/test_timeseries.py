@@ -0,0 +1,46 @@
+import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.superset import TIME_GRAIN_EXPRESSIONS, KineticaEngineSpec
+
+
+ts = sa.column("ts", sa.DateTime)
+
+
+def _sql(fake_engine, expr):
+    return str(expr.compile(dialect=fake_engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def test_extract(fake_engine):
+    assert _sql(fake_engine, sa.extract("year", ts)) == "YEAR(ts)"
+    assert _sql(fake_engine, sa.extract("dow", ts)) == "DAYOFWEEK(ts)"
+    assert _sql(fake_engine, sa.extract("epoch", ts)) == "EXTRACT(EPOCH FROM ts)"
+
+
+def test_time_functions(fake_engine):
+    assert _sql(fake_engine, sa.func.date_trunc("months", ts)) == "DATE_TRUNC(MONTH, ts)"
+    assert _sql(fake_engine, sa.func.timestampadd("day", 3, ts)) == "TIMESTAMPADD(DAY, 3, ts)"
+    assert _sql(fake_engine, sa.func.timestampdiff("minute", ts, sa.func.now())) == (
+        "TIMESTAMPDIFF(MINUTE, ts, CURRENT_TIMESTAMP)"
+    )
+    assert _sql(fake_engine, sa.func.time_bucket(datetime.timedelta(minutes=5), ts)) == "TIME_BUCKET(300000, ts)"
+    assert _sql(fake_engine, sa.func.date_bucket(datetime.timedelta(weeks=1), ts, 2)) == "DATE_BUCKET(7, ts, 2)"
+
+    with pytest.raises(sa.exc.CompileError):
+        _sql(fake_engine, sa.func.date_trunc("fortnight", ts))
+    # widths are not truncated to a smaller, or zero, bucket
+    half_ms = datetime.timedelta(microseconds=500)
+    for fn in (sa.func.date_bucket(datetime.timedelta(hours=12), ts), sa.func.time_bucket(half_ms, ts)):
+        with pytest.raises(sa.exc.CompileError):
+            _sql(fake_engine, fn)
+
+
+def test_superset_time_grains_match_compiler(fake_engine):
+    col = sa.literal_column("{col}")
+    assert TIME_GRAIN_EXPRESSIONS["P1M"] == _sql(fake_engine, sa.func.date_trunc("month", col))
+    assert TIME_GRAIN_EXPRESSIONS["PT15M"] == _sql(
+        fake_engine, sa.func.time_bucket(datetime.timedelta(minutes=15), col)
+    )
+    assert KineticaEngineSpec.convert_dttm("DATE", datetime.datetime(2021, 3, 4, 5, 6)) == "DATE('2021-03-04')"
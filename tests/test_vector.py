@@ -0,0 +1,49 @@
+import array
+
+import pytest
+import sqlalchemy as sa
+
+from sa_gpudb.vector import VECTOR
+
+
+def _docs():
+    return sa.Table("docs", sa.MetaData(), sa.Column("id", sa.Integer), sa.Column("embedding", VECTOR(3)), schema="ki_home")
+
+
+def test_compile_nearest_neighbours(fake_engine):
+    docs = _docs()
+    stmt = sa.select([docs.c.id]).order_by(docs.c.embedding.l2_distance([1, 0, 0.5])).limit(5)
+    compiled = stmt.compile(dialect=fake_engine.dialect)
+    assert str(compiled).startswith("SELECT TOP 5 ")
+    assert "ORDER BY L2_DISTANCE(" in str(compiled)
+    assert list(compiled.params.values()) == ["[1.0,0.0,0.5]"]
+
+    with pytest.raises(sa.exc.ArgumentError):
+        docs.c.embedding.cosine_distance([1, 2])
+
+    ddl = str(sa.schema.CreateTable(docs).compile(dialect=fake_engine.dialect))
+    assert "embedding VECTOR(3)" in ddl
+
+
+def test_packed_round_trip(fake_engine, fake_server):
+    fake_server.add_table("ki_home", "docs", [("id", "INTEGER"), ("embedding", "VECTOR(3)")])
+    assert sa.inspect(fake_engine).get_columns("docs", schema="ki_home")[1]["type"].dim == 3
+
+    docs = _docs()
+    fake_engine.execute(docs.insert(), [{"id": 1, "embedding": [1.0, 2.0, 3.5]}, {"id": 2, "embedding": None}])
+    packed = fake_server.tables[("ki_home", "docs")].rows[0][1]
+    assert packed == array.array("f", [1.0, 2.0, 3.5]).tobytes()
+
+    rows = fake_engine.execute(sa.select([docs])).fetchall()
+    assert list(rows[0].embedding) == [1.0, 2.0, 3.5]
+    assert rows[1].embedding is None
+
+
+def test_numpy_binding(fake_engine, fake_server):
+    numpy = pytest.importorskip("numpy")
+    fake_server.add_table("ki_home", "docs", [("id", "INTEGER"), ("embedding", "VECTOR(3)")])
+    docs = _docs()
+    fake_engine.execute(docs.insert(), id=1, embedding=numpy.array([0.5, 0.25, 1.0]))
+    (row,) = fake_engine.execute(sa.select([docs])).fetchall()
+    assert row.embedding.dtype == numpy.float32
+    assert row.embedding.tolist() == [0.5, 0.25, 1.0]